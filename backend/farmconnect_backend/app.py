@@ -1,10 +1,41 @@
-from fastapi import FastAPI
+import os
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.staticfiles import StaticFiles
 from farmer_main import router as farmer_router
 from worker_main import router as worker_router
+from storage import IMAGE_STORAGE, LOCAL_IMAGE_DIR, LOCAL_IMAGE_URL
+from supabase_client import start_client, close_client
+from cache import profile_cache
+from realtime import start_listener, stop_listener
+import geo
+import instrumentation
+from notifications import notification_queue
+from idempotency import idempotency_store, IdempotencyMiddleware
 
-app = FastAPI()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # one pooled Supabase client shared by both routers
+    await start_client()
+    await start_listener()
+    notification_queue.start()
+    yield
+    await notification_queue.stop()
+    await stop_listener()
+    await close_client()
+    await profile_cache.close()
+    await idempotency_store.close()
+    await geo.close()
+
+
+app = FastAPI(lifespan=lifespan)
+
+# retried POSTs with an Idempotency-Key get the stored first response (see idempotency.py)
+app.add_middleware(IdempotencyMiddleware)
+
+# added last so it wraps IdempotencyMiddleware: replayed responses get CORS headers too
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -13,10 +44,39 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def supabase_round_trips(request: Request, call_next):
+    # every Supabase call made while handling this request is recorded (see instrumentation.py)
+    with instrumentation.track() as stats:
+        response = await call_next(request)
+    if instrumentation.SERVER_TIMING:
+        response.headers["Server-Timing"] = stats.server_timing()
+    return response
+
 @app.get("/")
 def home():
     return {"message": "API is running!"}
 
+@app.get("/cache/stats")
+async def cache_stats():
+    """Profile cache hit/miss counters (for tuning PROFILE_CACHE_TTL / PROFILE_CACHE_SIZE)."""
+    return profile_cache.stats()
+
+@app.get("/idempotency/stats")
+async def idempotency_stats():
+    """Stored responses and replays for Idempotency-Key requests."""
+    return idempotency_store.stats()
+
+@app.get("/metrics/supabase")
+async def supabase_metrics():
+    """Supabase round trips since start: calls, latency and bytes per table."""
+    return instrumentation.metrics()
+
 # include routers
 app.include_router(farmer_router, prefix="/farmer", tags=["Farmer"])
 app.include_router(worker_router, prefix="/worker", tags=["Worker"])
+
+# serve uploaded images when using the local storage backend
+if IMAGE_STORAGE == "local":
+    os.makedirs(LOCAL_IMAGE_DIR, exist_ok=True)
+    app.mount(LOCAL_IMAGE_URL, StaticFiles(directory=LOCAL_IMAGE_DIR), name="media")
@@ -0,0 +1,52 @@
+"""
+One-off script: move inline base64 images that were saved before
+image storage existed into the storage backend.
+
+    python backfill_images.py
+"""
+import asyncio
+
+from storage import is_stored_url, store_profile_picture, store_job_images
+from supabase_client import start_client, close_client
+
+
+async def backfill_profiles(supabase, table: str, folder: str):
+    rows = await supabase.table(table).select("id, profile_picture").not_.is_("profile_picture", "null").execute()
+    for row in rows.data or []:
+        if is_stored_url(row["profile_picture"]):
+            continue
+        try:
+            updates = await store_profile_picture({"profile_picture": row["profile_picture"]}, f"{folder}/{row['id']}")
+        except ValueError as e:
+            print(f"Skipping {table} {row['id']}: {e}")
+            continue
+        await supabase.table(table).update(updates, returning="minimal").eq("id", row["id"]).execute()
+        print(f"Moved picture for {table} {row['id']}")
+
+
+async def backfill_jobs(supabase):
+    rows = await supabase.table("job_listings").select("job_id, farmer_id, job_images").not_.is_("job_images", "null").execute()
+    for row in rows.data or []:
+        if all(is_stored_url(image) for image in row["job_images"]):
+            continue
+        try:
+            updates = await store_job_images({"job_images": row["job_images"]}, f"jobs/{row['farmer_id']}")
+        except ValueError as e:
+            print(f"Skipping job {row['job_id']}: {e}")
+            continue
+        await supabase.table("job_listings").update(updates, returning="minimal").eq("job_id", row["job_id"]).execute()
+        print(f"Moved images for job {row['job_id']}")
+
+
+async def main():
+    supabase = await start_client()
+    try:
+        await backfill_profiles(supabase, "farmer_registration", "farmers")
+        await backfill_profiles(supabase, "worker_registration", "workers")
+        await backfill_jobs(supabase)
+    finally:
+        await close_client()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
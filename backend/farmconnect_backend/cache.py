@@ -0,0 +1,161 @@
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # redis is optional; the in-process cache works without it
+    redis = None
+
+from queries import fetch_one, FARMER_PROFILE_COLUMNS, WORKER_PROFILE_COLUMNS
+
+# ==========================================================
+# 🗄️ Read-through profile cache
+# ==========================================================
+# Profiles are read on every dashboard render but change rarely.
+# Reads go through an in-process TTL/LRU cache (or Redis when
+# REDIS_URL is set); registration and profile updates invalidate.
+# A miss only stores what it read if no invalidate() for that key ran
+# while it was reading, so an old row can't outlive its invalidation.
+
+load_dotenv()
+PROFILE_CACHE_TTL = float(os.getenv("PROFILE_CACHE_TTL", "300"))
+PROFILE_CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", "10000"))
+REDIS_URL = os.getenv("REDIS_URL")
+
+PROFILE_TABLES = {
+    "farmer": ("farmer_registration", FARMER_PROFILE_COLUMNS),
+    "worker": ("worker_registration", WORKER_PROFILE_COLUMNS),
+}
+
+
+class TTLCache:
+    """Small LRU cache whose entries expire after `ttl` seconds."""
+
+    def __init__(self, max_size: int = PROFILE_CACHE_SIZE, ttl: float = PROFILE_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+
+    async def get(self, key: str):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    async def delete(self, key: str):
+        self._data.pop(key, None)
+
+    def __len__(self):
+        return len(self._data)
+
+    async def close(self):
+        self._data.clear()
+
+
+class RedisCache:
+    """Same interface as TTLCache, shared between processes through Redis."""
+
+    def __init__(self, url: str, ttl: float = PROFILE_CACHE_TTL, prefix: str = "profile:"):
+        self.client = redis.from_url(url)
+        self.ttl = int(ttl)
+        self.prefix = prefix
+
+    async def get(self, key: str):
+        raw = await self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value):
+        await self.client.set(self.prefix + key, json.dumps(value, default=str), ex=self.ttl)
+
+    async def delete(self, key: str):
+        await self.client.delete(self.prefix + key)
+
+    def __len__(self):
+        return -1  # not tracked locally
+
+    async def close(self):
+        await self.client.aclose()
+
+
+class ProfileCache:
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # key -> [version, readers], only while a miss for that key is reading;
+        # invalidate() bumps the version
+        self._reads: Dict[str, List[int]] = {}
+
+    async def get_profile(self, client, kind: str, id: str) -> Optional[dict]:
+        """Return the farmer/worker profile for `id`, loading it from Supabase on a miss."""
+        key = f"{kind}:{id}"
+        profile = await self.backend.get(key)
+        if profile is not None:
+            self.hits += 1
+            return dict(profile)
+
+        self.misses += 1
+        table, columns = PROFILE_TABLES[kind]
+        read = self._reads.setdefault(key, [0, 0])
+        version = read[0]
+        read[1] += 1
+        try:
+            profile = await fetch_one(client, table, columns, {"id": id})
+            if profile is not None and read[0] == version:
+                await self.backend.set(key, profile)
+                if read[0] != version:  # invalidated while storing
+                    await self.backend.delete(key)
+        finally:
+            read[1] -= 1
+            if not read[1]:
+                self._reads.pop(key, None)
+        return dict(profile) if profile is not None else None
+
+    async def invalidate(self, kind: str, id: str):
+        self.invalidations += 1
+        key = f"{kind}:{id}"
+        read = self._reads.get(key)
+        if read:
+            read[0] += 1
+        await self.backend.delete(key)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "redis" if isinstance(self.backend, RedisCache) else "memory",
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "size": len(self.backend),
+            "ttl_seconds": PROFILE_CACHE_TTL,
+        }
+
+    async def close(self):
+        await self.backend.close()
+
+
+def _make_backend():
+    if REDIS_URL and redis is not None:
+        return RedisCache(REDIS_URL)
+    return TTLCache()
+
+
+profile_cache = ProfileCache(_make_backend())
@@ -0,0 +1,59 @@
+import asyncio
+from typing import Any, Dict, Iterable, List, Tuple
+
+
+# ==========================================================
+# 🔧 Batched lookups for collaboration lists
+# ==========================================================
+# Collaboration rows only carry ids. Instead of fetching the
+# worker/farmer and the job for every row (N+1 round trips),
+# collect all ids first and fetch each table once with in_().
+
+async def fetch_by_ids(client, table: str, key: str, ids: Iterable[Any], columns: str) -> Dict[Any, dict]:
+    """Fetch rows of `table` whose `key` is in `ids` with one query, keyed by `key`."""
+    unique_ids = list(dict.fromkeys(i for i in ids if i is not None))
+    if not unique_ids:
+        return {}
+
+    wanted = [c.strip() for c in columns.split(",")]
+    select_columns = columns if key in wanted else f"{key}, {columns}"
+
+    result = await client.table(table).select(select_columns).in_(key, unique_ids).execute()
+
+    rows = {}
+    for row in result.data or []:
+        row_id = row[key] if key in wanted else row.pop(key)
+        rows[row_id] = row
+    return rows
+
+
+async def fetch_collaboration_details(
+    client,
+    collaborations: List[dict],
+    counterpart: str,
+    counterpart_columns: str,
+    job_columns: str = "job_title, job_description",
+) -> Tuple[Dict[Any, dict], Dict[Any, dict]]:
+    """
+    Load the counterpart profiles ("worker" or "farmer") and jobs
+    referenced by `collaborations` in two concurrent queries total.
+    Returns (profiles_by_id, jobs_by_id).
+    """
+    id_field = f"{counterpart}_id"
+    profiles, jobs = await asyncio.gather(
+        fetch_by_ids(
+            client,
+            f"{counterpart}_registration",
+            "id",
+            [c[id_field] for c in collaborations],
+            counterpart_columns,
+        ),
+        fetch_by_ids(
+            client,
+            "job_listings",
+            "job_id",
+            [c["job_id"] for c in collaborations],
+            job_columns,
+        ),
+    )
+    return profiles, jobs
@@ -1,23 +1,37 @@
-from fastapi import APIRouter, HTTPException
-from supabase import create_client, Client
-from dotenv import load_dotenv
-import os
-from datetime import datetime
+import asyncio
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from datetime import date, datetime
 from models import FarmerRegistration, JobListings, FeedbackModel, Collaboration
+from enrichment import fetch_collaboration_details
+from pagination import apply_eq_filters, paginate, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from queries import (
+    exists, fetch_one, call_rpc, execute_unique, JOB_LIST_COLUMNS, WORKER_CARD_COLUMNS,
+    SENT_REQUEST_COLUMNS, RECEIVED_REQUEST_COLUMNS, ACTIVE_COLLABORATION_COLUMNS
+)
+from storage import store_profile_picture, store_job_images
+from geo import locate, NEARBY_DEFAULT_RADIUS_KM, NEARBY_MAX_RADIUS_KM
+from supabase_client import get_supabase
+from cache import profile_cache
+from matching import worker_index, job_index, JOB_MATCH_COLUMNS
+from realtime import collaboration_changed, event_stream
+from notifications import notify_collaboration, notify_feedback, inbox, mark_read, DASHBOARD_NOTIFICATIONS
+from sync import changes, DEFAULT_SYNC_LIMIT, MAX_SYNC_LIMIT
+from repository import (
+    update_profile, update_returning, transition_collaboration, complete_collaboration,
+    transition_collaborations, STATUS_ACTIONS
+)
 from schema import (
      FarmerUpdate, WorkerSearchFilter, 
-    SendRequest, UpdateRequestStatus, FeedbackInput, JobCreate
+    UpdateRequestStatus, HomeDashboard,
+    BulkSendRequest, BulkUpdateRequestStatus
 )
 
 # Initialize Router
+# (the shared async Supabase client is injected per request, see supabase_client.py)
 router = APIRouter()
 
-# Load Supabase environment variables
-load_dotenv()
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_ANON_KEY")
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-
 
 # ==========================================================
 # 🔧 Helper Function: Convert datetime fields to ISO format
@@ -33,16 +47,21 @@ def convert_datetime_to_iso(data_dict: dict):
 # 1️⃣ FARMER REGISTRATION
 # ==========================================================
 @router.post("/register")
-def register_farmer(data: FarmerRegistration):
-    existing = supabase.table("farmer_registration").select("*").eq("email", data.email).execute()
-    if existing.data:
+async def register_farmer(data: FarmerRegistration, supabase=Depends(get_supabase)):
+    if await exists(supabase, "farmer_registration", {"email": data.email}):
         raise HTTPException(status_code=400, detail="Email already registered. Please login instead.")
 
     data_dict = data.dict()
     
     data_dict = convert_datetime_to_iso(data_dict)
 
-    result = supabase.table("farmer_registration").insert(data_dict).execute()
+    try:
+        data_dict = await store_profile_picture(data_dict, f"farmers/{data.id}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    result = await supabase.table("farmer_registration").insert(data_dict).execute()
+    await profile_cache.invalidate("farmer", data.id)
     return {"message": "Farmer registered successfully", "data": result.data}
 
 
@@ -64,28 +83,28 @@ def register_farmer(data: FarmerRegistration):
 #     return {"message": "Profile updated successfully.", "updated_profile": updated.data[0]}
 
 @router.put("/update_profile/{id}")
-def update_farmer_profile(id: str, updates: FarmerUpdate):
-    existing = supabase.table("farmer_registration").select("*").eq("id", id).execute()
-    if not existing.data:
-        raise HTTPException(status_code=404, detail="Farmer not found.")
-
+async def update_farmer_profile(id: str, updates: FarmerUpdate, supabase=Depends(get_supabase)):
     update_data = updates.dict(exclude_unset=True)
     update_data.pop("email", None)  # ✅ Prevent updating email
     update_data = convert_datetime_to_iso(update_data)
 
-    supabase.table("farmer_registration").update(update_data).eq("id", id).execute()
+    try:
+        update_data = await store_profile_picture(update_data, f"farmers/{id}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     print("Received update data:", update_data)
 
-    updated = supabase.table("farmer_registration").select("*").eq("id", id).execute()
+    # single UPDATE ... RETURNING; None means there is no such farmer
+    updated = await update_profile(supabase, "farmer_registration", id, update_data)
+    if not updated:
+        raise HTTPException(status_code=404, detail="Farmer not found.")
 
-    # # ✅ Add Base64 image handling
-    # if updated.data[0].get("profile_picture"):
-    #     updated.data[0]["profile_picture"] = f"data:image/jpeg;base64,{updated.data[0]['profile_picture']}"
-    # print("Updated profile data:", updated.data[0])
     # ✅ Hide email
-    updated.data[0].pop("email", None)
+    updated.pop("email", None)
+    await profile_cache.invalidate("farmer", id)
      
-    return {"message": "Profile updated successfully.", "updated_profile": updated.data[0]}
+    return {"message": "Profile updated successfully.", "updated_profile": updated}
 
 # @router.get("/profile/{id}")
 
@@ -97,73 +116,238 @@ def update_farmer_profile(id: str, updates: FarmerUpdate):
 #         raise HTTPException(status_code=404, detail="Farmer not found.")
 #     return farmer.data[0]
 @router.get("/profile/{id}")
-def get_farmer_profile(id: str):
+async def get_farmer_profile(id: str, supabase=Depends(get_supabase)):
     print("Fetching profile for farmer ID:", id)
-    farmer = supabase.table("farmer_registration").select("*").eq("id", id).execute()
+    # ✅ Do not return email (FARMER_PROFILE_COLUMNS leaves it out)
+    # Served from the profile cache; Supabase is only hit on a miss
+    profile = await profile_cache.get_profile(supabase, "farmer", id)
 
-    if not farmer.data:
+    if not profile:
         raise HTTPException(status_code=404, detail="Farmer not found.")
 
-    profile = farmer.data[0]
-
-    # ✅ Convert Base64 string to data URL for frontend display
-    # if profile.get("profile_picture"):
-    #     profile["profile_picture"] = f"data:image/jpeg;base64,{profile['profile_picture']}"
-
-    # ✅ Do not return email (hide from frontend)
-    if "email" in profile:
-        del profile["email"]
-
     return profile
 
 # ==========================================================
 # 4️⃣ POST JOB
 # ==========================================================
 @router.post("/post_job")
-def post_job(job: JobListings):
+async def post_job(job: JobListings, supabase=Depends(get_supabase)):
     
-    farmer_check = supabase.table("farmer_registration").select("*").eq("id", job.farmer_id).execute()
-
-    if not farmer_check.data:
+    if not await exists(supabase, "farmer_registration", {"id": job.farmer_id}):
         raise HTTPException(status_code=404, detail="Farmer not found.")
 
     job_data = job.dict()
     job_data.pop("job_id", None)
     job_data["created_at"] = datetime.now().isoformat()
+    if job.work_start_date and job.work_end_date and job.work_end_date < job.work_start_date:
+        raise HTTPException(status_code=400, detail="work_end_date must be on or after work_start_date.")
+    for field in ("work_start_date", "work_end_date"):
+        if job_data.get(field):
+            job_data[field] = job_data[field].isoformat()
+
+    try:
+        # image upload and geocoding touch different keys, so run them together
+        await asyncio.gather(
+            store_job_images(job_data, f"jobs/{job.farmer_id}"),
+            locate(job_data),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    result = supabase.table("job_listings").insert(job_data).execute()
+    result = await supabase.table("job_listings").insert(job_data).execute()
+    if result.data:
+        job_index.add(result.data[0])
     return {"message": "Job posted successfully.", "data": result.data}
 
 # ==========================================================
 # 5️⃣ VIEW ALL WORKERS
 # ==========================================================
 @router.get("/all_workers")
-def get_all_workers():
-    workers = supabase.table("worker_registration").select("*").execute()
+async def get_all_workers(supabase=Depends(get_supabase)):
+    workers = await supabase.table("worker_registration").select(WORKER_CARD_COLUMNS).execute()
     if not workers.data:
         return {"workers": []}
     return {"workers": workers.data}
 
+
+# ==========================================================
+# 5️⃣ SEARCH WORKERS (filters evaluated in the database)
+# ==========================================================
+@router.post("/search_workers")
+async def search_workers(
+    filters: WorkerSearchFilter,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    supabase=Depends(get_supabase),
+):
+    """Search workers by skill, level, location, salary and accommodation, one page at a time."""
+    query = supabase.table("worker_registration").select(WORKER_CARD_COLUMNS)
+    query = apply_eq_filters(query, {
+        "skill_level": filters.skill_level,
+        "city": filters.city,
+        "state": filters.state,
+        "need_accommodation": filters.need_accommodation,
+    })
+
+    if filters.skill_expertise:
+        query = query.contains("job_expertise", [filters.skill_expertise])
+
+    if filters.salary_range:
+        if len(filters.salary_range) != 2:
+            raise HTTPException(status_code=400, detail="salary_range must be [min, max].")
+        min_salary, max_salary = filters.salary_range
+        query = query.gte("expected_salary", min_salary).lte("expected_salary", max_salary)
+
+    workers, next_cursor = await paginate(query, "id", cursor, limit)
+    return {"workers": workers, "next_cursor": next_cursor}
+
+
+# ==========================================================
+# ⭐ TOP RATED WORKERS IN A DISTRICT
+# ==========================================================
+@router.get("/top_workers")
+async def top_rated_workers(
+    state: str,
+    city: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    supabase=Depends(get_supabase),
+):
+    """Best rated workers in a state/city, read from the running aggregates (worker_registration_top_rated_idx)."""
+    query = (
+        supabase.table("worker_registration")
+        .select(WORKER_CARD_COLUMNS)
+        .eq("state", state)
+        .gt("rating_count", 0)
+    )
+    if city:
+        query = query.eq("city", city)
+    result = await (
+        query.order("rating_avg", desc=True)
+        .order("rating_count", desc=True)
+        .limit(limit)
+        .execute()
+    )
+    return {"workers": result.data}
+
 # ==========================================================
 # 5️⃣ VIEW JOBS BY FARMER
 # ==========================================================
 @router.get("/jobs/{farmer_id}")
-def get_farmer_jobs(farmer_id: str):
-    jobs = supabase.table("job_listings").select("*").eq("farmer_id", farmer_id).execute()
+async def get_farmer_jobs(farmer_id: str, supabase=Depends(get_supabase)):
+    jobs = await supabase.table("job_listings").select(JOB_LIST_COLUMNS).eq("farmer_id", farmer_id).execute()
     return {"jobs": jobs.data} 
 
 
 
 
+# ==========================================================
+# 5️⃣ RANKED WORKER MATCHES FOR A JOB
+# ==========================================================
+@router.get("/jobs/{job_id}/matches")
+async def get_job_matches(
+    job_id: int,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    supabase=Depends(get_supabase),
+):
+    """Rank workers for a job by expertise, location, skill, salary and accommodation (see matching.py)."""
+    job, _ = await asyncio.gather(
+        fetch_one(supabase, "job_listings", JOB_MATCH_COLUMNS, {"job_id": job_id}),
+        worker_index.refresh_if_stale(supabase),
+    )
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found.")
+
+    return {"job_id": job_id, "matches": worker_index.rank(job, limit)}
+
+
+# ==========================================================
+# 📍 WORKERS NEAR A JOB
+# ==========================================================
+@router.get("/jobs/{job_id}/workers_nearby")
+async def workers_nearby(
+    job_id: int,
+    radius_km: float = Query(NEARBY_DEFAULT_RADIUS_KM, gt=0, le=NEARBY_MAX_RADIUS_KM),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    supabase=Depends(get_supabase),
+):
+    """Workers within `radius_km` of the job's geocoded address, nearest first."""
+    job = await fetch_one(supabase, "job_listings", "latitude, longitude", {"job_id": job_id})
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    if job["latitude"] is None:
+        raise HTTPException(status_code=400, detail="Job address could not be located.")
+
+    # bounding-box index scan + haversine in one query (see nearby_workers)
+    workers = await call_rpc(supabase, "nearby_workers", {
+        "p_latitude": job["latitude"],
+        "p_longitude": job["longitude"],
+        "p_radius_km": radius_km,
+        "p_limit": limit,
+    })
+    return {"job_id": job_id, "workers": workers, "radius_km": radius_km}
+
+
+# ==========================================================
+# 📅 WORKERS FREE FOR A JOB'S DATES
+# ==========================================================
+@router.get("/jobs/{job_id}/available_workers")
+async def available_workers(
+    job_id: int,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    radius_km: Optional[float] = Query(None, gt=0, le=NEARBY_MAX_RADIUS_KM),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    supabase=Depends(get_supabase),
+):
+    """
+    Workers whose availability covers the whole window and who are not
+    booked on another job in it, nearest first. The window defaults to
+    the job's work dates.
+    """
+    job = await fetch_one(supabase, "job_listings", "work_start_date, work_end_date", {"job_id": job_id})
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found.")
+
+    start_date = start_date or job["work_start_date"]
+    end_date = end_date or job["work_end_date"]
+    if not start_date or not end_date:
+        raise HTTPException(status_code=400, detail="start_date and end_date are required (the job has no work dates).")
+    if str(end_date) < str(start_date):
+        raise HTTPException(status_code=400, detail="end_date must be on or after start_date.")
+
+    # GiST range lookups + location filter in one query (see available_workers)
+    workers = await call_rpc(supabase, "available_workers", {
+        "p_job_id": job_id,
+        "p_start": str(start_date),
+        "p_end": str(end_date),
+        "p_radius_km": radius_km,
+        "p_limit": limit,
+    })
+    return {"job_id": job_id, "start_date": str(start_date), "end_date": str(end_date), "workers": workers}
+
+
 @router.delete("/delete_job/{job_id}")
-def delete_job(job_id: int):
-    existing = supabase.table("job_listings").select("*").eq("job_id", job_id).execute()
-    if not existing.data:
+async def delete_job(job_id: int, supabase=Depends(get_supabase)):
+    if not await exists(supabase, "job_listings", {"job_id": job_id}):
         raise HTTPException(status_code=404, detail="Job not found.")
 
-    supabase.table("job_listings").delete().eq("job_id", job_id).execute()
+    await supabase.table("job_listings").delete(returning="minimal").eq("job_id", job_id).execute()
+    job_index.remove(job_id)
     return {"message": "Job deleted successfully."}
 
+
+@router.put("/close_job/{job_id}")
+async def close_job(job_id: int, supabase=Depends(get_supabase)):
+    """Stop a job from showing in worker feeds, whether or not it is filled."""
+    job = await update_returning(
+        supabase, "job_listings", {"job_status": "closed"}, {"job_id": job_id}
+    )
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found.")
+
+    job_index.remove(job_id)
+    return {"message": "Job closed successfully.", "job_id": job_id, "job_status": job["job_status"]}
+
 # @router.view("/job/{job_id}")
 # def get_job_details(job_id: int):
 #     job = supabase.table("job_listings").select("*").eq("job_id", job_id).execute()
@@ -184,55 +368,32 @@ def serialize_datetimes(data: dict):
     return data
 
 @router.post("/send_request")
-def send_request(data: Collaboration):
+async def send_request(data: Collaboration, supabase=Depends(get_supabase)):
     """Farmer sends a work request to a worker for a specific job."""
 
     # ✅ Use user_id instead of farmer_id/worker_id
-    farmer = supabase.table("farmer_registration").select("*").eq("id", data.farmer_id).execute()
-    if not farmer.data:
-        raise HTTPException(status_code=404, detail="Farmer not found.")
-
-    worker = supabase.table("worker_registration").select("*").eq("id", data.worker_id).execute()
-    if not worker.data:
-        raise HTTPException(status_code=404, detail="Worker not found.")
-
-    job = supabase.table("job_listings").select("*").eq("job_id", data.job_id).execute()
-    if not job.data:
-        raise HTTPException(status_code=404, detail="Job not found.")
-
-    existing = (
-        supabase.table("collaborations")
-        .select("*")
-        .eq("farmer_id", data.farmer_id)
-        .eq("worker_id", data.worker_id)
-        .eq("job_id", data.job_id)
-        .execute()
-    )
-
-    if existing.data:
-        raise HTTPException(status_code=400, detail="Request already sent for this job.")
-
-    data_dict = data.dict()
-    data_dict.pop("collaboration_id", None)
-    data_dict["status"] = "Pending"
-    data_dict["accepted_by_farmer"] = True
-    data_dict["requested_at"] = datetime.utcnow()
-    data_dict = serialize_datetimes(data_dict)
-
-    result = supabase.table("collaborations").insert(data_dict).execute()
-    return {"message": "Request sent successfully to worker.", "data": result.data}
+    # Validation, duplicate check and insert happen in one database call
+    # (see send_collaboration_request in supabase/migrations)
+    collaboration = await call_rpc(supabase, "send_collaboration_request", {
+        "p_farmer_id": data.farmer_id,
+        "p_worker_id": data.worker_id,
+        "p_job_id": data.job_id,
+    })
+    collaboration_changed("collaboration.insert", collaboration)
+    notify_collaboration(collaboration, "farmer")
+    return {"message": "Request sent successfully to worker.", "data": [collaboration]}
 
 # ==========================================================
 # 7️⃣ VIEW SENT REQUESTS (Farmer)
 # ==========================================================
 # ==========================================================
 @router.get("/sent_requests/{farmer_id}")
-def view_sent_requests(farmer_id: str):
+async def view_sent_requests(farmer_id: str, supabase=Depends(get_supabase)):
 
     # Fetch only farmer-sent requests
-    requests = (
+    requests = await (
         supabase.table("collaborations")
-        .select("*")
+        .select(SENT_REQUEST_COLUMNS)
         .eq("farmer_id", farmer_id)
         .eq("accepted_by_farmer", True)  
         .eq("accepted_by_worker", False) # farmer has sent request
@@ -243,29 +404,19 @@ def view_sent_requests(farmer_id: str):
     if not requests.data:
         return {"sent_requests": []}
 
+    workers, jobs = await fetch_collaboration_details(
+        supabase, requests.data, "worker", "name, job_expertise, city, state"
+    )
+
     enriched = []
 
     for req in requests.data:
-
-        worker = (
-            supabase.table("worker_registration")
-            .select("name, job_expertise, city, state")
-            .eq("id", req["worker_id"])
-            .execute()
-        )
-
-        job = (
-            supabase.table("job_listings")
-            .select("job_title, job_description")
-            .eq("job_id", req["job_id"])
-            .execute()
-        )
-
         enriched.append({
             "collaboration_id": req["collaboration_id"],
-            "worker_details": worker.data[0] if worker.data else {},
-            "job_details": job.data[0] if job.data else {},
+            "worker_details": workers.get(req["worker_id"], {}),
+            "job_details": jobs.get(req["job_id"], {}),
             "status": req["status"],
+            "version": req.get("version"),
             "accepted_by_farmer": req["accepted_by_farmer"],
             "accepted_by_worker": req["accepted_by_worker"],
             "requested_at": req["requested_at"]
@@ -276,12 +427,12 @@ def view_sent_requests(farmer_id: str):
 
 # ==========================================================
 @router.get("/received_requests/{farmer_id}")
-def view_received_requests(farmer_id: str):
+async def view_received_requests(farmer_id: str, supabase=Depends(get_supabase)):
 
     # Fetch all pending collaboration requests sent TO the farmer
-    requests = (
+    requests = await (
         supabase.table("collaborations")
-        .select("*")
+        .select(RECEIVED_REQUEST_COLUMNS)
         .eq("farmer_id", farmer_id)
         .eq("status", "Pending")            # farmer has not accepted yet
         .eq("accepted_by_farmer", False)     # must show in received section
@@ -291,31 +442,20 @@ def view_received_requests(farmer_id: str):
     if not requests.data:
         return {"received_requests": []}
 
+    # Fetch worker and job details for all requests at once
+    workers, jobs = await fetch_collaboration_details(
+        supabase, requests.data, "worker", "name, job_expertise, city, state"
+    )
+
     enriched = []
 
     for req in requests.data:
-
-        # Fetch worker details
-        worker = (
-            supabase.table("worker_registration")
-            .select("name, job_expertise, city, state")
-            .eq("id", req["worker_id"])
-            .execute()
-        )
-
-        # Fetch job details
-        job = (
-            supabase.table("job_listings")
-            .select("job_title, job_description")
-            .eq("job_id", req["job_id"])
-            .execute()
-        )
-
         enriched.append({
             "collaboration_id": req["collaboration_id"],
-            "worker_details": worker.data[0] if worker.data else {},
-            "job_details": job.data[0] if job.data else {},
+            "worker_details": workers.get(req["worker_id"], {}),
+            "job_details": jobs.get(req["job_id"], {}),
             "status": req["status"],
+            "version": req.get("version"),
             "requested_at": req["requested_at"]
         })
 
@@ -326,61 +466,132 @@ def view_received_requests(farmer_id: str):
 # 8️⃣ UPDATE REQUEST STATUS (Farmer accepts/rejects)
 # ==========================================================
 @router.put("/update_request_status")
-def update_request_status(data: UpdateRequestStatus):
-    req = supabase.table("collaborations").select("*").eq("collaboration_id", data.collaboration_id).execute()
-    if not req.data:
-        raise HTTPException(status_code=404, detail="Collaboration not found.")
+async def update_request_status(data: UpdateRequestStatus, supabase=Depends(get_supabase)):
+    action = STATUS_ACTIONS.get(data.status)
+    if action is None:
+        raise HTTPException(status_code=400, detail="Invalid status.")
+
+    # One compare-and-set UPDATE; 404/400/409 come back from Postgres (see repository.py)
+    collaboration = await transition_collaboration(
+        supabase, data.collaboration_id, "farmer", action, expected_version=data.version
+    )
 
-    collaboration = req.data[0]
-    update_data = {"status": data.status}
+    collaboration_changed("collaboration.update", collaboration)
 
-    if data.status == "Accepted":
-        update_data["accepted_by_farmer"] = True
-        if collaboration["accepted_by_worker"]:
-            update_data["status"] = "Active"
-            update_data["started_at"] = datetime.now().isoformat()
+    notify_collaboration(collaboration, "farmer")
+    # the job's accepted-worker counter/state moved with this transition
+    job_index.apply([collaboration.pop("job", None)])
+    return {"message": f"Request {data.status.lower()} successfully.", "data": [collaboration]}
 
-    elif data.status == "Rejected":
-         update_data["ended_at"] = datetime.now().isoformat()
 
-    result = supabase.table("collaborations").update(update_data).eq("collaboration_id", data.collaboration_id).execute()
-    return {"message": f"Request {data.status.lower()} successfully.", "data": result.data}
+# ==========================================================
+# 📡 LIVE COLLABORATION EVENTS (Server-Sent Events)
+# ==========================================================
+@router.get("/events/{farmer_id}")
+async def farmer_events(farmer_id: str):
+    """Push new requests/applications and status changes for this farmer (see realtime.py)."""
+    return StreamingResponse(
+        event_stream(f"farmer:{farmer_id}"),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# ==========================================================
+# 👥 BULK REQUESTS (hire a crew in one call)
+# ==========================================================
+@router.post("/bulk_send_request")
+async def bulk_send_request(data: BulkSendRequest, supabase=Depends(get_supabase)):
+    """Invite many workers to one job. Farmer and job are checked once; each worker gets its own result."""
+    # One database call (see send_collaboration_requests in supabase/migrations)
+    results = await call_rpc(supabase, "send_collaboration_requests", {
+        "p_farmer_id": data.farmer_id,
+        "p_job_id": data.job_id,
+        "p_worker_ids": data.worker_ids,
+    })
+    for item in results:
+        if item["success"]:
+            collaboration_changed("collaboration.insert", item["collaboration"])
+            notify_collaboration(item["collaboration"], "farmer")
+
+    sent = sum(1 for item in results if item["success"])
+    return {"message": f"{sent} of {len(results)} requests sent.", "results": results}
+
+
+@router.put("/bulk_update_request_status")
+async def bulk_update_request_status(data: BulkUpdateRequestStatus, supabase=Depends(get_supabase)):
+    """Accept or reject many of this farmer's requests/applications; each id gets its own result."""
+    ids = list(dict.fromkeys(data.collaboration_ids))
+    updated = await transition_collaborations(
+        supabase, ids, "farmer", STATUS_ACTIONS[data.status], data.farmer_id
+    )
+
+    # each row carries its job's card (fill state after the whole batch)
+    job_index.apply([row.pop("job", None) for row in updated])
+    by_id = {row["collaboration_id"]: row for row in updated}
+    failed = [i for i in ids if i not in by_id]
+
+    # one read, only to explain the ids that were not updated
+    current = {}
+    if failed:
+        result = await (
+            supabase.table("collaborations")
+            .select("collaboration_id, farmer_id, status")
+            .in_("collaboration_id", failed)
+            .execute()
+        )
+        current = {row["collaboration_id"]: row for row in result.data}
+
+    results = []
+    for collaboration_id in ids:
+        row = by_id.get(collaboration_id)
+        if row:
+            collaboration_changed("collaboration.update", row)
+            notify_collaboration(row, "farmer")
+            results.append({"collaboration_id": collaboration_id, "success": True, "collaboration": row})
+            continue
+        record = current.get(collaboration_id)
+        if not record:
+            error = (404, "Collaboration not found.")
+        elif record["farmer_id"] != data.farmer_id:
+            error = (403, "Collaboration belongs to another farmer.")
+        else:
+            error = (400, f"Cannot update a collaboration that is {record['status']}.")
+        results.append({
+            "collaboration_id": collaboration_id, "success": False,
+            "status_code": error[0], "detail": error[1],
+        })
+
+    return {
+        "message": f"{len(updated)} of {len(ids)} requests {data.status.lower()}.",
+        "results": results,
+    }
 
 
 #------------------Get Active Collaborations for Farmer---------------------#
 @router.get("/active_collaborations/{farmer_id}")
-def get_active_collaborations(farmer_id: str):
+async def get_active_collaborations(farmer_id: str, supabase=Depends(get_supabase)):
     """Get all active collaborations for a farmer."""
-    collaborations = (
+    collaborations = await (
         supabase.table("collaborations")
-        .select("*")
+        .select(ACTIVE_COLLABORATION_COLUMNS)
         .eq("farmer_id", farmer_id)
         .in_("status", ["Accepted", "Active"])
         .execute()
     )
     if not collaborations.data:
         return {"active_collaborations": []}
+    workers, jobs = await fetch_collaboration_details(
+        supabase, collaborations.data, "worker", "name, city, state"
+    )
     enriched = []
     for collab in collaborations.data:
-        worker = (
-            supabase.table("worker_registration")
-            .select("name, city, state")
-            .eq("id", collab["worker_id"])
-            .execute()
-        )
-
-        job = (
-            supabase.table("job_listings")
-            .select("job_title, job_description")
-            .eq("job_id", collab["job_id"])
-            .execute()
-        )
-
         enriched.append({
             "collaboration_id": collab["collaboration_id"],
-            "worker_details": worker.data[0] if worker.data else {},
-            "job_details": job.data[0] if job.data else {},
+            "worker_details": workers.get(collab["worker_id"], {}),
+            "job_details": jobs.get(collab["job_id"], {}),
             "status": collab["status"],
+            "version": collab.get("version"),
             "started_at": collab.get("started_at"),
         })
     return {"active_collaborations": enriched}
@@ -389,16 +600,11 @@ def get_active_collaborations(farmer_id: str):
 # 🔟 END COLLABORATION
 # ==========================================================
 @router.put("/end_collaboration/{collaboration_id}")
-def end_collaboration(collaboration_id: int):
-    req = supabase.table("collaborations").select("*").eq("collaboration_id", collaboration_id).execute()
-    if not req.data:
-        raise HTTPException(status_code=404, detail="Collaboration not found.")
-
-    supabase.table("collaborations").update({
-        "status": "Completed",
-        "ended_at": datetime.now().isoformat()
-    }).eq("collaboration_id", collaboration_id).execute()
-
+async def end_collaboration(collaboration_id: int, supabase=Depends(get_supabase)):
+    collaboration = await complete_collaboration(supabase, collaboration_id, "farmer")
+    collaboration_changed("collaboration.update", collaboration)
+    notify_collaboration(collaboration, "farmer")
+    job_index.apply([collaboration.pop("job", None)])
     return {"message": "Collaboration ended successfully. Awaiting feedback."}
 
 
@@ -406,12 +612,15 @@ def end_collaboration(collaboration_id: int):
 # 1️⃣1️⃣ ADD FEEDBACK (Farmer → Worker)
 # ==========================================================
 @router.post("/add_feedback")
-def add_feedback(data: FeedbackModel):
-    req = supabase.table("collaborations").select("*").eq("collaboration_id", data.collaboration_id).execute()
-    if not req.data:
+async def add_feedback(data: FeedbackModel, supabase=Depends(get_supabase)):
+    if data.given_by != "Farmer":
+        raise HTTPException(status_code=400, detail="Farmers can only give feedback as Farmer.")
+
+    collaboration = await fetch_one(supabase, "collaborations", "worker_id, status", {"collaboration_id": data.collaboration_id})
+    if not collaboration:
         raise HTTPException(status_code=404, detail="Collaboration not found.")
 
-    if req.data[0]["status"] != "Completed":
+    if collaboration["status"] != "Completed":
         raise HTTPException(status_code=400, detail="Feedback can only be added after completion.")
 
     if not (1 <= data.rating <= 5):
@@ -427,10 +636,82 @@ def add_feedback(data: FeedbackModel):
         "created_at": datetime.now().isoformat()
     }
 
-    result = supabase.table("feedback").insert(feedback_data).execute()
+    # the insert trigger updates the worker's rating aggregates
+    result = await execute_unique(
+        supabase.table("feedback").insert(feedback_data),
+        "Feedback already given for this collaboration.",
+    )
+    await profile_cache.invalidate("worker", collaboration["worker_id"])
+    notify_feedback("worker", collaboration["worker_id"], data.rating, data.collaboration_id)
     return {"message": f"Feedback by {data.given_by} added successfully.", "data": result.data}
 
 
+# ==========================================================
+# 🔔 NOTIFICATIONS
+# ==========================================================
+@router.get("/notifications/{farmer_id}")
+async def farmer_notifications(
+    farmer_id: str,
+    cursor: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    supabase=Depends(get_supabase),
+):
+    """Newest-first inbox page plus the unread badge count (see notifications.py)."""
+    return await inbox(supabase, "farmer", farmer_id, cursor, limit)
+
+
+@router.put("/notifications/{farmer_id}/read")
+async def farmer_notifications_read(farmer_id: str, up_to: Optional[int] = None, supabase=Depends(get_supabase)):
+    """Mark all notifications (or those up to `up_to`) as read."""
+    return {"unread_count": await mark_read(supabase, "farmer", farmer_id, up_to)}
+
 
+# ==========================================================
+# 🔄 DELTA SYNC
+# ==========================================================
+@router.get("/sync/{farmer_id}")
+async def farmer_sync(
+    farmer_id: str,
+    since: Optional[str] = None,
+    limit: int = Query(DEFAULT_SYNC_LIMIT, ge=1, le=MAX_SYNC_LIMIT),
+    supabase=Depends(get_supabase),
+):
+    """Jobs, collaborations and profile changed (or deleted) after the `since` cursor from the last call (see sync.py)."""
+    return await changes(supabase, "farmer", farmer_id, since, limit)
 
 
+# ==========================================================
+# 1️⃣2️⃣ FARMER DASHBOARD
+# ==========================================================
+@router.get("/dashboard/{farmer_id}")
+async def farmer_dashboard(farmer_id: str, supabase=Depends(get_supabase)):
+    """
+    Returns farmer dashboard summary:
+    - Profile info (name + profile picture)
+    - Jobs posted, active collaborations, pending requests
+    """
+    # Counts are computed in Postgres (see farmer_dashboard_counts)
+    farmer_info, counts, latest = await asyncio.gather(
+        profile_cache.get_profile(supabase, "farmer", farmer_id),
+        supabase.rpc("farmer_dashboard_counts", {"p_farmer_id": farmer_id}).execute(),
+        inbox(supabase, "farmer", farmer_id, None, DASHBOARD_NOTIFICATIONS),
+    )
+    if not farmer_info:
+        raise HTTPException(status_code=404, detail="Farmer not found.")
+
+    counts = counts.data or {}
+
+    dashboard = HomeDashboard(
+        total_jobs_posted=counts.get("total_jobs_posted", 0),
+        active_collaborations=counts.get("active_collaborations", 0),
+        pending_requests=counts.get("pending_requests", 0),
+        notifications=latest["notifications"],
+    )
+
+    return {
+        "farmer_name": farmer_info.get("name"),
+        "profile_picture": farmer_info.get("profile_picture"),
+        "total_applications": counts.get("total_applications", 0),
+        "unread_notifications": latest["unread_count"],
+        **dashboard.dict(),
+    }
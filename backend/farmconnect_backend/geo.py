@@ -0,0 +1,150 @@
+import asyncio
+import os
+import time
+from typing import Optional, Tuple
+
+import httpx
+from dotenv import load_dotenv
+
+from cache import TTLCache, RedisCache, redis, REDIS_URL
+
+# ==========================================================
+# 📍 Geocoding (write time only)
+# ==========================================================
+# Jobs and worker profiles are geocoded once when they are written
+# and stored with latitude/longitude and a geohash. Lookups are
+# cached (the same village/city comes up again and again) and are
+# throttled to respect Nominatim's usage policy. A write never waits
+# more than GEOCODER_MAX_WAIT for its turn: under a burst the lookup is
+# skipped and the row is stored without coordinates. Distance queries
+# run in Postgres (see nearby_jobs / nearby_workers).
+
+load_dotenv()
+GEOCODER_URL = os.getenv("GEOCODER_URL", "https://nominatim.openstreetmap.org/search")
+GEOCODER_USER_AGENT = os.getenv("GEOCODER_USER_AGENT", "FarmingApp/1.0")  # required by Nominatim
+GEOCODER_TIMEOUT = float(os.getenv("GEOCODER_TIMEOUT", "5"))
+GEOCODER_CONCURRENCY = int(os.getenv("GEOCODER_CONCURRENCY", "1"))
+GEOCODER_MIN_INTERVAL = float(os.getenv("GEOCODER_MIN_INTERVAL", "1.0"))  # Nominatim: max 1 request/second
+GEOCODER_MAX_WAIT = float(os.getenv("GEOCODER_MAX_WAIT", "2.0"))  # longest a request waits for its turn
+GEOCODE_CACHE_TTL = float(os.getenv("GEOCODE_CACHE_TTL", str(30 * 24 * 3600)))
+GEOHASH_PRECISION = 7  # ~150 m cells
+
+ADDRESS_FIELDS = ("full_address", "city", "state")
+NEARBY_DEFAULT_RADIUS_KM = 30.0
+NEARBY_MAX_RADIUS_KM = 500.0
+
+_cache = (
+    RedisCache(REDIS_URL, ttl=GEOCODE_CACHE_TTL, prefix="geocode:")
+    if REDIS_URL and redis is not None
+    else TTLCache(ttl=GEOCODE_CACHE_TTL)
+)
+_http: Optional[httpx.AsyncClient] = None
+_throttle = asyncio.Semaphore(GEOCODER_CONCURRENCY)
+_next_call_at = 0.0
+
+
+def _reserve_turn() -> Optional[float]:
+    """
+    Reserve the next call slot (calls are spaced GEOCODER_MIN_INTERVAL apart)
+    and return how long to wait for it, or None if that is over GEOCODER_MAX_WAIT.
+    """
+    global _next_call_at
+    now = time.monotonic()
+    start = max(now, _next_call_at)
+    if start - now > GEOCODER_MAX_WAIT:
+        return None
+    _next_call_at = start + GEOCODER_MIN_INTERVAL
+    return start - now
+
+
+def _client() -> httpx.AsyncClient:
+    # separate from the Supabase session so our API key never leaves for a third party
+    global _http
+    if _http is None:
+        _http = httpx.AsyncClient(timeout=GEOCODER_TIMEOUT, headers={"User-Agent": GEOCODER_USER_AGENT})
+    return _http
+
+
+async def close():
+    global _http
+    if _http is not None:
+        await _http.aclose()
+        _http = None
+    await _cache.close()
+
+
+async def geocode_address(address: Optional[str], city: Optional[str] = None, state: Optional[str] = None) -> Optional[Tuple[float, float]]:
+    """Return (latitude, longitude) for an address, or None if it can't be found."""
+    query = ", ".join(part.strip() for part in (address, city, state) if part and part.strip())
+    if not query:
+        return None
+
+    key = query.lower()
+    cached = await _cache.get(key)
+    if cached is not None:
+        return (cached["lat"], cached["lon"]) if cached else None
+
+    try:
+        await asyncio.wait_for(_throttle.acquire(), GEOCODER_MAX_WAIT)
+    except asyncio.TimeoutError:
+        print(f"Geocoding skipped (geocoder busy): {query}")
+        return None
+    try:
+        wait = _reserve_turn()
+        if wait is None:
+            print(f"Geocoding skipped (geocoder busy): {query}")
+            return None
+        await asyncio.sleep(wait)
+        try:
+            response = await _client().get(GEOCODER_URL, params={"q": query, "format": "json", "limit": 1})
+            response.raise_for_status()
+            data = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            print(f"Geocoding error: {e}")
+            return None  # not cached: try again on the next write
+    finally:
+        _throttle.release()
+
+    point = {"lat": float(data[0]["lat"]), "lon": float(data[0]["lon"])} if data else {}
+    await _cache.set(key, point)
+    return (point["lat"], point["lon"]) if point else None
+
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, ch, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, value = (lon_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            ch = (ch << 1) | 1
+            rng[0] = mid
+        else:
+            ch <<= 1
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[ch])
+            bits, ch = 0, 0
+    return "".join(chars)
+
+
+async def locate(data: dict, current: Optional[dict] = None) -> dict:
+    """
+    Set latitude/longitude/geohash on a row from its address fields. If the
+    address can't be found they are left unset, or cleared for a partial
+    update (pass the `current` row to fill in the address fields that aren't
+    being changed) so the row stops showing up at its old location.
+    """
+    address = {f: data.get(f, (current or {}).get(f)) for f in ADDRESS_FIELDS}
+    point = await geocode_address(address["full_address"], address["city"], address["state"])
+    if point:
+        data["latitude"], data["longitude"] = point
+        data["geohash"] = geohash(*point)
+    elif current is not None:
+        data["latitude"] = data["longitude"] = data["geohash"] = None
+    return data
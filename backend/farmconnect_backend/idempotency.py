@@ -0,0 +1,189 @@
+import asyncio
+import base64
+import hashlib
+import json
+import os
+from typing import Dict
+
+from dotenv import load_dotenv
+from fastapi.responses import JSONResponse, Response
+from starlette.datastructures import Headers
+
+from cache import TTLCache, RedisCache, redis, REDIS_URL
+
+# ==========================================================
+# 🔁 Idempotency keys
+# ==========================================================
+# Mobile clients retry POSTs on flaky connections. When a request to
+# one of IDEMPOTENT_ROUTES carries an `Idempotency-Key` header, its
+# first response is stored for IDEMPOTENCY_TTL seconds and replayed
+# for every retry with the same key, without running the handler (so
+# no Supabase round trips and no duplicate inserts). A retry that
+# arrives while the first attempt is still running waits for it.
+# 5xx responses are not stored, so those can be retried for real.
+#
+# Keys are scoped to the caller (the id field named per route) and
+# remember a hash of the body: reusing a key for a different request
+# is a 422, and one caller's key never replays another's response.
+
+load_dotenv()
+IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", str(24 * 3600)))
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "50000"))
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+# POST path -> body field identifying the caller
+IDEMPOTENT_ROUTES = {
+    "/farmer/register": "id",
+    "/farmer/post_job": "farmer_id",
+    "/farmer/send_request": "farmer_id",
+    "/worker/apply_for_job": "worker_id",
+}
+
+
+def _caller(body: bytes, field: str) -> str:
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return ""
+    return str(data.get(field) or "") if isinstance(data, dict) else ""
+
+
+class IdempotencyStore:
+    def __init__(self, backend):
+        self.backend = backend
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.stored = 0
+        self.replays = 0
+        self.conflicts = 0
+
+    def stats(self) -> dict:
+        return {
+            "backend": "redis" if isinstance(self.backend, RedisCache) else "memory",
+            "stored": self.stored,
+            "replays": self.replays,
+            "conflicts": self.conflicts,
+            "in_flight": len(self._in_flight),
+            "ttl_seconds": IDEMPOTENCY_TTL,
+        }
+
+    async def close(self):
+        await self.backend.close()
+
+
+def _make_backend():
+    if REDIS_URL and redis is not None:
+        return RedisCache(REDIS_URL, ttl=IDEMPOTENCY_TTL, prefix="idempotency:")
+    return TTLCache(max_size=IDEMPOTENCY_CACHE_SIZE, ttl=IDEMPOTENCY_TTL)
+
+
+idempotency_store = IdempotencyStore(_make_backend())
+
+
+class IdempotencyMiddleware:
+    """Plain ASGI middleware (it has to read the request body before the route does)."""
+
+    def __init__(self, app, store: IdempotencyStore = idempotency_store):
+        self.app = app
+        self.store = store
+
+    async def __call__(self, scope, receive, send):
+        field = IDEMPOTENT_ROUTES.get(scope.get("path")) if scope["type"] == "http" else None
+        key = Headers(scope=scope).get(IDEMPOTENCY_HEADER) if field and scope["method"] == "POST" else None
+        if not key:
+            return await self.app(scope, receive, send)
+        if len(key) > MAX_KEY_LENGTH:
+            response = JSONResponse(
+                status_code=400,
+                content={"detail": f"{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters."},
+            )
+            return await response(scope, receive, send)
+
+        body = await self._read_body(receive)
+        fingerprint = hashlib.sha256(body).hexdigest()
+        cache_key = f"{scope['path']}:{_caller(body, field)}:{key}"
+
+        store = self.store
+        while True:
+            saved = await store.backend.get(cache_key)
+            if saved is not None:
+                return await self._replay(saved, fingerprint, scope, receive, send)
+            pending = store._in_flight.get(cache_key)
+            if pending is None:
+                break
+            # same key still being handled: wait, then replay its result (or run if it wasn't stored)
+            if await asyncio.shield(pending) is None:
+                break
+
+        future = asyncio.get_running_loop().create_future()
+        store._in_flight[cache_key] = future
+        saved = None
+        try:
+            status, media_type, content = await self._run(body, scope, receive, send)
+            if status is not None and status < 500:
+                saved = {
+                    "fingerprint": fingerprint,
+                    "status_code": status,
+                    "media_type": media_type,
+                    "body": base64.b64encode(content).decode(),
+                }
+                await store.backend.set(cache_key, saved)
+                store.stored += 1
+        finally:
+            future.set_result(saved)
+            store._in_flight.pop(cache_key, None)
+
+    @staticmethod
+    async def _read_body(receive) -> bytes:
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                break
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        return b"".join(chunks)
+
+    async def _run(self, body: bytes, scope, receive, send):
+        """Run the route with the buffered body, passing its response through; returns (status, media_type, body)."""
+        sent_body = False
+
+        async def replay_receive():
+            nonlocal sent_body
+            if not sent_body:
+                sent_body = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        status, media_type, chunks = None, None, []
+
+        async def capture_send(message):
+            nonlocal status, media_type
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                media_type = Headers(raw=message.get("headers", [])).get("content-type")
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        await self.app(scope, replay_receive, capture_send)
+        return status, media_type, b"".join(chunks)
+
+    async def _replay(self, saved: dict, fingerprint: str, scope, receive, send):
+        if saved["fingerprint"] != fingerprint:
+            self.store.conflicts += 1
+            response = JSONResponse(
+                status_code=422,
+                content={"detail": f"{IDEMPOTENCY_HEADER} was already used for a different request."},
+            )
+        else:
+            self.store.replays += 1
+            response = Response(
+                content=base64.b64decode(saved["body"]),
+                status_code=saved["status_code"],
+                media_type=saved["media_type"],
+                headers={"Idempotent-Replayed": "true"},
+            )
+        await response(scope, receive, send)
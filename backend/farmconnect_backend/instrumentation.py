@@ -0,0 +1,138 @@
+import os
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import httpx
+from dotenv import load_dotenv
+
+# ==========================================================
+# ⏱️ Supabase round-trip instrumentation
+# ==========================================================
+# Every call on the shared client (PostgREST table/rpc, Storage) is
+# recorded with its latency and response size, per table. The app
+# middleware collects them per HTTP request and sends them back in a
+# Server-Timing header; process totals are served as metrics.
+#
+# Tests can assert a round-trip budget for an endpoint:
+#     response = client.get("/farmer/dashboard/f1")
+#     assert round_trips(response) <= 2
+
+load_dotenv()
+SERVER_TIMING = os.getenv("SERVER_TIMING", "true").lower() == "true"
+
+
+@dataclass
+class TableStats:
+    calls: int = 0
+    seconds: float = 0.0
+    bytes: int = 0
+
+
+class RoundTripStats:
+    def __init__(self):
+        self.tables: Dict[str, TableStats] = {}
+
+    def record(self, name: str, seconds: float, nbytes: int):
+        stats = self.tables.setdefault(name, TableStats())
+        stats.calls += 1
+        stats.seconds += seconds
+        stats.bytes += nbytes
+
+    @property
+    def calls(self) -> int:
+        return sum(s.calls for s in self.tables.values())
+
+    @property
+    def seconds(self) -> float:
+        return sum(s.seconds for s in self.tables.values())
+
+    @property
+    def bytes(self) -> int:
+        return sum(s.bytes for s in self.tables.values())
+
+    def server_timing(self) -> str:
+        """`Server-Timing` value: a total plus one entry per table (durations in ms)."""
+        entries = [f'supabase;dur={self.seconds * 1000:.1f};desc="{self.calls} calls, {self.bytes} bytes"']
+        for name, s in sorted(self.tables.items()):
+            token = re.sub(r"[^A-Za-z0-9_-]", "-", name)
+            entries.append(f'sb-{token};dur={s.seconds * 1000:.1f};desc="{s.calls}x, {s.bytes} B"')
+        return ", ".join(entries)
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "seconds": round(self.seconds, 6),
+            "bytes": self.bytes,
+            "tables": {
+                name: {"calls": s.calls, "seconds": round(s.seconds, 6), "bytes": s.bytes}
+                for name, s in sorted(self.tables.items())
+            },
+        }
+
+
+_current: ContextVar[Optional[RoundTripStats]] = ContextVar("supabase_round_trips", default=None)
+_totals = RoundTripStats()
+_requests = 0
+
+
+def record(name: str, seconds: float, nbytes: int):
+    """Record one round trip against the current request (if any) and the process totals."""
+    _totals.record(name, seconds, nbytes)
+    stats = _current.get()
+    if stats is not None:
+        stats.record(name, seconds, nbytes)
+
+
+@contextmanager
+def track():
+    """Collect the round trips made inside this block (and tasks it starts)."""
+    global _requests
+    stats = RoundTripStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+        _requests += 1
+
+
+def metrics() -> dict:
+    totals = _totals.as_dict()
+    totals["requests"] = _requests
+    totals["calls_per_request"] = round(_totals.calls / _requests, 3) if _requests else 0.0
+    return totals
+
+
+def round_trips(response) -> int:
+    """Round trips an endpoint made, read back from its Server-Timing header."""
+    match = re.search(r'supabase;[^,]*desc="(\d+) calls', response.headers.get("server-timing", ""))
+    return int(match.group(1)) if match else 0
+
+
+# ==========================================================
+# httpx hooks (installed on the pooled PostgREST session)
+# ==========================================================
+def resource_name(path: str) -> str:
+    """/rest/v1/job_listings -> job_listings, /rest/v1/rpc/f -> rpc:f, /storage/v1/... -> storage"""
+    parts = [p for p in path.split("/") if p]
+    if len(parts) >= 3 and parts[0] == "rest":
+        return f"rpc:{parts[3]}" if parts[2] == "rpc" and len(parts) > 3 else parts[2]
+    return parts[0] if parts else "supabase"
+
+
+async def on_request(request: httpx.Request):
+    request.extensions["started_at"] = time.perf_counter()
+
+
+async def on_response(response: httpx.Response):
+    # read the body here so its transfer time is part of the measurement
+    await response.aread()
+    started = response.request.extensions.get("started_at", time.perf_counter())
+    record(resource_name(response.request.url.path), time.perf_counter() - started, len(response.content))
+
+
+EVENT_HOOKS = {"request": [on_request], "response": [on_response]}
@@ -0,0 +1,423 @@
+import asyncio
+import os
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+from queries import WORKER_CARD_COLUMNS, JOB_LIST_COLUMNS
+
+# ==========================================================
+# 🤝 Job ↔ worker matching
+# ==========================================================
+# Workers are kept in memory as column arrays plus an inverted
+# index (expertise term -> worker positions). Ranking a job only
+# touches workers that share at least one expertise term with it,
+# and every score component is a vectorized NumPy expression.
+
+load_dotenv()
+MATCH_INDEX_TTL = float(os.getenv("MATCH_INDEX_TTL", "600"))
+LOAD_PAGE_SIZE = 1000
+
+# Same values the frontend uses for skill levels
+SKILL_RANK = {"beginner": 0, "intermediate": 1, "experienced": 2, "expert": 3}
+MAX_SKILL_GAP = 3
+
+# Rough conversion of pay periods to a daily amount, so day and month rates compare
+DAYS_PER_PERIOD = {"day": 1, "per-day": 1, "task": 1, "month": 30, "per-month": 30}
+
+NO_ACCOMMODATION = {None, "", "not-provided"}
+
+# Job columns the scorer reads
+JOB_MATCH_COLUMNS = (
+    "job_id, job_type, city, state, required_skill_level, salary_amount, "
+    "payment_type, accommodation_type"
+)
+
+WEIGHTS = {
+    "expertise": 0.40,
+    "location": 0.20,
+    "skill": 0.15,
+    "salary": 0.15,
+    "accommodation": 0.10,
+}
+
+
+# Job recommendations for a worker use the same components; "expertise"
+# is the share of the job's terms the worker covers.
+
+# ==========================================================
+# 🔧 Feature helpers (shared with job recommendations)
+# ==========================================================
+def terms(values) -> List[str]:
+    """Normalize expertise / job_type values into lowercase terms."""
+    if not values:
+        return []
+    if isinstance(values, str):
+        values = values.split(",")
+    return [v.strip().lower() for v in values if v and v.strip()]
+
+
+def skill_rank(level: Optional[str]) -> int:
+    return SKILL_RANK.get((level or "").strip().lower(), -1)
+
+
+def daily_amount(amount: Optional[float], period: Optional[str]) -> float:
+    if amount is None:
+        return np.nan
+    return float(amount) / DAYS_PER_PERIOD.get((period or "day").strip().lower(), 1)
+
+
+def norm(value: Optional[str]) -> str:
+    return (value or "").strip().lower()
+
+
+class Vocabulary:
+    """Maps strings (city, state, ...) to small integer codes for vectorized compares."""
+
+    def __init__(self):
+        self.codes: Dict[str, int] = {}
+
+    def encode(self, value: Optional[str]) -> int:
+        value = norm(value)
+        if not value:
+            return -1
+        return self.codes.setdefault(value, len(self.codes))
+
+    def lookup(self, value: Optional[str]) -> int:
+        return self.codes.get(norm(value), -2)  # -2 never matches a stored code
+
+
+def skill_scores(candidate_ranks, required_ranks) -> np.ndarray:
+    """1.0 when the candidate meets the required level, less for each level short."""
+    candidate_ranks, required_ranks = np.broadcast_arrays(
+        np.asarray(candidate_ranks, dtype=np.int16), np.asarray(required_ranks, dtype=np.int16)
+    )
+    gap = np.clip(required_ranks - candidate_ranks, 0, MAX_SKILL_GAP)
+    scores = np.where(candidate_ranks < 0, 0.5, 1.0 - gap / MAX_SKILL_GAP)
+    return np.where(required_ranks < 0, 1.0, scores)
+
+
+def salary_scores(expected_daily, offered_daily) -> np.ndarray:
+    """1.0 when the offer covers the expectation, falling linearly to 0 at twice the offer."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        shortfall = (expected_daily - offered_daily) / offered_daily
+    scores = np.clip(1.0 - shortfall, 0.0, 1.0)
+    return np.where(np.isnan(scores), 0.5, scores)
+
+
+def location_scores(city_a, state_a, city_b, state_b) -> np.ndarray:
+    same_city = (city_a == city_b) & (city_a >= 0)
+    same_state = (state_a == state_b) & (state_a >= 0)
+    return np.where(same_city, 1.0, np.where(same_state, 0.5, 0.0))
+
+
+async def load_all(client, table: str, columns: str, key: str, filters: Optional[dict] = None) -> List[dict]:
+    """Read a whole table (or the rows matching `filters`) in keyset pages (PostgREST caps rows per response)."""
+    rows, last = [], None
+    while True:
+        query = client.table(table).select(columns)
+        for column, value in (filters or {}).items():
+            query = query.eq(column, value)
+        query = query.order(key).limit(LOAD_PAGE_SIZE)
+        if last is not None:
+            query = query.gt(key, last)
+        page = (await query.execute()).data or []
+        rows.extend(page)
+        if len(page) < LOAD_PAGE_SIZE:
+            return rows
+        last = page[-1][key]
+
+
+# ==========================================================
+# Worker index
+# ==========================================================
+class WorkerIndex:
+    """
+    Column arrays over workers, one slot per worker, plus an inverted
+    index (term -> slots). register/update_profile change one slot in
+    place; a full reload only happens after MATCH_INDEX_TTL.
+    """
+
+    def __init__(self):
+        self.loaded_at = 0.0
+        self._lock = asyncio.Lock()
+        self._reset()
+
+    def _reset(self, capacity: int = 64):
+        self.slot_of: Dict[str, int] = {}
+        self.cards: List[dict] = []
+        self.cities, self.states = Vocabulary(), Vocabulary()
+        self.city = np.full(capacity, -1, dtype=np.int32)
+        self.state = np.full(capacity, -1, dtype=np.int32)
+        self.skill = np.full(capacity, -1, dtype=np.int8)
+        self.salary = np.full(capacity, np.nan, dtype=np.float64)
+        self.needs_accommodation = np.zeros(capacity, dtype=bool)
+        self.postings: Dict[str, set] = {}
+        self._posting_arrays: Dict[str, np.ndarray] = {}  # built lazily, dropped when a term changes
+
+    # ---------- maintenance ----------
+    async def refresh_if_stale(self, client):
+        if time.monotonic() - self.loaded_at < MATCH_INDEX_TTL:
+            return
+        async with self._lock:
+            if time.monotonic() - self.loaded_at < MATCH_INDEX_TTL:
+                return
+            rows = await load_all(client, "worker_registration", WORKER_CARD_COLUMNS, "id")
+            self._reset(max(64, len(rows)))
+            for row in rows:
+                self.upsert(row)
+            self.loaded_at = time.monotonic()
+
+    def _grow(self, rows: int):
+        self.city = np.concatenate([self.city, np.full(rows, -1, dtype=np.int32)])
+        self.state = np.concatenate([self.state, np.full(rows, -1, dtype=np.int32)])
+        self.skill = np.concatenate([self.skill, np.full(rows, -1, dtype=np.int8)])
+        self.salary = np.concatenate([self.salary, np.full(rows, np.nan)])
+        self.needs_accommodation = np.concatenate([self.needs_accommodation, np.zeros(rows, dtype=bool)])
+
+    def upsert(self, row: dict):
+        """Add or update one worker (called after register/update_profile) without reloading the table."""
+        if not row or "id" not in row:
+            return
+        slot = self.slot_of.get(row["id"])
+        if slot is None:
+            slot = len(self.cards)
+            if slot >= len(self.city):
+                self._grow(len(self.city))
+            self.slot_of[row["id"]] = slot
+            self.cards.append({})
+        old_terms = set(terms(self.cards[slot].get("job_expertise")))
+
+        card_columns = [c.strip() for c in WORKER_CARD_COLUMNS.split(",")]
+        card = {**self.cards[slot], **{c: row[c] for c in card_columns if c in row}}
+        self.cards[slot] = card
+        self.city[slot] = self.cities.encode(card.get("city"))
+        self.state[slot] = self.states.encode(card.get("state"))
+        self.skill[slot] = skill_rank(card.get("skill_level"))
+        self.salary[slot] = daily_amount(card.get("expected_salary"), card.get("salary_type"))
+        self.needs_accommodation[slot] = bool(card.get("need_accommodation"))
+
+        new_terms = set(terms(card.get("job_expertise")))
+        for term in old_terms - new_terms:
+            self.postings[term].discard(slot)
+            self._posting_arrays.pop(term, None)
+        for term in new_terms - old_terms:
+            self.postings.setdefault(term, set()).add(slot)
+            self._posting_arrays.pop(term, None)
+
+    def _posting(self, term: str) -> Optional[np.ndarray]:
+        slots = self.postings.get(term)
+        if not slots:
+            return None
+        array = self._posting_arrays.get(term)
+        if array is None:
+            array = self._posting_arrays[term] = np.fromiter(slots, dtype=np.int64, count=len(slots))
+        return array
+
+    # ---------- ranking ----------
+    def rank(self, job: dict, limit: int = 20) -> List[dict]:
+        """Return the best `limit` workers for `job` with their score breakdown."""
+        if not self.cards:
+            return []
+
+        job_terms = set(terms(job.get("job_type")))
+        lists = [p for p in (self._posting(t) for t in job_terms) if p is not None]
+        if not lists:
+            return []
+
+        # expertise overlap straight from the inverted index
+        hits = np.bincount(np.concatenate(lists), minlength=len(self.cards))
+        candidates = np.nonzero(hits)[0]
+        expertise = hits[candidates] / len(job_terms)
+
+        location = location_scores(
+            self.city[candidates], self.state[candidates],
+            self.cities.lookup(job.get("city")), self.states.lookup(job.get("state")),
+        )
+        skill = skill_scores(self.skill[candidates], skill_rank(job.get("required_skill_level")))
+        offered = daily_amount(job.get("salary_amount"), job.get("payment_type"))
+        salary = salary_scores(self.salary[candidates], offered)
+        provides_accommodation = norm(job.get("accommodation_type")) not in NO_ACCOMMODATION
+        accommodation = np.where(self.needs_accommodation[candidates] & (not provides_accommodation), 0.0, 1.0)
+
+        components = {
+            "expertise": expertise,
+            "location": location,
+            "skill": skill,
+            "salary": salary,
+            "accommodation": accommodation,
+        }
+        score = sum(WEIGHTS[name] * values for name, values in components.items())
+
+        top = np.argsort(-score, kind="stable")[:limit]
+        matches = []
+        for i in top:
+            position = candidates[i]
+            matches.append({
+                "worker": self.cards[position],
+                "score": round(float(score[i]), 4),
+                "breakdown": {name: round(float(values[i]), 4) for name, values in components.items()},
+            })
+        return matches
+
+
+worker_index = WorkerIndex()
+
+
+# ==========================================================
+# Job index (recommendations for workers)
+# ==========================================================
+class JobIndex:
+    """
+    Feature matrix over jobs, one row ("slot") per job. post_job/delete_job
+    update it in place; a full reload only happens after MATCH_INDEX_TTL.
+    """
+
+    def __init__(self):
+        self.loaded_at = 0.0
+        self._lock = asyncio.Lock()
+        self._reset()
+
+    def _reset(self, capacity: int = 64):
+        self.slot_of: Dict[int, int] = {}
+        self.cards: List[Optional[dict]] = []
+        self.cities, self.states = Vocabulary(), Vocabulary()
+        self.term_cols: Dict[str, int] = {}
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.city = np.full(capacity, -1, dtype=np.int32)
+        self.state = np.full(capacity, -1, dtype=np.int32)
+        self.skill = np.full(capacity, -1, dtype=np.int8)
+        self.salary = np.full(capacity, np.nan, dtype=np.float64)
+        self.provides_accommodation = np.zeros(capacity, dtype=bool)
+        self.term_count = np.zeros(capacity, dtype=np.int16)
+        self.terms = np.zeros((capacity, 8), dtype=bool)  # job x expertise term
+
+    # ---------- maintenance ----------
+    async def refresh_if_stale(self, client):
+        if time.monotonic() - self.loaded_at < MATCH_INDEX_TTL:
+            return
+        async with self._lock:
+            if time.monotonic() - self.loaded_at < MATCH_INDEX_TTL:
+                return
+            rows = await load_all(client, "job_listings", JOB_LIST_COLUMNS, "job_id", {"job_status": "open"})
+            self._reset(max(64, len(rows)))
+            for row in rows:
+                self.add(row)
+            self.loaded_at = time.monotonic()
+
+    def _grow(self, rows: int = 0, cols: int = 0):
+        if rows:
+            self.alive = np.concatenate([self.alive, np.zeros(rows, dtype=bool)])
+            self.city = np.concatenate([self.city, np.full(rows, -1, dtype=np.int32)])
+            self.state = np.concatenate([self.state, np.full(rows, -1, dtype=np.int32)])
+            self.skill = np.concatenate([self.skill, np.full(rows, -1, dtype=np.int8)])
+            self.salary = np.concatenate([self.salary, np.full(rows, np.nan)])
+            self.provides_accommodation = np.concatenate([self.provides_accommodation, np.zeros(rows, dtype=bool)])
+            self.term_count = np.concatenate([self.term_count, np.zeros(rows, dtype=np.int16)])
+        self.terms = np.pad(self.terms, ((0, rows), (0, cols)))
+
+    def add(self, job: dict):
+        """Add or replace one job (called after post_job). Jobs that are not open are dropped."""
+        if not job or job.get("job_id") is None:
+            return
+        if job.get("job_status", "open") != "open":
+            self.remove(job["job_id"])
+            return
+        slot = self.slot_of.get(job["job_id"])
+        if slot is None:
+            slot = len(self.cards)
+            if slot >= len(self.alive):
+                self._grow(rows=len(self.alive))
+            self.slot_of[job["job_id"]] = slot
+            self.cards.append(None)
+
+        card_columns = [c.strip() for c in JOB_LIST_COLUMNS.split(",")]
+        self.cards[slot] = {c: job[c] for c in card_columns if c in job}
+        self.alive[slot] = True
+        self.city[slot] = self.cities.encode(job.get("city"))
+        self.state[slot] = self.states.encode(job.get("state"))
+        self.skill[slot] = skill_rank(job.get("required_skill_level"))
+        self.salary[slot] = daily_amount(job.get("salary_amount"), job.get("payment_type"))
+        self.provides_accommodation[slot] = norm(job.get("accommodation_type")) not in NO_ACCOMMODATION
+
+        job_terms = set(terms(job.get("job_type")))
+        for term in job_terms:
+            if term not in self.term_cols:
+                self.term_cols[term] = len(self.term_cols)
+        if len(self.term_cols) > self.terms.shape[1]:
+            self._grow(cols=max(len(self.term_cols), 2 * self.terms.shape[1]) - self.terms.shape[1])
+        self.terms[slot] = False
+        self.terms[slot, [self.term_cols[t] for t in job_terms]] = True
+        self.term_count[slot] = len(job_terms)
+
+    def remove(self, job_id: int):
+        """Drop a job (called after delete_job). The slot is simply switched off."""
+        slot = self.slot_of.pop(job_id, None)
+        if slot is not None:
+            self.alive[slot] = False
+            self.cards[slot] = None
+
+    def apply(self, jobs):
+        """
+        Apply the job cards that accept/reject/complete return (their fill state
+        moved): open jobs are added or replaced, the rest dropped. No query.
+        """
+        if not self.loaded_at:
+            return  # never loaded in this process: the first refresh reads current state anyway
+        for job in jobs:
+            self.add(job)
+
+    # ---------- ranking ----------
+    def recommend(self, worker: dict, limit: int = 20) -> List[dict]:
+        """Return the best `limit` open jobs for a worker profile, with score breakdowns."""
+        size = len(self.cards)
+        alive = self.alive[:size]
+        if not alive.any():
+            return []
+
+        worker_cols = [self.term_cols[t] for t in set(terms(worker.get("job_expertise"))) if t in self.term_cols]
+        if worker_cols:
+            covered = self.terms[:size, worker_cols].sum(axis=1)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                expertise = np.where(self.term_count[:size] > 0, covered / self.term_count[:size], 0.0)
+            candidates = np.nonzero(alive & (covered > 0))[0]
+        else:
+            # no usable expertise on the profile: rank every open job on the other signals
+            expertise = np.zeros(size)
+            candidates = np.nonzero(alive)[0]
+        if len(candidates) == 0:
+            return []
+
+        location = location_scores(
+            self.city[candidates], self.state[candidates],
+            self.cities.lookup(worker.get("city")), self.states.lookup(worker.get("state")),
+        )
+        skill = skill_scores(skill_rank(worker.get("skill_level")), self.skill[candidates])
+        expected = daily_amount(worker.get("expected_salary"), worker.get("salary_type"))
+        salary = salary_scores(expected, self.salary[candidates])
+        needs_accommodation = bool(worker.get("need_accommodation"))
+        accommodation = np.where(needs_accommodation & ~self.provides_accommodation[candidates], 0.0, 1.0)
+
+        components = {
+            "expertise": expertise[candidates],
+            "location": location,
+            "skill": skill,
+            "salary": salary,
+            "accommodation": accommodation,
+        }
+        score = sum(WEIGHTS[name] * values for name, values in components.items())
+
+        top = np.argsort(-score, kind="stable")[:limit]
+        return [
+            {
+                **self.cards[candidates[i]],
+                "score": round(float(score[i]), 4),
+                "breakdown": {name: round(float(values[i]), 4) for name, values in components.items()},
+            }
+            for i in top
+        ]
+
+
+job_index = JobIndex()
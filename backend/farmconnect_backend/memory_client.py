@@ -0,0 +1,673 @@
+import asyncio
+import copy
+import itertools
+import json
+import math
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from postgrest.exceptions import APIError
+
+from instrumentation import record
+from queries import WORKER_CARD_COLUMNS, SENT_REQUEST_COLUMNS, FARMER_PROFILE_COLUMNS, WORKER_PROFILE_COLUMNS
+
+# ==========================================================
+# 🧪 In-memory PostgREST stand-in
+# ==========================================================
+# Implements the part of the AsyncPostgrestClient API the routers use
+# (table().select/insert/update/delete, eq/in_/gt/gte/lt/lte/contains/is_,
+# order/limit, execute, rpc) against Python lists, with optional injected
+# latency per round trip. Enable with SUPABASE_BACKEND=memory or install
+# one with supabase_client.set_client() to run the routers offline
+# (benchmarks, N+1 checks). Postgres functions are Python callables
+# registered with register_rpc(); the ones the routers call are
+# registered by default. Any other function fails like a missing one
+# in PostgREST (PGRST202), which call_rpc returns as a 501.
+
+# Serial primary keys filled in on insert
+PRIMARY_KEYS = {
+    "job_listings": "job_id",
+    "collaborations": "collaboration_id",
+    "feedback": "feedback_id",
+    "notifications": "notification_id",
+    "worker_availability": "availability_id",
+}
+
+# Unique constraints checked on insert (23505, like Postgres)
+UNIQUE_KEYS = {
+    "collaborations": ("farmer_id", "worker_id", "job_id"),
+    "feedback": ("collaboration_id", "given_by"),
+}
+
+# Column defaults Postgres would fill in on insert
+COLUMN_DEFAULTS = {
+    "notifications": lambda: {"is_read": False, "created_at": datetime.now().isoformat()},
+    "job_listings": lambda: {"accepted_workers": 0, "completed_workers": 0, "job_status": "open"},
+}
+
+# Tables stamped with change_id/updated_at, and how their tombstones are keyed
+# (key column, farmer column, worker column), as in the delta_sync migration
+SYNC_TABLES = {
+    "job_listings": ("job_id", "farmer_id", None),
+    "collaborations": ("collaboration_id", "farmer_id", "worker_id"),
+    "farmer_registration": ("id", "id", None),
+    "worker_registration": ("id", None, "id"),
+}
+
+Latency = Union[float, Callable[[str, str], float]]
+
+
+@dataclass
+class MemoryResponse:
+    data: Any
+    count: Optional[int] = None
+
+
+def _columns(columns: str) -> Optional[List[str]]:
+    names = [c.strip() for c in columns.split(",") if c.strip()]
+    return None if not names or "*" in names else names
+
+
+def _size(data) -> int:
+    # what PostgREST would have sent back, for the bytes metric
+    return len(json.dumps(data, default=str)) if data is not None else 0
+
+
+def _sort_key(value):
+    # NULLs sort as the largest value, like Postgres (last ascending, first descending)
+    return value is None, value if value is not None else 0
+
+
+class MemoryQuery:
+    """One request being built: `table("x").select(...).eq(...)...` then `await .execute()`."""
+
+    def __init__(self, client: "MemoryPostgrestClient", table: str):
+        self.client = client
+        self.table_name = table
+        self.operation = "select"
+        self.columns: Optional[List[str]] = None
+        self.values: Any = None
+        self.returning = "representation"
+        self.count: Optional[str] = None
+        self.filters: List[Callable[[dict], bool]] = []
+        self.ordering: List[tuple] = []
+        self.max_rows: Optional[int] = None
+
+    # ---------- operations ----------
+    def select(self, *columns: str, count: Optional[str] = None):
+        self.operation = "select"
+        self.columns = _columns(",".join(columns)) if columns else None
+        self.count = count
+        return self
+
+    def insert(self, values: Union[dict, List[dict]], returning: str = "representation", **kwargs):
+        self.operation, self.values, self.returning = "insert", values, returning
+        return self
+
+    def update(self, values: dict, returning: str = "representation", **kwargs):
+        self.operation, self.values, self.returning = "update", values, returning
+        return self
+
+    def delete(self, returning: str = "representation", **kwargs):
+        self.operation, self.returning = "delete", returning
+        return self
+
+    # ---------- filters ----------
+    def _where(self, column: str, test: Callable[[Any], bool]):
+        self.filters.append(lambda row: test(row.get(column)))
+        return self
+
+    def eq(self, column: str, value):
+        return self._where(column, lambda v: v is not None and v == value)
+
+    def neq(self, column: str, value):
+        return self._where(column, lambda v: v is not None and v != value)
+
+    def in_(self, column: str, values):
+        values = list(values)
+        return self._where(column, lambda v: v in values)
+
+    def gt(self, column: str, value):
+        return self._where(column, lambda v: v is not None and v > value)
+
+    def gte(self, column: str, value):
+        return self._where(column, lambda v: v is not None and v >= value)
+
+    def lt(self, column: str, value):
+        return self._where(column, lambda v: v is not None and v < value)
+
+    def lte(self, column: str, value):
+        return self._where(column, lambda v: v is not None and v <= value)
+
+    def contains(self, column: str, value):
+        return self._where(column, lambda v: v is not None and set(value) <= set(v))
+
+    def is_(self, column: str, value):
+        expected = None if value in (None, "null") else value
+        return self._where(column, lambda v: v is expected or v == expected)
+
+    # ---------- modifiers ----------
+    def order(self, column: str, desc: bool = False, **kwargs):
+        self.ordering.append((column, desc))
+        return self
+
+    def limit(self, size: int, **kwargs):
+        self.max_rows = size
+        return self
+
+    # ---------- execution ----------
+    def _matches(self, row: dict) -> bool:
+        return all(test(row) for test in self.filters)
+
+    def _project(self, row: dict) -> dict:
+        if self.columns is None:
+            return copy.deepcopy(row)
+        return {c: copy.deepcopy(row.get(c)) for c in self.columns}
+
+    async def execute(self) -> MemoryResponse:
+        started = time.perf_counter()
+        await self.client.round_trip(self.operation, self.table_name)
+        response = self._run()
+        record(self.table_name, time.perf_counter() - started, _size(response.data))
+        return response
+
+    def _run(self) -> MemoryResponse:
+        rows = self.client.tables.setdefault(self.table_name, [])
+
+        if self.operation == "insert":
+            values = self.values if isinstance(self.values, list) else [self.values]
+            inserted = [self.client.insert_row(self.table_name, dict(v)) for v in values]
+            return MemoryResponse(data=[] if self.returning == "minimal" else copy.deepcopy(inserted))
+
+        matched = [row for row in rows if self._matches(row)]
+
+        if self.operation == "update":
+            for row in matched:
+                row.update(copy.deepcopy(self.values))
+                self.client.stamp(self.table_name, row)
+            return MemoryResponse(data=[] if self.returning == "minimal" else copy.deepcopy(matched))
+
+        if self.operation == "delete":
+            rows[:] = [row for row in rows if not self._matches(row)]
+            for row in matched:
+                self.client.tombstone(self.table_name, row)
+            return MemoryResponse(data=[] if self.returning == "minimal" else copy.deepcopy(matched))
+
+        for column, desc in reversed(self.ordering):
+            matched.sort(key=lambda row: _sort_key(row.get(column)), reverse=desc)
+        total = len(matched)
+        if self.max_rows is not None:
+            matched = matched[: self.max_rows]
+        return MemoryResponse(
+            data=[self._project(row) for row in matched],
+            count=total if self.count else None,
+        )
+
+
+class MemoryRpc:
+    def __init__(self, client: "MemoryPostgrestClient", function: str, params: dict):
+        self.client = client
+        self.function = function
+        self.params = params or {}
+
+    async def execute(self) -> MemoryResponse:
+        started = time.perf_counter()
+        await self.client.round_trip("rpc", self.function)
+        result = None
+        try:
+            handler = self.client.rpc_handlers.get(self.function)
+            if handler is None:
+                raise APIError({"message": f"Could not find the function {self.function}", "code": "PGRST202"})
+            result = handler(self.client, **self.params)
+            if asyncio.iscoroutine(result):
+                result = await result
+            return MemoryResponse(data=copy.deepcopy(result))
+        finally:
+            record(f"rpc:{self.function}", time.perf_counter() - started, _size(result))
+
+
+class MemoryPostgrestClient:
+    """Drop-in for the shared AsyncPostgrestClient, backed by dicts in this process."""
+
+    def __init__(self, tables: Optional[Dict[str, List[dict]]] = None, latency: Latency = 0.0):
+        self.tables: Dict[str, List[dict]] = {name: [dict(r) for r in rows] for name, rows in (tables or {}).items()}
+        self.latency = latency
+        self.rpc_handlers: Dict[str, Callable] = dict(DEFAULT_RPCS)
+        self.session = None  # no HTTP; use IMAGE_STORAGE=local with this client
+        self._ids: Dict[str, itertools.count] = {}
+        self._changes = itertools.count(1)  # sync_change_seq
+        for name, rows in self.tables.items():
+            for row in rows:
+                if row.get("change_id") is None:
+                    self.stamp(name, row)
+
+    def table(self, name: str) -> MemoryQuery:
+        return MemoryQuery(self, name)
+
+    from_ = table
+
+    def rpc(self, function: str, params: Optional[dict] = None) -> MemoryRpc:
+        return MemoryRpc(self, function, params)
+
+    def register_rpc(self, function: str, handler: Callable):
+        """handler(client, **params) -> data; may be async and may raise APIError."""
+        self.rpc_handlers[function] = handler
+
+    async def round_trip(self, operation: str, name: str):
+        delay = self.latency(operation, name) if callable(self.latency) else self.latency
+        if delay:
+            await asyncio.sleep(delay)
+
+    def insert_row(self, table: str, row: dict) -> dict:
+        if table in COLUMN_DEFAULTS:
+            row = {**COLUMN_DEFAULTS[table](), **row}
+        unique = UNIQUE_KEYS.get(table)
+        if unique and self.rows(table, **{c: row.get(c) for c in unique}):
+            _raise(f"duplicate key value violates unique constraint on {table} ({', '.join(unique)})", "23505")
+        key = PRIMARY_KEYS.get(table)
+        if key and row.get(key) is None:
+            if table not in self._ids:
+                existing = [r[key] for r in self.tables.get(table, []) if isinstance(r.get(key), int)]
+                self._ids[table] = itertools.count(max(existing, default=0) + 1)
+            row[key] = next(self._ids[table])
+        self.stamp(table, row)
+        self.tables.setdefault(table, []).append(row)
+        if table == "notifications" and not row.get("is_read"):
+            self.add_unread(row["user_type"], row["user_id"], 1)  # count_unread_notifications trigger
+        return row
+
+    def stamp(self, table: str, row: dict):
+        """stamp_sync_change trigger: give a written row the next change_id."""
+        if table in SYNC_TABLES:
+            row["change_id"] = next(self._changes)
+            row["updated_at"] = datetime.now().isoformat()
+
+    def tombstone(self, table: str, row: dict):
+        """record_sync_tombstone trigger."""
+        if table not in SYNC_TABLES:
+            return
+        key, farmer, worker = SYNC_TABLES[table]
+        self.tables.setdefault("sync_tombstones", []).append({
+            "change_id": next(self._changes), "table_name": table, "row_id": str(row.get(key)),
+            "farmer_id": row.get(farmer) if farmer else None, "worker_id": row.get(worker) if worker else None,
+        })
+
+    def add_unread(self, user_type: str, user_id: str, delta: int) -> int:
+        counters = self.rows("notification_counters", user_type=user_type, user_id=user_id)
+        if not counters:
+            counters = [self.insert_row("notification_counters", {"user_type": user_type, "user_id": user_id, "unread": 0})]
+        counters[0]["unread"] = max(counters[0]["unread"] + delta, 0)
+        return counters[0]["unread"]
+
+    def rows(self, table: str, **filters) -> List[dict]:
+        return [r for r in self.tables.get(table, []) if all(r.get(k) == v for k, v in filters.items())]
+
+    async def aclose(self):
+        pass
+
+
+# ==========================================================
+# Default Postgres functions (same behaviour as supabase/migrations)
+# ==========================================================
+def _raise(message: str, code: str):
+    raise APIError({"message": message, "code": code})
+
+
+def _new_collaboration(client, farmer_id, worker_id, job_id, by_farmer: bool, duplicate_message: str) -> dict:
+    if client.rows("collaborations", farmer_id=farmer_id, worker_id=worker_id, job_id=job_id):
+        _raise(duplicate_message, "23505")
+    return client.insert_row("collaborations", {
+        "farmer_id": farmer_id, "worker_id": worker_id, "job_id": job_id, "status": "Pending",
+        "accepted_by_farmer": by_farmer, "accepted_by_worker": not by_farmer,
+        "requested_at": datetime.now().isoformat(), "version": 0,
+    })
+
+
+def send_collaboration_request(client, p_farmer_id, p_worker_id, p_job_id):
+    if not client.rows("farmer_registration", id=p_farmer_id):
+        _raise("Farmer not found.", "P0002")
+    if not client.rows("worker_registration", id=p_worker_id):
+        _raise("Worker not found.", "P0002")
+    if not client.rows("job_listings", job_id=p_job_id):
+        _raise("Job not found.", "P0002")
+    return _new_collaboration(client, p_farmer_id, p_worker_id, p_job_id, True, "Request already sent for this job.")
+
+
+def apply_for_job(client, p_worker_id, p_job_id):
+    if not client.rows("worker_registration", id=p_worker_id):
+        _raise("Worker not found.", "P0002")
+    jobs = client.rows("job_listings", job_id=p_job_id)
+    if not jobs:
+        _raise("Job not found.", "P0002")
+    if jobs[0].get("job_status", "open") != "open":
+        _raise("This job is no longer accepting applications.", "55000")
+    return _new_collaboration(client, jobs[0]["farmer_id"], p_worker_id, p_job_id, False, "Already applied for this job.")
+
+
+def send_collaboration_requests(client, p_farmer_id, p_job_id, p_worker_ids):
+    if not client.rows("farmer_registration", id=p_farmer_id):
+        _raise("Farmer not found.", "P0002")
+    if not client.rows("job_listings", job_id=p_job_id):
+        _raise("Job not found.", "P0002")
+    results = []
+    for worker_id in dict.fromkeys(p_worker_ids):
+        if not client.rows("worker_registration", id=worker_id):
+            results.append({"worker_id": worker_id, "success": False, "status_code": 404, "detail": "Worker not found."})
+        elif client.rows("collaborations", farmer_id=p_farmer_id, worker_id=worker_id, job_id=p_job_id):
+            results.append({"worker_id": worker_id, "success": False, "status_code": 400,
+                            "detail": "Request already sent for this job."})
+        else:
+            row = _new_collaboration(client, p_farmer_id, worker_id, p_job_id, True, "")
+            results.append({"worker_id": worker_id, "success": True, "collaboration": copy.deepcopy(row)})
+    return results
+
+
+HIRED = ("Accepted", "Active")
+
+
+def _apply_collaboration_to_job(client, row: dict, old_status: str):
+    """apply_collaboration_to_job trigger: keep the job's counters and job_status in step."""
+    hired = (row["status"] in HIRED) - (old_status in HIRED)
+    done = (row["status"] == "Completed") - (old_status == "Completed")
+    jobs = client.rows("job_listings", job_id=row["job_id"])
+    if not jobs or not (hired or done):
+        return
+    job = jobs[0]
+    job["accepted_workers"] = job.get("accepted_workers", 0) + hired
+    job["completed_workers"] = job.get("completed_workers", 0) + done
+    if job.get("job_status", "open") != "closed":
+        if job["completed_workers"] >= job["workers_needed"]:
+            job["job_status"] = "closed"
+        elif job["accepted_workers"] + job["completed_workers"] >= job["workers_needed"]:
+            job["job_status"] = "filled"
+        else:
+            job["job_status"] = "open"
+    client.stamp("job_listings", job)
+
+
+def _transition_allowed(row, actor, action, actor_id, expected_version) -> bool:
+    if expected_version is not None and row.get("version", 0) != expected_version:
+        return False
+    if actor_id is not None and row.get(f"{actor}_id") != actor_id:
+        return False
+    if action == "accept":
+        return row["status"] in ("Pending", "Accepted") and not row.get(f"accepted_by_{actor}")
+    if action == "reject":
+        return row["status"] in ("Pending", "Accepted")
+    return row["status"] in ("Accepted", "Active")
+
+
+def transition_collaborations(client, p_collaboration_ids, p_actor, p_action, p_actor_id=None, p_expected_version=None):
+    if p_actor not in ("farmer", "worker") or p_action not in ("accept", "reject", "complete"):
+        _raise("Invalid transition.", "22023")
+    other = "worker" if p_actor == "farmer" else "farmer"
+    now = datetime.now().isoformat()
+    changed = []
+    for row in client.tables.get("collaborations", []):
+        if row["collaboration_id"] not in p_collaboration_ids:
+            continue
+        if not _transition_allowed(row, p_actor, p_action, p_actor_id, p_expected_version):
+            continue
+        old_status = row["status"]
+        if p_action == "accept":
+            row[f"accepted_by_{p_actor}"] = True
+            if row.get(f"accepted_by_{other}"):
+                row["status"], row["started_at"] = "Active", now
+            else:
+                row["status"] = "Accepted"
+        else:
+            row["status"] = "Rejected" if p_action == "reject" else "Completed"
+            row["ended_at"] = now
+        row["version"] = row.get("version", 0) + 1
+        client.stamp("collaborations", row)
+        _apply_collaboration_to_job(client, row, old_status)
+        _sync_worker_booking(client, row)
+        changed.append(row)
+    # each row comes back with its job's card, read after the whole batch
+    jobs = {j["job_id"]: j for j in client.rows("job_listings") if j["job_id"] in {r["job_id"] for r in changed}}
+    return [{**row, "job": _job_card(jobs[row["job_id"]]) if row["job_id"] in jobs else None}
+            for row in sorted(changed, key=lambda r: r["collaboration_id"])]
+
+
+def transition_collaboration(client, p_collaboration_id, p_actor, p_action, p_actor_id=None, p_expected_version=None):
+    changed = transition_collaborations(client, [p_collaboration_id], p_actor, p_action, p_actor_id, p_expected_version)
+    if changed:
+        return changed[0]
+    rows = client.rows("collaborations", collaboration_id=p_collaboration_id)
+    if not rows:
+        _raise("Collaboration not found.", "P0002")
+    current = rows[0]
+    if p_actor_id is not None and current.get(f"{p_actor}_id") != p_actor_id:
+        _raise(f"This collaboration belongs to another {p_actor}.", "42501")
+    if p_expected_version is not None and current.get("version", 0) != p_expected_version:
+        _raise(f"Collaboration was changed (now {current['status']} at version {current.get('version', 0)}). "
+               "Reload and try again.", "40001")
+    _raise(f"Cannot {p_action} a collaboration that is {current['status']}.", "55000")
+
+
+# Jobs come back without the columns job_card() leaves out
+HIDDEN_JOB_COLUMNS = {"job_images", "search_vector", "work_period", "change_id", "updated_at"}
+SEARCH_FIELDS = ("job_title", "job_type", "job_description", "additional_benefits")
+
+
+def _job_card(row: dict) -> dict:
+    return {k: copy.deepcopy(v) for k, v in row.items() if k not in HIDDEN_JOB_COLUMNS}
+
+
+def search_jobs(client, p_query, p_limit=20, p_after_rank=None, p_after_job_id=None):
+    # plain word matching instead of websearch_to_tsquery: quotes/OR are ignored, -word excludes
+    words = [w.strip('"').lower() for w in p_query.split() if w.upper() != "OR"]
+    wanted = [w for w in words if w and not w.startswith("-")]
+    excluded = [w[1:] for w in words if w.startswith("-") and len(w) > 1]
+    hits = []
+    for row in client.rows("job_listings"):
+        if row.get("job_status", "open") != "open":
+            continue
+        text = " ".join(str(row.get(f) or "") for f in SEARCH_FIELDS).lower()
+        if not wanted or not all(w in text for w in wanted) or any(w in text for w in excluded):
+            continue
+        rank = round(sum(text.count(w) for w in wanted) / (1 + len(text.split())), 6)
+        if p_after_rank is not None and (rank, row["job_id"]) >= (p_after_rank, p_after_job_id):
+            continue
+        hits.append({**_job_card(row), "rank": rank})
+    hits.sort(key=lambda h: (h["rank"], h["job_id"]), reverse=True)
+    return hits[:p_limit]
+
+
+def _haversine_km(lat1, lon1, lat2, lon2) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371.0 * math.asin(math.sqrt(a))
+
+
+def _nearby(rows, p_latitude, p_longitude, p_radius_km, p_limit, card):
+    found = []
+    for row in rows:
+        if row.get("latitude") is None:
+            continue
+        distance = _haversine_km(p_latitude, p_longitude, row["latitude"], row["longitude"])
+        if distance <= p_radius_km:
+            found.append({**card(row), "distance_km": round(distance, 2)})
+    found.sort(key=lambda r: r["distance_km"])
+    return found[:p_limit]
+
+
+def nearby_jobs(client, p_latitude, p_longitude, p_radius_km, p_limit=20):
+    jobs = [r for r in client.rows("job_listings") if r.get("job_status", "open") == "open"]
+    return _nearby(jobs, p_latitude, p_longitude, p_radius_km, p_limit, _job_card)
+
+
+def nearby_workers(client, p_latitude, p_longitude, p_radius_km, p_limit=20):
+    columns = [c.strip() for c in WORKER_CARD_COLUMNS.split(",")]
+    return _nearby(client.rows("worker_registration"), p_latitude, p_longitude, p_radius_km, p_limit,
+                   lambda row: {c: copy.deepcopy(row.get(c)) for c in columns})
+
+
+def _with_stamp(card: dict, row: dict) -> dict:
+    return {**card, "change_id": row["change_id"], "updated_at": row.get("updated_at")}
+
+
+def _columns_of(row: dict, columns: str) -> dict:
+    return {c.strip(): copy.deepcopy(row.get(c.strip())) for c in columns.split(",")}
+
+
+def sync_changes(client, p_side, p_user_id, p_since=None, p_since_xmin=None, p_limit=200):
+    # one process, no concurrent transactions: nothing commits late, so the horizon is always 0
+    if p_side not in ("farmer", "worker"):
+        _raise("Invalid sync side.", "22023")
+    first_load, since = p_since is None, p_since or 0
+
+    def changed(rows):
+        return sorted((r for r in rows if r["change_id"] > since), key=lambda r: r["change_id"])[: p_limit + 1]
+
+    jobs = client.rows("job_listings") if p_side == "worker" else client.rows("job_listings", farmer_id=p_user_id)
+    if p_side == "worker" and first_load:
+        jobs = [r for r in jobs if r.get("job_status", "open") == "open"]
+    collaborations = client.rows("collaborations", **{f"{p_side}_id": p_user_id})
+    profiles = changed(client.rows(f"{p_side}_registration", id=p_user_id))
+    profile_columns = FARMER_PROFILE_COLUMNS if p_side == "farmer" else WORKER_PROFILE_COLUMNS
+
+    deleted = []
+    if not first_load:
+        deleted = [
+            {"change_id": t["change_id"], "table_name": t["table_name"], "row_id": t["row_id"]}
+            for t in changed(client.rows("sync_tombstones"))
+            if t.get(f"{p_side}_id") == p_user_id or (p_side == "worker" and t["table_name"] == "job_listings")
+        ]
+
+    state = client.rows("sync_state")
+    return {
+        "horizon": "0",
+        "purged_up_to": state[0]["purged_up_to"] if state else 0,
+        "job_listings": [_with_stamp(_job_card(r), r) for r in changed(jobs)],
+        "collaborations": [_with_stamp(_columns_of(r, SENT_REQUEST_COLUMNS), r) for r in changed(collaborations)],
+        "profile": _with_stamp(_columns_of(profiles[0], profile_columns), profiles[0]) if profiles else None,
+        "deleted": deleted,
+    }
+
+
+def _daterange(start: date, end: date) -> str:
+    """Inclusive dates as Postgres prints a daterange: [start,end+1)."""
+    return f"[{start.isoformat()},{(end + timedelta(days=1)).isoformat()})"
+
+
+def _bounds(period: str):
+    """[start, end) of a daterange string."""
+    lower, upper = period[1:-1].split(",")
+    return date.fromisoformat(lower), date.fromisoformat(upper)
+
+
+def _sync_worker_booking(client, row: dict):
+    """sync_worker_booking trigger: Accepted/Active collaborations book the job's work dates."""
+    bookings = client.tables.setdefault("worker_bookings", [])
+    bookings[:] = [b for b in bookings if b["collaboration_id"] != row["collaboration_id"]]
+    jobs = client.rows("job_listings", job_id=row["job_id"])
+    if row["status"] in HIRED and jobs and jobs[0].get("work_start_date") and jobs[0].get("work_end_date"):
+        period = _daterange(date.fromisoformat(str(jobs[0]["work_start_date"])),
+                            date.fromisoformat(str(jobs[0]["work_end_date"])))
+        bookings.append({"collaboration_id": row["collaboration_id"], "worker_id": row["worker_id"],
+                         "job_id": row["job_id"], "period": period})
+
+
+def set_worker_availability(client, p_worker_id, p_start_dates, p_end_dates):
+    if not client.rows("worker_registration", id=p_worker_id):
+        _raise("Worker not found.", "P0002")
+    table = client.tables.setdefault("worker_availability", [])
+    table[:] = [r for r in table if r["worker_id"] != p_worker_id]
+    # range_agg: merge overlapping/adjacent ranges
+    merged: List[list] = []
+    for start, end in sorted((date.fromisoformat(s), date.fromisoformat(e) + timedelta(days=1))
+                             for s, e in zip(p_start_dates, p_end_dates)):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [
+        copy.deepcopy(client.insert_row("worker_availability", {
+            "worker_id": p_worker_id, "period": _daterange(start, end - timedelta(days=1)),
+            "created_at": datetime.now().isoformat(),
+        }))
+        for start, end in merged
+    ]
+
+
+def available_workers(client, p_job_id, p_start, p_end, p_radius_km=None, p_limit=20):
+    jobs = client.rows("job_listings", job_id=p_job_id)
+    job = jobs[0] if jobs else {}
+    start, end = date.fromisoformat(p_start), date.fromisoformat(p_end) + timedelta(days=1)
+    found = []
+    for slot in client.rows("worker_availability"):
+        free_from, free_until = _bounds(slot["period"])
+        if not (free_from <= start and end <= free_until):
+            continue
+        if any(_bounds(b["period"])[0] < end and start < _bounds(b["period"])[1]
+               for b in client.rows("worker_bookings", worker_id=slot["worker_id"])):
+            continue
+        workers = client.rows("worker_registration", id=slot["worker_id"])
+        if not workers:
+            continue
+        w = workers[0]
+        located = None not in (job.get("latitude"), w.get("latitude"))
+        distance = _haversine_km(job["latitude"], job["longitude"], w["latitude"], w["longitude"]) if located else None
+        if p_radius_km is not None and job.get("latitude") is not None and (distance is None or distance > p_radius_km):
+            continue
+        found.append({
+            "id": w["id"], "name": w.get("name"), "city": w.get("city"), "state": w.get("state"),
+            "job_expertise": w.get("job_expertise"), "skill_level": w.get("skill_level"),
+            "expected_salary": w.get("expected_salary"), "salary_type": w.get("salary_type"),
+            "profile_thumbnail": w.get("profile_thumbnail"),
+            "rating_avg": w.get("rating_avg"), "rating_count": w.get("rating_count"),
+            "available_from": free_from.isoformat(), "available_until": (free_until - timedelta(days=1)).isoformat(),
+            "distance_km": round(distance, 2) if distance is not None else None,
+        })
+    # distance nulls last, then rating_avg desc nulls last
+    found.sort(key=lambda r: (r["distance_km"] is None, r["distance_km"] or 0,
+                              r["rating_avg"] is None, -(r["rating_avg"] or 0)))
+    return found[:p_limit]
+
+
+def _collaboration_counts(rows: List[dict]) -> dict:
+    return {
+        "total_applications": len(rows),
+        "active_collaborations": sum(1 for r in rows if r["status"] in ("Accepted", "Active")),
+        "pending_requests": sum(1 for r in rows if r["status"] == "Pending"),
+    }
+
+
+def worker_dashboard_counts(client, p_worker_id):
+    return _collaboration_counts(client.rows("collaborations", worker_id=p_worker_id))
+
+
+def farmer_dashboard_counts(client, p_farmer_id):
+    counts = _collaboration_counts(client.rows("collaborations", farmer_id=p_farmer_id))
+    counts["total_jobs_posted"] = len(client.rows("job_listings", farmer_id=p_farmer_id))
+    return counts
+
+
+def mark_notifications_read(client, p_user_type, p_user_id, p_up_to_id=None):
+    marked = 0
+    for row in client.rows("notifications", user_type=p_user_type, user_id=p_user_id):
+        if not row.get("is_read") and (p_up_to_id is None or row["notification_id"] <= p_up_to_id):
+            row["is_read"] = True
+            marked += 1
+    return client.add_unread(p_user_type, p_user_id, -marked)
+
+
+DEFAULT_RPCS = {
+    "send_collaboration_request": send_collaboration_request,
+    "send_collaboration_requests": send_collaboration_requests,
+    "apply_for_job": apply_for_job,
+    "transition_collaboration": transition_collaboration,
+    "transition_collaborations": transition_collaborations,
+    "worker_dashboard_counts": worker_dashboard_counts,
+    "farmer_dashboard_counts": farmer_dashboard_counts,
+    "mark_notifications_read": mark_notifications_read,
+    "search_jobs": search_jobs,
+    "nearby_jobs": nearby_jobs,
+    "nearby_workers": nearby_workers,
+    "sync_changes": sync_changes,
+    "set_worker_availability": set_worker_availability,
+    "available_workers": available_workers,
+}
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr
 from typing import Optional, List, Literal
-from datetime import datetime
+from datetime import date, datetime
 
 
 # ==========================================================
@@ -70,6 +70,8 @@ class JobListings(BaseModel):
     full_address: Optional[str] = None
     email: EmailStr 
     contact_number: str
+    work_start_date: Optional[date] = None  # inclusive; books hired workers' calendars
+    work_end_date: Optional[date] = None
 
 
 # ==========================================================
@@ -95,8 +97,8 @@ class FeedbackModel(BaseModel):
     feedback_id: Optional[int] = None
     collaboration_id: int
     given_by: Literal["Farmer", "Worker"]
-    farmer_id: Optional[int] = None
-    worker_id: Optional[int] = None
+    farmer_id: Optional[str] = None
+    worker_id: Optional[str] = None
     rating: int
     review: Optional[str] = None
     created_at: Optional[datetime] = None
@@ -105,10 +107,12 @@ class FeedbackModel(BaseModel):
 # ==========================================================
 # NOTIFICATIONS (Sent to Farmer or Worker)
 # ==========================================================
-# class NotificationModel(BaseModel):
-#     notification_id: Optional[int] = None
-#     user_type: Literal["Farmer", "Worker"]
-#     user_id: int
-#     message: str
-#     is_read: Optional[bool] = False
-#     created_at: Optional[datetime] = None
+class NotificationModel(BaseModel):
+    notification_id: Optional[int] = None
+    user_type: Literal["Farmer", "Worker"]
+    user_id: str
+    kind: str
+    message: str
+    collaboration_id: Optional[int] = None
+    is_read: Optional[bool] = False
+    created_at: Optional[datetime] = None
@@ -0,0 +1,160 @@
+import asyncio
+import os
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+from pagination import paginate
+from queries import fetch_one
+from supabase_client import get_client
+
+# ==========================================================
+# 🔔 Notifications
+# ==========================================================
+# Collaboration and feedback events queue a notification for the
+# other party. A background task writes the queue in batches (one
+# INSERT per flush, not one per event). Unread badges come from
+# notification_counters, kept by a trigger, never from COUNT(*).
+
+load_dotenv()
+NOTIFY_BATCH_SIZE = int(os.getenv("NOTIFY_BATCH_SIZE", "200"))
+NOTIFY_FLUSH_INTERVAL = float(os.getenv("NOTIFY_FLUSH_INTERVAL", "0.5"))
+
+DASHBOARD_NOTIFICATIONS = 5  # latest notifications shown on the home dashboard
+
+NOTIFICATION_COLUMNS = "notification_id, kind, message, collaboration_id, is_read, created_at"
+
+USER_TYPES = {"farmer": "Farmer", "worker": "Worker"}
+
+# (status, actor) -> (kind, message) sent to the other side
+COLLABORATION_MESSAGES = {
+    ("Pending", "farmer"): ("request_received", "You have a new work request for job #{job_id}."),
+    ("Pending", "worker"): ("application_received", "A worker applied for your job #{job_id}."),
+    ("Accepted", "farmer"): ("request_accepted", "Your application for job #{job_id} was accepted."),
+    ("Accepted", "worker"): ("request_accepted", "Your request for job #{job_id} was accepted."),
+    ("Active", "farmer"): ("collaboration_started", "Work on job #{job_id} has started."),
+    ("Active", "worker"): ("collaboration_started", "Work on job #{job_id} has started."),
+    ("Rejected", "farmer"): ("request_rejected", "Your application for job #{job_id} was declined."),
+    ("Rejected", "worker"): ("request_rejected", "Your request for job #{job_id} was declined."),
+    ("Completed", "farmer"): ("collaboration_completed", "Work on job #{job_id} is complete. Please leave feedback."),
+    ("Completed", "worker"): ("collaboration_completed", "Work on job #{job_id} is complete. Please leave feedback."),
+}
+
+
+class NotificationQueue:
+    def __init__(self):
+        self._pending: List[dict] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def push(self, side: str, user_id: str, kind: str, message: str, collaboration_id: Optional[int] = None):
+        """Queue one notification for a "farmer" or "worker"; written on the next flush."""
+        if not user_id:
+            return
+        self._pending.append({
+            "user_type": USER_TYPES[side],
+            "user_id": user_id,
+            "kind": kind,
+            "message": message,
+            "collaboration_id": collaboration_id,
+        })
+        if len(self._pending) >= NOTIFY_BATCH_SIZE and self._wakeup is not None:
+            self._wakeup.set()
+
+    async def flush(self):
+        while self._pending:
+            batch, self._pending = self._pending[:NOTIFY_BATCH_SIZE], self._pending[NOTIFY_BATCH_SIZE:]
+            try:
+                await get_client().table("notifications").insert(batch, returning="minimal").execute()
+            except Exception as e:
+                # notifications are best effort; a failed batch must not break the flusher
+                print(f"Notification insert failed ({len(batch)} dropped): {e}")
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=NOTIFY_FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def start(self):
+        if self._task is None:
+            # created here so the event belongs to the app's running loop
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+notification_queue = NotificationQueue()
+
+
+# ==========================================================
+# Producers
+# ==========================================================
+def notify_collaboration(row: Optional[dict], actor: str):
+    """Tell the other side of `row` about what `actor` ("farmer"/"worker") just did."""
+    if not row:
+        return
+    entry = COLLABORATION_MESSAGES.get((row.get("status"), actor))
+    if entry is None:
+        return
+    kind, message = entry
+    recipient = "worker" if actor == "farmer" else "farmer"
+    notification_queue.push(
+        recipient, row.get(f"{recipient}_id"), kind,
+        message.format(job_id=row.get("job_id")), row.get("collaboration_id"),
+    )
+
+
+def notify_feedback(recipient: str, user_id: str, rating: int, collaboration_id: int):
+    notification_queue.push(
+        recipient, user_id, "feedback_received",
+        f"You received a {rating}★ rating.", collaboration_id,
+    )
+
+
+# ==========================================================
+# Inbox
+# ==========================================================
+async def unread_count(client, side: str, user_id: str) -> int:
+    counter = await fetch_one(
+        client, "notification_counters", "unread",
+        {"user_type": USER_TYPES[side], "user_id": user_id},
+    )
+    return counter["unread"] if counter else 0
+
+
+async def inbox(client, side: str, user_id: str, cursor: Optional[int], limit: int) -> dict:
+    """Newest-first page of a user's notifications plus the unread badge count."""
+    query = (
+        client.table("notifications")
+        .select(NOTIFICATION_COLUMNS)
+        .eq("user_type", USER_TYPES[side])
+        .eq("user_id", user_id)
+    )
+    (rows, next_cursor), unread = await asyncio.gather(
+        paginate(query, "notification_id", cursor, limit),
+        unread_count(client, side, user_id),
+    )
+    return {"notifications": rows, "unread_count": unread, "next_cursor": next_cursor}
+
+
+async def mark_read(client, side: str, user_id: str, up_to: Optional[int] = None) -> int:
+    """Mark notifications read (all, or up to notification `up_to`); returns the unread count left."""
+    result = await client.rpc("mark_notifications_read", {
+        "p_user_type": USER_TYPES[side],
+        "p_user_id": user_id,
+        "p_up_to_id": up_to,
+    }).execute()
+    return result.data or 0
@@ -0,0 +1,34 @@
+from typing import Any, List, Optional, Tuple
+
+
+# ==========================================================
+# 🔧 Keyset (cursor) pagination helpers
+# ==========================================================
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def apply_eq_filters(query, filters: dict):
+    """Add an eq() for every filter that has a value."""
+    for column, value in filters.items():
+        if value is not None:
+            query = query.eq(column, value)
+    return query
+
+
+async def paginate(query, key: str, cursor: Optional[Any], limit: int) -> Tuple[List[dict], Optional[Any]]:
+    """
+    Run `query` newest-first on `key`, starting after `cursor`.
+    Fetches one extra row to know whether another page exists.
+    Returns (rows, next_cursor).
+    """
+    if cursor is not None:
+        query = query.lt(key, cursor)
+
+    result = await query.order(key, desc=True).limit(limit + 1).execute()
+    rows = result.data or []
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, rows[-1][key]
+    return rows, None
@@ -0,0 +1,107 @@
+from fastapi import HTTPException
+from postgrest.exceptions import APIError
+
+# ==========================================================
+# 🔧 Small query layer shared by the farmer/worker routers
+# ==========================================================
+# Every endpoint names the columns it actually returns instead of
+# select("*"), and existence checks only ask for a single key column.
+
+
+async def exists(client, table: str, filters: dict) -> bool:
+    """Return True if a row matching all `filters` (column -> value) exists."""
+    key = next(iter(filters))
+    query = client.table(table).select(key)
+    for column, value in filters.items():
+        query = query.eq(column, value)
+    result = await query.limit(1).execute()
+    return bool(result.data)
+
+
+async def fetch_one(client, table: str, columns: str, filters: dict):
+    """Return the first row matching `filters` with only `columns`, or None."""
+    query = client.table(table).select(columns)
+    for column, value in filters.items():
+        query = query.eq(column, value)
+    result = await query.limit(1).execute()
+    return result.data[0] if result.data else None
+
+
+# SQLSTATEs raised by our Postgres functions -> HTTP status
+RPC_ERROR_STATUS = {
+    "P0002": 404,  # referenced row not found
+    "23505": 400,  # duplicate
+    "55000": 400,  # row not in a state that allows it (e.g. job no longer open)
+    "22023": 400,  # invalid argument
+    "42501": 403,  # row belongs to someone else
+    "40001": 409,  # compare-and-set version mismatch
+    "PGRST202": 501,  # function not available on this backend (e.g. not in memory_client)
+}
+
+
+async def execute_unique(query, duplicate_detail: str):
+    """Run an insert whose unique constraint rejects repeats; a repeat becomes a 400."""
+    try:
+        return await query.execute()
+    except APIError as e:
+        if e.code == "23505":
+            raise HTTPException(status_code=400, detail=duplicate_detail)
+        raise
+
+
+async def call_rpc(client, function: str, params: dict):
+    """Call a Postgres function; errors it raises on purpose become HTTPExceptions."""
+    try:
+        result = await client.rpc(function, params).execute()
+    except APIError as e:
+        status = RPC_ERROR_STATUS.get(e.code)
+        if status is None:
+            raise
+        raise HTTPException(status_code=status, detail=e.message)
+    return result.data
+
+
+# ==========================================================
+# Column lists
+# ==========================================================
+# List endpoints never select image columns; they return the
+# thumbnail URLs instead.
+
+JOB_LIST_COLUMNS = (
+    "job_id, farmer_id, job_type, job_title, land_area, workers_needed, job_duration, "
+    "payment_type, salary_amount, urgency_level, required_skill_level, physical_demands, "
+    "working_hours_per_day, accommodation_type, transportation_facility, additional_benefits, "
+    "state, city, job_description, full_address, contact_number, email, created_at, "
+    "job_image_thumbnails, accepted_workers, job_status, work_start_date, work_end_date"
+)
+
+# Columns shown on a worker card (no email / full-size picture)
+WORKER_CARD_COLUMNS = (
+    "id, name, city, state, job_expertise, skill_level, work_capacity, "
+    "need_accommodation, expected_salary, salary_type, availability_duration, "
+    "profile_thumbnail, rating_avg, rating_count"
+)
+
+# Reputation, kept up to date by the feedback trigger (see rating_aggregates migration)
+RATING_COLUMNS = "rating_avg, rating_count, rating_histogram"
+
+# Profile pages (email is never sent back for farmers)
+FARMER_PROFILE_COLUMNS = (
+    "id, name, contact_number, city, state, full_address, created_at, "
+    "profile_picture, profile_thumbnail, " + RATING_COLUMNS
+)
+
+WORKER_PROFILE_COLUMNS = (
+    "id, name, contact_number, city, state, email, full_address, job_expertise, "
+    "skill_level, work_capacity, need_accommodation, expected_salary, salary_type, "
+    "additional_benefits, availability_duration, created_at, profile_picture, profile_thumbnail, "
+    "latitude, longitude, " + RATING_COLUMNS
+)
+
+# Collaboration lists (profiles and jobs are attached by enrichment.py)
+SENT_REQUEST_COLUMNS = (
+    "collaboration_id, farmer_id, worker_id, job_id, status, "
+    "accepted_by_farmer, accepted_by_worker, requested_at, version"
+)
+RECEIVED_REQUEST_COLUMNS = SENT_REQUEST_COLUMNS
+ACTIVE_COLLABORATION_COLUMNS = "collaboration_id, farmer_id, worker_id, job_id, status, started_at, version"
@@ -0,0 +1,128 @@
+import asyncio
+import json
+import os
+from typing import Dict, Optional, Set
+
+from dotenv import load_dotenv
+
+try:
+    import asyncpg
+except ImportError:  # only needed for REALTIME_BACKEND=postgres
+    asyncpg = None
+
+# ==========================================================
+# 📡 Realtime collaboration events
+# ==========================================================
+# Every farmer and worker has a channel ("farmer:<id>", "worker:<id>").
+# Collaboration inserts and status changes are pushed to both parties,
+# so the dashboard loads once and then listens instead of polling.
+#
+# REALTIME_BACKEND=local    handlers publish straight into this process.
+# REALTIME_BACKEND=postgres a trigger on collaborations calls pg_notify and
+#                           every API process relays it (works across workers).
+
+load_dotenv()
+REALTIME_BACKEND = os.getenv("REALTIME_BACKEND", "local")
+DATABASE_URL = os.getenv("DATABASE_URL")
+NOTIFY_CHANNEL = "collaboration_events"
+SUBSCRIBER_QUEUE_SIZE = 100
+KEEPALIVE_SECONDS = 15
+
+EVENT_COLUMNS = (
+    "collaboration_id", "farmer_id", "worker_id", "job_id", "status",
+    "accepted_by_farmer", "accepted_by_worker", "started_at", "ended_at", "version",
+)
+
+
+class Broker:
+    """In-process fan-out of events to per-user subscriber queues."""
+
+    def __init__(self):
+        self.subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+    def subscribe(self, channel: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.subscribers.setdefault(channel, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, channel: str, queue: asyncio.Queue):
+        queues = self.subscribers.get(channel)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self.subscribers[channel]
+
+    def publish(self, channel: str, event: dict):
+        for queue in list(self.subscribers.get(channel, ())):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # slow client: drop it; it reloads its lists when it reconnects
+                self.unsubscribe(channel, queue)
+
+    def publish_collaboration(self, event_type: str, row: dict):
+        event = {
+            "type": event_type,
+            "collaboration": {c: row.get(c) for c in EVENT_COLUMNS if c in row},
+        }
+        if row.get("farmer_id"):
+            self.publish(f"farmer:{row['farmer_id']}", event)
+        if row.get("worker_id"):
+            self.publish(f"worker:{row['worker_id']}", event)
+
+
+broker = Broker()
+
+
+def collaboration_changed(event_type: str, row: Optional[dict]):
+    """Called by handlers after a collaboration write ("collaboration.insert" / "collaboration.update")."""
+    if row and REALTIME_BACKEND == "local":
+        broker.publish_collaboration(event_type, row)
+
+
+# ==========================================================
+# Postgres LISTEN/NOTIFY relay
+# ==========================================================
+_listener = None
+
+
+def _on_notify(connection, pid, channel, payload):
+    message = json.loads(payload)
+    broker.publish_collaboration(message["type"], message["collaboration"])
+
+
+async def start_listener():
+    """Start relaying pg_notify events (only when REALTIME_BACKEND=postgres)."""
+    global _listener
+    if REALTIME_BACKEND != "postgres":
+        return
+    if asyncpg is None:
+        raise RuntimeError("REALTIME_BACKEND=postgres needs the asyncpg package.")
+    _listener = await asyncpg.connect(DATABASE_URL)
+    await _listener.add_listener(NOTIFY_CHANNEL, _on_notify)
+
+
+async def stop_listener():
+    global _listener
+    if _listener is not None:
+        await _listener.close()
+        _listener = None
+
+
+# ==========================================================
+# Server-Sent Events stream
+# ==========================================================
+async def event_stream(channel: str):
+    """Yield SSE frames for `channel` until the client disconnects."""
+    queue = broker.subscribe(channel)
+    try:
+        yield ": connected\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+    finally:
+        broker.unsubscribe(channel, queue)
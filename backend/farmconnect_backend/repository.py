@@ -0,0 +1,95 @@
+from typing import List, Optional
+
+from queries import fetch_one, call_rpc
+
+# ==========================================================
+# 🔧 Write-returning repository
+# ==========================================================
+# Each mutation is one conditional UPDATE that returns the updated
+# row (return=representation). Preconditions live in the WHERE
+# clause, so there is no read before the write; a None result means
+# the row is missing or was not in a state that allows the change.
+
+
+def _where(query, filters: dict):
+    for column, value in filters.items():
+        if isinstance(value, list):
+            query = query.in_(column, value)
+        else:
+            query = query.eq(column, value)
+    return query
+
+
+async def update_returning(client, table: str, values: dict, filters: dict) -> Optional[dict]:
+    """UPDATE `table` SET `values` WHERE `filters`, returning the first updated row or None."""
+    rows = await update_many_returning(client, table, values, filters)
+    return rows[0] if rows else None
+
+
+async def update_many_returning(client, table: str, values: dict, filters: dict) -> List[dict]:
+    """UPDATE `table` SET `values` WHERE `filters`, returning every updated row."""
+    query = _where(client.table(table).update(values), filters)
+    result = await query.execute()
+    return result.data or []
+
+
+# ==========================================================
+# Profiles
+# ==========================================================
+async def update_profile(client, table: str, id: str, values: dict) -> Optional[dict]:
+    """Update a farmer/worker profile and return it, or None if it doesn't exist."""
+    if not values:
+        return await fetch_one(client, table, "*", {"id": id})
+    return await update_returning(client, table, values, {"id": id})
+
+
+# ==========================================================
+# Collaborations
+# ==========================================================
+# Pending -> Accepted -> Active -> Completed, and Pending/Accepted -> Rejected.
+# Transitions are compare-and-set in Postgres (transition_collaboration):
+# one conditional UPDATE computes the next state from the locked row, so
+# concurrent accepts from both sides can't overwrite each other. Failures
+# come back as HTTPExceptions (404 / 403 / 409 version conflict / 400).
+# Every changed row carries its job's card under "job", with the fill
+# state (accepted_workers / job_status) the transition left it in.
+
+# UpdateRequestStatus.status -> transition
+STATUS_ACTIONS = {"Accepted": "accept", "Rejected": "reject", "Completed": "complete"}
+
+
+async def transition_collaboration(
+    client,
+    collaboration_id: int,
+    side: str,
+    action: str,
+    actor_id: Optional[str] = None,
+    expected_version: Optional[int] = None,
+) -> dict:
+    """Apply `action` ("accept" / "reject" / "complete") as `side` ("farmer" / "worker")."""
+    return await call_rpc(client, "transition_collaboration", {
+        "p_collaboration_id": collaboration_id,
+        "p_actor": side,
+        "p_action": action,
+        "p_actor_id": actor_id,
+        "p_expected_version": expected_version,
+    })
+
+
+async def complete_collaboration(client, collaboration_id: int, side: str, **kwargs) -> dict:
+    return await transition_collaboration(client, collaboration_id, side, "complete", **kwargs)
+
+
+async def transition_collaborations(
+    client, collaboration_ids: List[int], side: str, action: str, actor_id: Optional[str] = None
+) -> List[dict]:
+    """
+    Bulk version: one UPDATE for the whole batch. Returns the rows that
+    changed; ids missing from the result were not in an allowed state.
+    """
+    return await call_rpc(client, "transition_collaborations", {
+        "p_collaboration_ids": collaboration_ids,
+        "p_actor": side,
+        "p_action": action,
+        "p_actor_id": actor_id,
+    })
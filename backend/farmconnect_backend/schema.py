@@ -1,6 +1,6 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from typing import Optional, List, Literal
-from datetime import datetime
+from datetime import date, datetime
 
 
 
@@ -52,6 +52,37 @@ class SendRequest(BaseModel):
 class UpdateRequestStatus(BaseModel):
     collaboration_id: int
     status: Literal["Pending", "Accepted", "Rejected", "Active", "Completed"]
+    version: Optional[int] = None  # last version seen; a stale one is rejected with 409
+
+
+# ==========================================================
+# WORKER AVAILABILITY (calendar)
+# ==========================================================
+class AvailabilityRange(BaseModel):
+    start_date: date
+    end_date: date  # inclusive
+
+
+class WorkerAvailability(BaseModel):
+    ranges: List[AvailabilityRange] = Field(default_factory=list, max_length=100)
+
+
+# ==========================================================
+# BULK COLLABORATION SCHEMAS (crew hiring)
+# ==========================================================
+MAX_BULK_ITEMS = 100
+
+
+class BulkSendRequest(BaseModel):
+    farmer_id: str
+    job_id: int
+    worker_ids: List[str] = Field(..., min_length=1, max_length=MAX_BULK_ITEMS)
+
+
+class BulkUpdateRequestStatus(BaseModel):
+    farmer_id: str
+    collaboration_ids: List[int] = Field(..., min_length=1, max_length=MAX_BULK_ITEMS)
+    status: Literal["Accepted", "Rejected"]
 
 
 # ==========================================================
@@ -102,7 +133,9 @@ class FeedbackInput(BaseModel):
 # ==========================================================
 class NotificationResponse(BaseModel):
     notification_id: int
+    kind: Optional[str] = None
     message: str
+    collaboration_id: Optional[int] = None
     is_read: bool
     created_at: datetime
 
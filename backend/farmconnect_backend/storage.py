@@ -0,0 +1,162 @@
+import asyncio
+import base64
+import binascii
+import mimetypes
+import os
+from io import BytesIO
+from typing import List, Optional, Tuple
+from uuid import uuid4
+
+from dotenv import load_dotenv
+from PIL import Image
+
+from supabase_client import SUPABASE_URL, get_http
+
+load_dotenv()
+
+# ==========================================================
+# 🖼️ Image storage
+# ==========================================================
+# Images arrive from the frontend as base64 data URLs. They are
+# uploaded once, a thumbnail is generated, and only the URLs are
+# kept on farmer/worker/job rows.
+
+IMAGE_STORAGE = os.getenv("IMAGE_STORAGE", "supabase")  # "supabase" | "local"
+IMAGE_BUCKET = os.getenv("IMAGE_BUCKET", "images")
+LOCAL_IMAGE_DIR = os.getenv("LOCAL_IMAGE_DIR", "media")
+LOCAL_IMAGE_URL = os.getenv("LOCAL_IMAGE_URL", "/media")
+THUMBNAIL_SIZE = (256, 256)
+
+
+class LocalImageStorage:
+    """Writes images under a local directory (used for development and tests)."""
+
+    def __init__(self, root: str = LOCAL_IMAGE_DIR, base_url: str = LOCAL_IMAGE_URL):
+        self.root = root
+        self.base_url = base_url.rstrip("/")
+
+    async def save(self, path: str, data: bytes, content_type: str) -> str:
+        await asyncio.to_thread(self._write, path, data)
+        return f"{self.base_url}/{path}"
+
+    def _write(self, path: str, data: bytes):
+        full_path = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "wb") as f:
+            f.write(data)
+
+
+class SupabaseImageStorage:
+    """Uploads images to a public Supabase Storage bucket over the shared connection pool."""
+
+    def __init__(self, bucket: str = IMAGE_BUCKET):
+        self.bucket = bucket
+
+    async def save(self, path: str, data: bytes, content_type: str) -> str:
+        response = await get_http().post(
+            f"{SUPABASE_URL}/storage/v1/object/{self.bucket}/{path}",
+            content=data,
+            headers={"content-type": content_type},
+        )
+        response.raise_for_status()
+        return f"{SUPABASE_URL}/storage/v1/object/public/{self.bucket}/{path}"
+
+
+_storage = None
+
+
+def get_storage():
+    """Return the configured storage backend (created on first use)."""
+    global _storage
+    if _storage is None:
+        if IMAGE_STORAGE == "local":
+            _storage = LocalImageStorage()
+        else:
+            _storage = SupabaseImageStorage()
+    return _storage
+
+
+def set_storage(storage):
+    """Replace the storage backend (e.g. with LocalImageStorage in tests)."""
+    global _storage
+    _storage = storage
+
+
+# ==========================================================
+# 🔧 Helpers
+# ==========================================================
+def decode_image(value: str) -> Tuple[bytes, str]:
+    """Decode a base64 data URL (or bare base64 string) into (bytes, content_type)."""
+    content_type = "image/jpeg"
+    encoded = value
+    if value.startswith("data:"):
+        header, _, encoded = value.partition(",")
+        content_type = header[len("data:"):].split(";")[0] or content_type
+
+    try:
+        return base64.b64decode(encoded, validate=True), content_type
+    except (binascii.Error, ValueError):
+        raise ValueError("Invalid image data.")
+
+
+def make_thumbnail(data: bytes) -> bytes:
+    """Return a JPEG thumbnail no larger than THUMBNAIL_SIZE."""
+    try:
+        image = Image.open(BytesIO(data))
+        image.thumbnail(THUMBNAIL_SIZE)
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        out = BytesIO()
+        image.save(out, format="JPEG", quality=80)
+        return out.getvalue()
+    except OSError:
+        raise ValueError("Uploaded file is not a valid image.")
+
+
+def is_stored_url(value: str) -> bool:
+    """True for URLs we produced. Bare base64 may start with "/" ("/9j/" is a JPEG), so only our own prefixes count."""
+    return value.startswith(("http://", "https://", LOCAL_IMAGE_URL.rstrip("/") + "/"))
+
+
+async def store_image(value: str, folder: str) -> Tuple[str, str]:
+    """Upload an image and its thumbnail. Returns (image_url, thumbnail_url)."""
+    data, content_type = decode_image(value)
+    # resizing is CPU work; keep it off the event loop
+    thumbnail = await asyncio.to_thread(make_thumbnail, data)
+
+    storage = get_storage()
+    name = uuid4().hex
+    extension = mimetypes.guess_extension(content_type) or ".jpg"
+
+    return await asyncio.gather(
+        storage.save(f"{folder}/{name}{extension}", data, content_type),
+        storage.save(f"{folder}/{name}_thumb.jpg", thumbnail, "image/jpeg"),
+    )
+
+
+async def store_profile_picture(data: dict, folder: str) -> dict:
+    """
+    Replace an inline `profile_picture` in `data` with its stored URL
+    and set `profile_thumbnail`. Values that are already URLs are kept.
+    """
+    picture: Optional[str] = data.get("profile_picture")
+    if picture and not is_stored_url(picture):
+        data["profile_picture"], data["profile_thumbnail"] = await store_image(picture, folder)
+    return data
+
+
+async def store_job_images(data: dict, folder: str) -> dict:
+    """Replace inline `job_images` with stored URLs and set `job_image_thumbnails`."""
+    images: Optional[List[str]] = data.get("job_images")
+    if not images:
+        return data
+
+    async def store(image: str) -> Tuple[str, str]:
+        if is_stored_url(image):
+            return image, image
+        return await store_image(image, folder)
+
+    stored = await asyncio.gather(*(store(image) for image in images))
+    data["job_images"] = [url for url, _ in stored]
+    data["job_image_thumbnails"] = [thumbnail for _, thumbnail in stored]
+    return data
@@ -0,0 +1,45 @@
+-- ==========================================================
+-- Dashboard counters
+-- ==========================================================
+-- Dashboards only need a handful of numbers, so count them in
+-- Postgres instead of shipping every collaboration row to the API.
+
+create index if not exists collaborations_worker_status_idx
+    on collaborations (worker_id, status);
+
+create index if not exists collaborations_farmer_status_idx
+    on collaborations (farmer_id, status);
+
+create index if not exists job_listings_farmer_id_idx
+    on job_listings (farmer_id);
+
+
+create or replace function worker_dashboard_counts(p_worker_id text)
+returns json
+language sql
+stable
+as $$
+    select json_build_object(
+        'total_applications', count(*),
+        'active_collaborations', count(*) filter (where status in ('Accepted', 'Active')),
+        'pending_requests', count(*) filter (where status = 'Pending')
+    )
+    from collaborations
+    where worker_id = p_worker_id;
+$$;
+
+
+create or replace function farmer_dashboard_counts(p_farmer_id text)
+returns json
+language sql
+stable
+as $$
+    select json_build_object(
+        'total_jobs_posted', (select count(*) from job_listings where farmer_id = p_farmer_id),
+        'total_applications', count(*),
+        'active_collaborations', count(*) filter (where status in ('Accepted', 'Active')),
+        'pending_requests', count(*) filter (where status = 'Pending')
+    )
+    from collaborations
+    where farmer_id = p_farmer_id;
+$$;
@@ -0,0 +1,23 @@
+-- ==========================================================
+-- Worker job feed (GET /worker/find_work)
+-- ==========================================================
+-- The feed is paged newest-first on job_id, so every filter
+-- column is paired with job_id to serve the keyset scan directly.
+
+create index if not exists job_listings_job_id_desc_idx
+    on job_listings (job_id desc);
+
+create index if not exists job_listings_city_job_id_idx
+    on job_listings (city, job_id desc);
+
+create index if not exists job_listings_state_job_id_idx
+    on job_listings (state, job_id desc);
+
+create index if not exists job_listings_job_type_job_id_idx
+    on job_listings (job_type, job_id desc);
+
+create index if not exists job_listings_skill_job_id_idx
+    on job_listings (required_skill_level, job_id desc);
+
+create index if not exists job_listings_urgency_job_id_idx
+    on job_listings (urgency_level, job_id desc);
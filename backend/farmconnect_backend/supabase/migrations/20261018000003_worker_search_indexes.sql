@@ -0,0 +1,19 @@
+-- ==========================================================
+-- Worker search (POST /farmer/search_workers)
+-- ==========================================================
+
+-- job_expertise is a text[]; "@>" (contains) lookups need GIN.
+create index if not exists worker_registration_job_expertise_gin
+    on worker_registration using gin (job_expertise);
+
+create index if not exists worker_registration_location_idx
+    on worker_registration (state, city);
+
+create index if not exists worker_registration_city_idx
+    on worker_registration (city);
+
+create index if not exists worker_registration_expected_salary_idx
+    on worker_registration (expected_salary);
+
+create index if not exists worker_registration_skill_level_idx
+    on worker_registration (skill_level);
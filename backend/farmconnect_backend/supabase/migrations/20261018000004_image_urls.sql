@@ -0,0 +1,9 @@
+-- ==========================================================
+-- Images live in object storage; rows keep only URLs
+-- ==========================================================
+-- profile_picture / job_images now hold URLs of the full-size images.
+-- List endpoints read the thumbnail columns instead.
+
+alter table farmer_registration add column if not exists profile_thumbnail text;
+alter table worker_registration add column if not exists profile_thumbnail text;
+alter table job_listings add column if not exists job_image_thumbnails text[];
@@ -0,0 +1,106 @@
+-- ==========================================================
+-- send_request / apply_for_job in one round trip
+-- ==========================================================
+-- Both endpoints validate their references and insert inside a
+-- single function call. The unique constraint (instead of a
+-- read-then-write check) makes concurrent double-submits safe.
+
+-- Existing duplicates: keep the most advanced row of each group
+-- (Completed > Active > Accepted > Pending > Rejected, oldest on a tie)
+-- and move feedback from the others onto it before deleting them.
+create temporary table collaboration_duplicates as
+select collaboration_id, keep_id
+from (
+    select
+        collaboration_id,
+        first_value(collaboration_id) over (
+            partition by farmer_id, worker_id, job_id
+            order by case status
+                         when 'Completed' then 4
+                         when 'Active' then 3
+                         when 'Accepted' then 2
+                         when 'Pending' then 1
+                         else 0
+                     end desc,
+                     collaboration_id
+        ) as keep_id
+    from collaborations
+) ranked
+where collaboration_id <> keep_id;
+
+update feedback f
+set collaboration_id = d.keep_id
+from collaboration_duplicates d
+where f.collaboration_id = d.collaboration_id;
+
+delete from collaborations c
+using collaboration_duplicates d
+where c.collaboration_id = d.collaboration_id;
+
+drop table collaboration_duplicates;
+
+alter table collaborations
+    add constraint collaborations_farmer_worker_job_key unique (farmer_id, worker_id, job_id);
+
+
+-- Errors use SQLSTATE P0002 (not found) and 23505 (duplicate);
+-- the API maps them to 404 / 400 (see queries.call_rpc).
+
+create or replace function send_collaboration_request(p_farmer_id text, p_worker_id text, p_job_id bigint)
+returns collaborations
+language plpgsql
+as $$
+declare
+    new_row collaborations;
+begin
+    if not exists (select 1 from farmer_registration where id = p_farmer_id) then
+        raise exception 'Farmer not found.' using errcode = 'P0002';
+    end if;
+    if not exists (select 1 from worker_registration where id = p_worker_id) then
+        raise exception 'Worker not found.' using errcode = 'P0002';
+    end if;
+    if not exists (select 1 from job_listings where job_id = p_job_id) then
+        raise exception 'Job not found.' using errcode = 'P0002';
+    end if;
+
+    insert into collaborations (farmer_id, worker_id, job_id, status, accepted_by_farmer, accepted_by_worker, requested_at)
+    values (p_farmer_id, p_worker_id, p_job_id, 'Pending', true, false, now())
+    on conflict (farmer_id, worker_id, job_id) do nothing
+    returning * into new_row;
+
+    if new_row.collaboration_id is null then
+        raise exception 'Request already sent for this job.' using errcode = '23505';
+    end if;
+    return new_row;
+end;
+$$;
+
+
+create or replace function apply_for_job(p_worker_id text, p_job_id bigint)
+returns collaborations
+language plpgsql
+as $$
+declare
+    job_farmer_id text;
+    new_row collaborations;
+begin
+    if not exists (select 1 from worker_registration where id = p_worker_id) then
+        raise exception 'Worker not found.' using errcode = 'P0002';
+    end if;
+
+    select farmer_id into job_farmer_id from job_listings where job_id = p_job_id;
+    if not found then
+        raise exception 'Job not found.' using errcode = 'P0002';
+    end if;
+
+    insert into collaborations (farmer_id, worker_id, job_id, status, accepted_by_farmer, accepted_by_worker, requested_at)
+    values (job_farmer_id, p_worker_id, p_job_id, 'Pending', false, true, now())
+    on conflict (farmer_id, worker_id, job_id) do nothing
+    returning * into new_row;
+
+    if new_row.collaboration_id is null then
+        raise exception 'Already applied for this job.' using errcode = '23505';
+    end if;
+    return new_row;
+end;
+$$;
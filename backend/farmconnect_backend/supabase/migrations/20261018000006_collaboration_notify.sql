@@ -0,0 +1,37 @@
+-- ==========================================================
+-- Realtime collaboration events (REALTIME_BACKEND=postgres)
+-- ==========================================================
+-- Every insert / status change on collaborations is sent on the
+-- collaboration_events channel; API processes LISTEN and push it
+-- to the farmer's and worker's event streams (see realtime.py).
+
+create or replace function notify_collaboration_change()
+returns trigger
+language plpgsql
+as $$
+begin
+    perform pg_notify(
+        'collaboration_events',
+        json_build_object(
+            'type', case when tg_op = 'INSERT' then 'collaboration.insert' else 'collaboration.update' end,
+            'collaboration', json_build_object(
+                'collaboration_id', new.collaboration_id,
+                'farmer_id', new.farmer_id,
+                'worker_id', new.worker_id,
+                'job_id', new.job_id,
+                'status', new.status,
+                'accepted_by_farmer', new.accepted_by_farmer,
+                'accepted_by_worker', new.accepted_by_worker,
+                'started_at', new.started_at,
+                'ended_at', new.ended_at
+            )
+        )::text
+    );
+    return new;
+end;
+$$;
+
+drop trigger if exists collaborations_notify on collaborations;
+create trigger collaborations_notify
+    after insert or update of status, accepted_by_farmer, accepted_by_worker on collaborations
+    for each row execute function notify_collaboration_change();
@@ -0,0 +1,55 @@
+-- ==========================================================
+-- Bulk invites: one job, many workers, one round trip
+-- ==========================================================
+-- Farmer and job are validated once; all rows go in with a single
+-- INSERT ... SELECT. Returns one result per distinct worker id, in
+-- request order:
+--   {"worker_id", "success": true,  "collaboration": {...}}
+--   {"worker_id", "success": false, "status_code": 404|400, "detail"}
+
+create or replace function send_collaboration_requests(p_farmer_id text, p_job_id bigint, p_worker_ids text[])
+returns jsonb
+language plpgsql
+as $$
+declare
+    results jsonb;
+begin
+    if not exists (select 1 from farmer_registration where id = p_farmer_id) then
+        raise exception 'Farmer not found.' using errcode = 'P0002';
+    end if;
+    if not exists (select 1 from job_listings where job_id = p_job_id) then
+        raise exception 'Job not found.' using errcode = 'P0002';
+    end if;
+
+    with requested as (
+        select worker_id, min(ord) as ord
+        from unnest(p_worker_ids) with ordinality as t(worker_id, ord)
+        group by worker_id
+    ),
+    inserted as (
+        insert into collaborations (farmer_id, worker_id, job_id, status, accepted_by_farmer, accepted_by_worker, requested_at)
+        select p_farmer_id, w.id, p_job_id, 'Pending', true, false, now()
+        from requested r
+        join worker_registration w on w.id = r.worker_id
+        on conflict (farmer_id, worker_id, job_id) do nothing
+        returning *
+    )
+    select coalesce(jsonb_agg(
+        case
+            when i.collaboration_id is not null then
+                jsonb_build_object('worker_id', r.worker_id, 'success', true, 'collaboration', to_jsonb(i))
+            when w.id is null then
+                jsonb_build_object('worker_id', r.worker_id, 'success', false, 'status_code', 404, 'detail', 'Worker not found.')
+            else
+                jsonb_build_object('worker_id', r.worker_id, 'success', false, 'status_code', 400, 'detail', 'Request already sent for this job.')
+        end
+        order by r.ord
+    ), '[]'::jsonb)
+    into results
+    from requested r
+    left join worker_registration w on w.id = r.worker_id
+    left join inserted i on i.worker_id = r.worker_id;
+
+    return results;
+end;
+$$;
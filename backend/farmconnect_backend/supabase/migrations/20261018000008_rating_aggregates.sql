@@ -0,0 +1,121 @@
+-- ==========================================================
+-- Running rating aggregates (count, sum, 1..5 histogram)
+-- ==========================================================
+-- Maintained by a trigger on feedback, so reputation is a column
+-- read instead of a scan over all feedback rows. A farmer's
+-- feedback rates the worker and a worker's feedback rates the farmer.
+
+alter table worker_registration
+    add column if not exists rating_count integer not null default 0,
+    add column if not exists rating_sum integer not null default 0,
+    add column if not exists rating_histogram integer[] not null default '{0,0,0,0,0}';
+alter table worker_registration
+    add column if not exists rating_avg numeric(3, 2)
+        generated always as (case when rating_count > 0 then rating_sum::numeric / rating_count end) stored;
+
+alter table farmer_registration
+    add column if not exists rating_count integer not null default 0,
+    add column if not exists rating_sum integer not null default 0,
+    add column if not exists rating_histogram integer[] not null default '{0,0,0,0,0}';
+alter table farmer_registration
+    add column if not exists rating_avg numeric(3, 2)
+        generated always as (case when rating_count > 0 then rating_sum::numeric / rating_count end) stored;
+
+
+-- one feedback per side per collaboration; keep the first of any repeats
+delete from feedback f
+using feedback d
+where f.collaboration_id = d.collaboration_id
+  and f.given_by = d.given_by
+  and f.feedback_id > d.feedback_id;
+
+alter table feedback
+    add constraint feedback_collaboration_given_by_key unique (collaboration_id, given_by);
+
+
+create or replace function apply_feedback_rating()
+returns trigger
+language plpgsql
+as $$
+declare
+    fb feedback;
+    delta integer;
+    c collaborations;
+begin
+    if tg_op = 'INSERT' then
+        fb := new;
+        delta := 1;
+    else
+        fb := old;
+        delta := -1;
+    end if;
+
+    if fb.rating is null or fb.rating not between 1 and 5 then
+        raise exception 'Rating must be an integer between 1 and 5.' using errcode = '22023';
+    end if;
+
+    -- the feedback row's own farmer_id/worker_id are optional; the collaboration is not
+    select * into c from collaborations where collaboration_id = fb.collaboration_id;
+
+    -- single-row UPDATEs: the row lock makes concurrent inserts add up correctly
+    if fb.given_by = 'Farmer' then
+        update worker_registration
+        set rating_count = rating_count + delta,
+            rating_sum = rating_sum + delta * fb.rating,
+            rating_histogram[fb.rating] = rating_histogram[fb.rating] + delta
+        where id = coalesce(c.worker_id, fb.worker_id::text);
+    else
+        update farmer_registration
+        set rating_count = rating_count + delta,
+            rating_sum = rating_sum + delta * fb.rating,
+            rating_histogram[fb.rating] = rating_histogram[fb.rating] + delta
+        where id = coalesce(c.farmer_id, fb.farmer_id::text);
+    end if;
+    return null;
+end;
+$$;
+
+drop trigger if exists feedback_rating_aggregates on feedback;
+create trigger feedback_rating_aggregates
+    after insert or delete on feedback
+    for each row execute function apply_feedback_rating();
+
+
+-- backfill from existing feedback
+with rated as (
+    select c.worker_id as id, f.rating
+    from feedback f join collaborations c using (collaboration_id)
+    where f.given_by = 'Farmer' and f.rating between 1 and 5
+),
+totals as (
+    select id, count(*) as n, sum(rating) as s,
+           array[count(*) filter (where rating = 1), count(*) filter (where rating = 2),
+                 count(*) filter (where rating = 3), count(*) filter (where rating = 4),
+                 count(*) filter (where rating = 5)]::integer[] as h
+    from rated group by id
+)
+update worker_registration w
+set rating_count = t.n, rating_sum = t.s, rating_histogram = t.h
+from totals t where w.id = t.id;
+
+with rated as (
+    select c.farmer_id as id, f.rating
+    from feedback f join collaborations c using (collaboration_id)
+    where f.given_by = 'Worker' and f.rating between 1 and 5
+),
+totals as (
+    select id, count(*) as n, sum(rating) as s,
+           array[count(*) filter (where rating = 1), count(*) filter (where rating = 2),
+                 count(*) filter (where rating = 3), count(*) filter (where rating = 4),
+                 count(*) filter (where rating = 5)]::integer[] as h
+    from rated group by id
+)
+update farmer_registration f
+set rating_count = t.n, rating_sum = t.s, rating_histogram = t.h
+from totals t where f.id = t.id;
+
+
+-- "top rated workers in my district": equality on location, ordered by rating
+create index if not exists worker_registration_top_rated_idx
+    on worker_registration (state, city, rating_avg desc, rating_count desc)
+    where rating_count > 0;
@@ -0,0 +1,143 @@
+-- ==========================================================
+-- Job fill state: open -> filled -> closed
+-- ==========================================================
+-- accepted_workers counts Accepted/Active collaborations and
+-- completed_workers counts Completed ones. A trigger on
+-- collaborations keeps both (and job_status) in step with every
+-- status transition, whichever endpoint made it.
+--   open    fewer workers hired than workers_needed
+--   filled  enough workers hired, work still running
+--   closed  enough workers finished, or closed by the farmer
+
+alter table job_listings
+    add column if not exists accepted_workers integer not null default 0,
+    add column if not exists completed_workers integer not null default 0,
+    add column if not exists job_status text not null default 'open'
+        check (job_status in ('open', 'filled', 'closed'));
+
+
+create or replace function apply_collaboration_to_job()
+returns trigger
+language plpgsql
+as $$
+declare
+    hired_delta integer := 0;
+    done_delta integer := 0;
+begin
+    if tg_op <> 'INSERT' and old.status in ('Accepted', 'Active') then
+        hired_delta := hired_delta - 1;
+    end if;
+    if tg_op <> 'DELETE' and new.status in ('Accepted', 'Active') then
+        hired_delta := hired_delta + 1;
+    end if;
+    if tg_op <> 'INSERT' and old.status = 'Completed' then
+        done_delta := done_delta - 1;
+    end if;
+    if tg_op <> 'DELETE' and new.status = 'Completed' then
+        done_delta := done_delta + 1;
+    end if;
+
+    if hired_delta = 0 and done_delta = 0 then
+        return null;
+    end if;
+
+    -- right-hand sides see the pre-update counters
+    update job_listings
+    set accepted_workers = accepted_workers + hired_delta,
+        completed_workers = completed_workers + done_delta,
+        job_status = case
+            when job_status = 'closed' then 'closed'
+            when completed_workers + done_delta >= workers_needed then 'closed'
+            when accepted_workers + hired_delta + completed_workers + done_delta >= workers_needed then 'filled'
+            else 'open'
+        end
+    where job_id = coalesce(new.job_id, old.job_id);
+    return null;
+end;
+$$;
+
+drop trigger if exists collaborations_job_counters on collaborations;
+create trigger collaborations_job_counters
+    after insert or delete or update of status on collaborations
+    for each row execute function apply_collaboration_to_job();
+
+
+-- backfill counters and state from existing collaborations
+update job_listings j
+set accepted_workers = coalesce(c.hired, 0),
+    completed_workers = coalesce(c.done, 0)
+from (
+    select job_id,
+           count(*) filter (where status in ('Accepted', 'Active')) as hired,
+           count(*) filter (where status = 'Completed') as done
+    from collaborations group by job_id
+) c
+where c.job_id = j.job_id;
+
+update job_listings
+set job_status = case
+    when completed_workers >= workers_needed then 'closed'
+    when accepted_workers + completed_workers >= workers_needed then 'filled'
+    else 'open'
+end;
+
+
+-- The worker feed only ever reads open jobs: index just those rows.
+drop index if exists job_listings_city_job_id_idx;
+drop index if exists job_listings_state_job_id_idx;
+drop index if exists job_listings_job_type_job_id_idx;
+drop index if exists job_listings_skill_job_id_idx;
+drop index if exists job_listings_urgency_job_id_idx;
+
+create index if not exists job_listings_open_job_id_idx
+    on job_listings (job_id desc) where job_status = 'open';
+
+create index if not exists job_listings_open_city_job_id_idx
+    on job_listings (city, job_id desc) where job_status = 'open';
+
+create index if not exists job_listings_open_state_job_id_idx
+    on job_listings (state, job_id desc) where job_status = 'open';
+
+create index if not exists job_listings_open_job_type_job_id_idx
+    on job_listings (job_type, job_id desc) where job_status = 'open';
+
+create index if not exists job_listings_open_skill_job_id_idx
+    on job_listings (required_skill_level, job_id desc) where job_status = 'open';
+
+create index if not exists job_listings_open_urgency_job_id_idx
+    on job_listings (urgency_level, job_id desc) where job_status = 'open';
+
+
+-- Workers can only apply to open jobs (SQLSTATE 55000 -> 400, see queries.call_rpc).
+create or replace function apply_for_job(p_worker_id text, p_job_id bigint)
+returns collaborations
+language plpgsql
+as $$
+declare
+    job_farmer_id text;
+    current_status text;
+    new_row collaborations;
+begin
+    if not exists (select 1 from worker_registration where id = p_worker_id) then
+        raise exception 'Worker not found.' using errcode = 'P0002';
+    end if;
+
+    select farmer_id, job_status into job_farmer_id, current_status from job_listings where job_id = p_job_id;
+    if not found then
+        raise exception 'Job not found.' using errcode = 'P0002';
+    end if;
+    if current_status <> 'open' then
+        raise exception 'This job is no longer accepting applications.' using errcode = '55000';
+    end if;
+
+    insert into collaborations (farmer_id, worker_id, job_id, status, accepted_by_farmer, accepted_by_worker, requested_at)
+    values (job_farmer_id, p_worker_id, p_job_id, 'Pending', false, true, now())
+    on conflict (farmer_id, worker_id, job_id) do nothing
+    returning * into new_row;
+
+    if new_row.collaboration_id is null then
+        raise exception 'Already applied for this job.' using errcode = '23505';
+    end if;
+    return new_row;
+end;
+$$;
@@ -0,0 +1,122 @@
+-- ==========================================================
+-- Geo-proximity: jobs near a worker, workers near a job
+-- ==========================================================
+-- Rows are geocoded by the API at write time (see geo.py). Queries
+-- narrow to a latitude/longitude bounding box with the btree indexes
+-- below, then apply the exact haversine distance to what is left.
+
+alter table job_listings
+    add column if not exists latitude double precision,
+    add column if not exists longitude double precision,
+    add column if not exists geohash text;
+
+alter table worker_registration
+    add column if not exists latitude double precision,
+    add column if not exists longitude double precision,
+    add column if not exists geohash text;
+
+create index if not exists job_listings_open_lat_lon_idx
+    on job_listings (latitude, longitude)
+    where job_status = 'open' and latitude is not null;
+
+create index if not exists job_listings_geohash_idx
+    on job_listings (geohash text_pattern_ops);
+
+create index if not exists worker_registration_lat_lon_idx
+    on worker_registration (latitude, longitude)
+    where latitude is not null;
+
+create index if not exists worker_registration_geohash_idx
+    on worker_registration (geohash text_pattern_ops);
+
+
+create or replace function haversine_km(lat1 double precision, lon1 double precision,
+                                        lat2 double precision, lon2 double precision)
+returns double precision
+language sql
+immutable
+as $$
+    select 2 * 6371.0 * asin(sqrt(
+        power(sin(radians(lat2 - lat1) / 2), 2)
+        + cos(radians(lat1)) * cos(radians(lat2)) * power(sin(radians(lon2 - lon1) / 2), 2)
+    ));
+$$;
+
+
+-- Job card returned by the proximity queries: the list columns only
+-- (no full-size images, search_vector or other internal columns).
+create or replace function job_card(j job_listings)
+returns jsonb
+language sql
+stable
+as $$
+    select jsonb_build_object(
+        'job_id', j.job_id, 'farmer_id', j.farmer_id, 'job_type', j.job_type,
+        'job_title', j.job_title, 'land_area', j.land_area, 'workers_needed', j.workers_needed,
+        'job_duration', j.job_duration, 'payment_type', j.payment_type,
+        'salary_amount', j.salary_amount, 'urgency_level', j.urgency_level,
+        'required_skill_level', j.required_skill_level, 'physical_demands', j.physical_demands,
+        'working_hours_per_day', j.working_hours_per_day,
+        'accommodation_type', j.accommodation_type,
+        'transportation_facility', j.transportation_facility,
+        'additional_benefits', j.additional_benefits, 'state', j.state, 'city', j.city,
+        'job_description', j.job_description, 'full_address', j.full_address,
+        'contact_number', j.contact_number, 'email', j.email, 'created_at', j.created_at,
+        'job_image_thumbnails', j.job_image_thumbnails, 'accepted_workers', j.accepted_workers,
+        'job_status', j.job_status, 'latitude', j.latitude, 'longitude', j.longitude
+    );
+$$;
+
+
+-- 1 degree of latitude is ~111.045 km; a degree of longitude shrinks with cos(latitude).
+create or replace function nearby_jobs(p_latitude double precision, p_longitude double precision,
+                                       p_radius_km double precision, p_limit integer default 20)
+returns setof jsonb
+language sql
+stable
+as $$
+    select job_card(j) || jsonb_build_object('distance_km', round(d.distance_km::numeric, 2))
+    from job_listings j
+    cross join lateral (
+        select haversine_km(p_latitude, p_longitude, j.latitude, j.longitude) as distance_km
+    ) d
+    where j.job_status = 'open'
+      and j.latitude is not null
+      and j.latitude between p_latitude - p_radius_km / 111.045
+                         and p_latitude + p_radius_km / 111.045
+      and j.longitude between p_longitude - p_radius_km / (111.045 * greatest(cos(radians(p_latitude)), 0.01))
+                          and p_longitude + p_radius_km / (111.045 * greatest(cos(radians(p_latitude)), 0.01))
+      and d.distance_km <= p_radius_km
+    order by d.distance_km
+    limit p_limit;
+$$;
+
+
+create or replace function nearby_workers(p_latitude double precision, p_longitude double precision,
+                                          p_radius_km double precision, p_limit integer default 20)
+returns setof jsonb
+language sql
+stable
+as $$
+    select jsonb_build_object(
+        'id', w.id, 'name', w.name, 'city', w.city, 'state', w.state,
+        'job_expertise', w.job_expertise, 'skill_level', w.skill_level,
+        'work_capacity', w.work_capacity, 'need_accommodation', w.need_accommodation,
+        'expected_salary', w.expected_salary, 'salary_type', w.salary_type,
+        'availability_duration', w.availability_duration, 'profile_thumbnail', w.profile_thumbnail,
+        'rating_avg', w.rating_avg, 'rating_count', w.rating_count,
+        'distance_km', round(w.distance_km::numeric, 2)
+    )
+    from (
+        select w.*, haversine_km(p_latitude, p_longitude, w.latitude, w.longitude) as distance_km
+        from worker_registration w
+        where w.latitude is not null
+          and w.latitude between p_latitude - p_radius_km / 111.045
+                             and p_latitude + p_radius_km / 111.045
+          and w.longitude between p_longitude - p_radius_km / (111.045 * greatest(cos(radians(p_latitude)), 0.01))
+                              and p_longitude + p_radius_km / (111.045 * greatest(cos(radians(p_latitude)), 0.01))
+    ) w
+    where w.distance_km <= p_radius_km
+    order by w.distance_km
+    limit p_limit;
+$$;
@@ -0,0 +1,56 @@
+-- ==========================================================
+-- Full-text search over job listings (GET /worker/search_jobs)
+-- ==========================================================
+-- "simple" parsing (no language-specific stemming, so Hindi/Gujarati
+-- and English terms are all indexed as written) plus unaccent, kept
+-- in a generated tsvector column with a GIN index.
+
+create extension if not exists unaccent;
+
+do $$
+begin
+    if not exists (select 1 from pg_ts_config where cfgname = 'farm_search') then
+        create text search configuration farm_search (copy = simple);
+        alter text search configuration farm_search
+            alter mapping for hword, hword_part, word with unaccent, simple;
+    end if;
+end;
+$$;
+
+alter table job_listings
+    add column if not exists search_vector tsvector
+        generated always as (
+            setweight(to_tsvector('farm_search', coalesce(job_title, '')), 'A')
+            || setweight(to_tsvector('farm_search', coalesce(job_type, '')), 'A')
+            || setweight(to_tsvector('farm_search', coalesce(job_description, '')), 'B')
+            || setweight(to_tsvector('farm_search', coalesce(additional_benefits, '')), 'C')
+        ) stored;
+
+create index if not exists job_listings_search_gin
+    on job_listings using gin (search_vector);
+
+
+-- Ranked, keyset-paginated on (rank, job_id). rank is rounded to a
+-- numeric so the cursor round-trips through JSON exactly.
+create or replace function search_jobs(p_query text, p_limit integer default 20,
+                                       p_after_rank numeric default null, p_after_job_id bigint default null)
+returns setof jsonb
+language sql
+stable
+as $$
+    with q as (
+        select websearch_to_tsquery('farm_search', p_query) as query
+    ),
+    hits as (
+        select j.job_id, job_card(j) as card, round(ts_rank_cd(j.search_vector, q.query)::numeric, 6) as rank
+        from job_listings j, q
+        where j.search_vector @@ q.query
+          and j.job_status = 'open'
+    )
+    select h.card || jsonb_build_object('rank', h.rank)
+    from hits h
+    where p_after_rank is null
+       or (h.rank, h.job_id) < (p_after_rank, p_after_job_id)
+    order by h.rank desc, h.job_id desc
+    limit p_limit;
+$$;
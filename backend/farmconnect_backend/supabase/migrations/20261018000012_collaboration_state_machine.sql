@@ -0,0 +1,158 @@
+-- ==========================================================
+-- Collaboration state machine with compare-and-set
+-- ==========================================================
+--   Pending --accept--> Accepted --accept (other side)--> Active --complete--> Completed
+--   Pending/Accepted --reject--> Rejected
+-- Every transition is one conditional UPDATE: the WHERE clause holds
+-- the allowed source states (and optionally the version the caller
+-- last saw), the SET clause computes the next state from the row as
+-- it is when the lock is taken. Concurrent accepts from both sides
+-- therefore serialise on the row and the second one sees the first.
+
+alter table collaborations
+    add column if not exists version integer not null default 0;
+
+-- every change of state bumps the version, whichever path wrote it
+create or replace function bump_collaboration_version()
+returns trigger
+language plpgsql
+as $$
+begin
+    if (new.status, new.accepted_by_farmer, new.accepted_by_worker)
+       is distinct from (old.status, old.accepted_by_farmer, old.accepted_by_worker) then
+        new.version := old.version + 1;
+    end if;
+    return new;
+end;
+$$;
+
+drop trigger if exists collaborations_version on collaborations;
+create trigger collaborations_version
+    before update on collaborations
+    for each row execute function bump_collaboration_version();
+
+
+-- Set-based core: applies one transition to every listed collaboration
+-- that allows it and returns the updated rows (used directly by the
+-- bulk endpoint). Rows that don't match are simply not returned.
+create or replace function transition_collaborations(
+    p_collaboration_ids bigint[],
+    p_actor text,                          -- 'farmer' | 'worker'
+    p_action text,                         -- 'accept' | 'reject' | 'complete'
+    p_actor_id text default null,          -- when set, must own the collaboration
+    p_expected_version integer default null
+)
+returns setof collaborations
+language plpgsql
+as $$
+begin
+    if p_actor not in ('farmer', 'worker') or p_action not in ('accept', 'reject', 'complete') then
+        raise exception 'Invalid transition.' using errcode = '22023';
+    end if;
+
+    return query
+    with changed as (
+        update collaborations c
+        set accepted_by_farmer = c.accepted_by_farmer or (p_action = 'accept' and p_actor = 'farmer'),
+            accepted_by_worker = c.accepted_by_worker or (p_action = 'accept' and p_actor = 'worker'),
+            status = case p_action
+                when 'accept' then
+                    case when (p_actor = 'farmer' and c.accepted_by_worker)
+                           or (p_actor = 'worker' and c.accepted_by_farmer)
+                         then 'Active' else 'Accepted' end
+                when 'reject' then 'Rejected'
+                else 'Completed'
+            end,
+            started_at = case
+                when p_action = 'accept'
+                 and ((p_actor = 'farmer' and c.accepted_by_worker) or (p_actor = 'worker' and c.accepted_by_farmer))
+                then now() else c.started_at end,
+            ended_at = case when p_action in ('reject', 'complete') then now() else c.ended_at end
+        where c.collaboration_id = any(p_collaboration_ids)
+          and (p_expected_version is null or c.version = p_expected_version)
+          and (p_actor_id is null or p_actor_id = case p_actor when 'farmer' then c.farmer_id else c.worker_id end)
+          and case p_action
+                when 'accept' then c.status in ('Pending', 'Accepted')
+                               and not (case p_actor when 'farmer' then c.accepted_by_farmer else c.accepted_by_worker end)
+                when 'reject' then c.status in ('Pending', 'Accepted')
+                else c.status in ('Accepted', 'Active')
+              end
+        returning c.*
+    )
+    select * from changed;
+end;
+$$;
+
+
+-- Single transition; when nothing matched, says why.
+-- Errors: P0002 not found (404), 42501 not the caller's collaboration (403),
+-- 40001 version mismatch (409), 55000 transition not allowed (400).
+create or replace function transition_collaboration(
+    p_collaboration_id bigint,
+    p_actor text,
+    p_action text,
+    p_actor_id text default null,
+    p_expected_version integer default null
+)
+returns collaborations
+language plpgsql
+as $$
+declare
+    updated collaborations;
+    current collaborations;
+begin
+    select * into updated
+    from transition_collaborations(array[p_collaboration_id], p_actor, p_action, p_actor_id, p_expected_version);
+
+    if updated.collaboration_id is not null then
+        return updated;
+    end if;
+
+    select * into current from collaborations where collaboration_id = p_collaboration_id;
+    if not found then
+        raise exception 'Collaboration not found.' using errcode = 'P0002';
+    end if;
+    if p_actor_id is not null
+       and p_actor_id <> case p_actor when 'farmer' then current.farmer_id else current.worker_id end then
+        raise exception 'This collaboration belongs to another %.', p_actor using errcode = '42501';
+    end if;
+    if p_expected_version is not null and current.version <> p_expected_version then
+        raise exception 'Collaboration was changed (now % at version %). Reload and try again.',
+            current.status, current.version using errcode = '40001';
+    end if;
+    if p_action = 'accept' and current.status in ('Pending', 'Accepted')
+       and case p_actor when 'farmer' then current.accepted_by_farmer else current.accepted_by_worker end then
+        raise exception 'Already accepted; waiting for the other side.' using errcode = '55000';
+    end if;
+    raise exception 'Cannot % a collaboration that is %.', p_action, current.status using errcode = '55000';
+end;
+$$;
+
+
+-- realtime events carry the version too, so clients can compare-and-set from them
+create or replace function notify_collaboration_change()
+returns trigger
+language plpgsql
+as $$
+begin
+    perform pg_notify(
+        'collaboration_events',
+        json_build_object(
+            'type', case when tg_op = 'INSERT' then 'collaboration.insert' else 'collaboration.update' end,
+            'collaboration', json_build_object(
+                'collaboration_id', new.collaboration_id,
+                'farmer_id', new.farmer_id,
+                'worker_id', new.worker_id,
+                'job_id', new.job_id,
+                'status', new.status,
+                'accepted_by_farmer', new.accepted_by_farmer,
+                'accepted_by_worker', new.accepted_by_worker,
+                'started_at', new.started_at,
+                'ended_at', new.ended_at,
+                'version', new.version
+            )
+        )::text
+    );
+    return new;
+end;
+$$;
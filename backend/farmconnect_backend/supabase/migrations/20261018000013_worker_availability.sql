@@ -0,0 +1,177 @@
+-- ==========================================================
+-- Worker availability calendar
+-- ==========================================================
+-- Workers publish the date ranges they can work. Accepted/Active
+-- collaborations book the job's work period. "Who is free in this
+-- window near this job" is one query: GiST containment on
+-- availability, GiST overlap on bookings, bounding box on location.
+
+create extension if not exists btree_gist;
+
+-- when the work happens (optional; jobs without dates book nothing)
+alter table job_listings
+    add column if not exists work_start_date date,
+    add column if not exists work_end_date date;
+alter table job_listings
+    add column if not exists work_period daterange
+        generated always as (
+            case when work_start_date is not null and work_end_date is not null
+                 then daterange(work_start_date, work_end_date, '[]') end
+        ) stored;
+
+-- proximity results carry the work dates too
+create or replace function job_card(j job_listings)
+returns jsonb
+language sql
+stable
+as $$
+    select jsonb_build_object(
+        'job_id', j.job_id, 'farmer_id', j.farmer_id, 'job_type', j.job_type,
+        'job_title', j.job_title, 'land_area', j.land_area, 'workers_needed', j.workers_needed,
+        'job_duration', j.job_duration, 'payment_type', j.payment_type,
+        'salary_amount', j.salary_amount, 'urgency_level', j.urgency_level,
+        'required_skill_level', j.required_skill_level, 'physical_demands', j.physical_demands,
+        'working_hours_per_day', j.working_hours_per_day,
+        'accommodation_type', j.accommodation_type,
+        'transportation_facility', j.transportation_facility,
+        'additional_benefits', j.additional_benefits, 'state', j.state, 'city', j.city,
+        'job_description', j.job_description, 'full_address', j.full_address,
+        'contact_number', j.contact_number, 'email', j.email, 'created_at', j.created_at,
+        'job_image_thumbnails', j.job_image_thumbnails, 'accepted_workers', j.accepted_workers,
+        'job_status', j.job_status, 'latitude', j.latitude, 'longitude', j.longitude,
+        'work_start_date', j.work_start_date, 'work_end_date', j.work_end_date
+    );
+$$;
+
+
+create table if not exists worker_availability (
+    availability_id bigserial primary key,
+    worker_id text not null references worker_registration (id) on delete cascade,
+    period daterange not null,
+    created_at timestamptz not null default now(),
+    -- a worker's ranges never overlap (set_worker_availability merges them)
+    exclude using gist (worker_id with =, period with &&)
+);
+
+create index if not exists worker_availability_period_gist
+    on worker_availability using gist (period);
+
+
+create table if not exists worker_bookings (
+    collaboration_id bigint primary key references collaborations (collaboration_id) on delete cascade,
+    worker_id text not null,
+    job_id bigint not null,
+    period daterange not null
+);
+
+create index if not exists worker_bookings_worker_period_gist
+    on worker_bookings using gist (worker_id, period);
+
+
+-- keep bookings in step with collaboration status
+create or replace function sync_worker_booking()
+returns trigger
+language plpgsql
+as $$
+declare
+    job_period daterange;
+begin
+    if new.status in ('Accepted', 'Active') then
+        select work_period into job_period from job_listings where job_id = new.job_id;
+        if job_period is not null then
+            insert into worker_bookings (collaboration_id, worker_id, job_id, period)
+            values (new.collaboration_id, new.worker_id, new.job_id, job_period)
+            on conflict (collaboration_id) do update set period = excluded.period;
+            return null;
+        end if;
+    end if;
+    delete from worker_bookings where collaboration_id = new.collaboration_id;
+    return null;
+end;
+$$;
+
+drop trigger if exists collaborations_bookings on collaborations;
+create trigger collaborations_bookings
+    after insert or update of status on collaborations
+    for each row execute function sync_worker_booking();
+
+insert into worker_bookings (collaboration_id, worker_id, job_id, period)
+select c.collaboration_id, c.worker_id, c.job_id, j.work_period
+from collaborations c join job_listings j using (job_id)
+where c.status in ('Accepted', 'Active') and j.work_period is not null
+on conflict (collaboration_id) do nothing;
+
+
+-- Replace a worker's availability in one call; overlapping/adjacent
+-- ranges are merged. Dates are inclusive.
+create or replace function set_worker_availability(p_worker_id text, p_start_dates date[], p_end_dates date[])
+returns setof worker_availability
+language plpgsql
+as $$
+begin
+    if not exists (select 1 from worker_registration where id = p_worker_id) then
+        raise exception 'Worker not found.' using errcode = 'P0002';
+    end if;
+
+    delete from worker_availability where worker_id = p_worker_id;
+
+    return query
+    with inserted as (
+        insert into worker_availability (worker_id, period)
+        select p_worker_id, merged
+        from unnest((
+            select range_agg(daterange(s, e, '[]'))
+            from unnest(p_start_dates, p_end_dates) as t(s, e)
+        )) as merged
+        returning *
+    )
+    select * from inserted;
+end;
+$$;
+
+
+-- Workers free for the whole window (available and not booked), nearest
+-- to the job first when it has a location.
+create or replace function available_workers(p_job_id bigint, p_start date, p_end date,
+                                             p_radius_km double precision default null,
+                                             p_limit integer default 20)
+returns setof jsonb
+language sql
+stable
+as $$
+    with job as (
+        select latitude, longitude from job_listings where job_id = p_job_id
+    ),
+    win as (
+        select daterange(p_start, p_end, '[]') as period
+    )
+    select jsonb_build_object(
+        'id', w.id, 'name', w.name, 'city', w.city, 'state', w.state,
+        'job_expertise', w.job_expertise, 'skill_level', w.skill_level,
+        'expected_salary', w.expected_salary, 'salary_type', w.salary_type,
+        'profile_thumbnail', w.profile_thumbnail,
+        'rating_avg', w.rating_avg, 'rating_count', w.rating_count,
+        'available_from', lower(a.period), 'available_until', upper(a.period) - 1,
+        'distance_km', round(haversine_km(job.latitude, job.longitude, w.latitude, w.longitude)::numeric, 2)
+    )
+    from win
+    cross join job
+    join worker_availability a on a.period @> win.period
+    join worker_registration w on w.id = a.worker_id
+    where not exists (
+          select 1 from worker_bookings b
+          where b.worker_id = a.worker_id and b.period && win.period
+      )
+      and (
+          p_radius_km is null or job.latitude is null or (
+              w.latitude between job.latitude - p_radius_km / 111.045
+                             and job.latitude + p_radius_km / 111.045
+              and w.longitude between job.longitude - p_radius_km / (111.045 * greatest(cos(radians(job.latitude)), 0.01))
+                                  and job.longitude + p_radius_km / (111.045 * greatest(cos(radians(job.latitude)), 0.01))
+              and haversine_km(job.latitude, job.longitude, w.latitude, w.longitude) <= p_radius_km
+          )
+      )
+    order by haversine_km(job.latitude, job.longitude, w.latitude, w.longitude) nulls last,
+             w.rating_avg desc nulls last
+    limit p_limit;
+$$;
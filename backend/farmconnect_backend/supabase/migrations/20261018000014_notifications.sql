@@ -0,0 +1,83 @@
+-- ==========================================================
+-- Notifications with per-user unread counters
+-- ==========================================================
+-- The API queues notifications and writes them in batches. The unread
+-- badge is read from notification_counters, which the triggers below
+-- keep in step, so nothing ever counts rows in notifications.
+
+create table if not exists notifications (
+    notification_id bigserial primary key,
+    user_type text not null check (user_type in ('Farmer', 'Worker')),
+    user_id text not null,
+    kind text not null,
+    message text not null,
+    collaboration_id bigint references collaborations (collaboration_id) on delete set null,
+    is_read boolean not null default false,
+    created_at timestamptz not null default now()
+);
+
+-- inbox: newest first per user, keyset on notification_id
+create index if not exists notifications_user_idx
+    on notifications (user_type, user_id, notification_id desc);
+
+create index if not exists notifications_user_unread_idx
+    on notifications (user_type, user_id, notification_id)
+    where not is_read;
+
+create table if not exists notification_counters (
+    user_type text not null,
+    user_id text not null,
+    unread integer not null default 0,
+    primary key (user_type, user_id)
+);
+
+
+create or replace function count_unread_notifications()
+returns trigger
+language plpgsql
+as $$
+begin
+    if tg_op = 'INSERT' and not new.is_read then
+        insert into notification_counters (user_type, user_id, unread)
+        values (new.user_type, new.user_id, 1)
+        on conflict (user_type, user_id) do update set unread = notification_counters.unread + 1;
+    elsif tg_op = 'UPDATE' and new.is_read <> old.is_read then
+        update notification_counters
+        set unread = greatest(unread + case when new.is_read then -1 else 1 end, 0)
+        where user_type = new.user_type and user_id = new.user_id;
+    elsif tg_op = 'DELETE' and not old.is_read then
+        update notification_counters
+        set unread = greatest(unread - 1, 0)
+        where user_type = old.user_type and user_id = old.user_id;
+    end if;
+    return null;
+end;
+$$;
+
+drop trigger if exists notifications_unread_counter on notifications;
+create trigger notifications_unread_counter
+    after insert or delete or update of is_read on notifications
+    for each row execute function count_unread_notifications();
+
+
+-- Mark a user's notifications read (all, or up to p_up_to_id); returns the new unread count.
+create or replace function mark_notifications_read(p_user_type text, p_user_id text, p_up_to_id bigint default null)
+returns integer
+language plpgsql
+as $$
+declare
+    remaining integer;
+begin
+    update notifications
+    set is_read = true
+    where user_type = p_user_type
+      and user_id = p_user_id
+      and not is_read
+      and (p_up_to_id is null or notification_id <= p_up_to_id);
+
+    select unread into remaining
+    from notification_counters
+    where user_type = p_user_type and user_id = p_user_id;
+    return coalesce(remaining, 0);
+end;
+$$;
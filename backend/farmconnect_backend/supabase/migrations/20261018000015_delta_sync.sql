@@ -0,0 +1,316 @@
+-- ==========================================================
+-- Delta sync: change stamps and tombstones
+-- ==========================================================
+-- Every insert/update of a synced row stamps it with updated_at, a
+-- change_id from one shared sequence and the writing transaction's
+-- id (change_xid). Deletes leave a tombstone stamped the same way.
+--
+-- change_ids are taken at write time but transactions commit in any
+-- order, so "everything after change_id N" alone can skip a row whose
+-- transaction was still running at the last read. The sync cursor is
+-- therefore (change_id, xmin), where xmin is the oldest transaction
+-- still running when the last read's snapshot was taken. Any row
+-- written by a transaction at or after that xmin is sent again, so
+-- late commits are picked up on the next read (clients upsert by key,
+-- so a row sent twice is harmless).
+
+create sequence if not exists sync_change_seq;
+
+-- the defaults stamp existing rows once (no triggers fire for the backfill)
+alter table job_listings
+    add column if not exists updated_at timestamptz not null default now(),
+    add column if not exists change_id bigint not null default nextval('sync_change_seq'),
+    add column if not exists change_xid xid8 not null default pg_current_xact_id();
+alter table collaborations
+    add column if not exists updated_at timestamptz not null default now(),
+    add column if not exists change_id bigint not null default nextval('sync_change_seq'),
+    add column if not exists change_xid xid8 not null default pg_current_xact_id();
+alter table farmer_registration
+    add column if not exists updated_at timestamptz not null default now(),
+    add column if not exists change_id bigint not null default nextval('sync_change_seq'),
+    add column if not exists change_xid xid8 not null default pg_current_xact_id();
+alter table worker_registration
+    add column if not exists updated_at timestamptz not null default now(),
+    add column if not exists change_id bigint not null default nextval('sync_change_seq'),
+    add column if not exists change_xid xid8 not null default pg_current_xact_id();
+
+-- farmer: own jobs / collaborations; worker: the job feed and own collaborations
+create index if not exists job_listings_farmer_change_idx on job_listings (farmer_id, change_id);
+create index if not exists job_listings_change_idx on job_listings (change_id);
+create index if not exists collaborations_farmer_change_idx on collaborations (farmer_id, change_id);
+create index if not exists collaborations_worker_change_idx on collaborations (worker_id, change_id);
+
+-- rows from transactions that were still running at the previous read
+create index if not exists job_listings_change_xid_idx on job_listings (change_xid);
+create index if not exists collaborations_change_xid_idx on collaborations (change_xid);
+
+
+-- Trigger arguments: generated columns of the table. They are still
+-- NULL in NEW inside a BEFORE trigger, so they are left out of the
+-- "did anything change" comparison.
+create or replace function stamp_sync_change()
+returns trigger
+language plpgsql
+as $$
+declare
+    ignored text[] := array['updated_at', 'change_id', 'change_xid'] || tg_argv;
+begin
+    -- updates that change nothing keep their stamp
+    if tg_op = 'UPDATE' and to_jsonb(new) - ignored = to_jsonb(old) - ignored then
+        return new;
+    end if;
+    new.updated_at := now();
+    new.change_xid := pg_current_xact_id();
+    new.change_id := nextval('sync_change_seq');
+    return new;
+end;
+$$;
+
+drop trigger if exists stamp_sync_change on job_listings;
+create trigger stamp_sync_change
+    before insert or update on job_listings
+    for each row execute function stamp_sync_change('search_vector', 'work_period');
+
+drop trigger if exists stamp_sync_change on collaborations;
+create trigger stamp_sync_change
+    before insert or update on collaborations
+    for each row execute function stamp_sync_change();
+
+drop trigger if exists stamp_sync_change on farmer_registration;
+create trigger stamp_sync_change
+    before insert or update on farmer_registration
+    for each row execute function stamp_sync_change('rating_avg');
+
+drop trigger if exists stamp_sync_change on worker_registration;
+create trigger stamp_sync_change
+    before insert or update on worker_registration
+    for each row execute function stamp_sync_change('rating_avg');
+
+
+-- ==========================================================
+-- Tombstones
+-- ==========================================================
+create table if not exists sync_tombstones (
+    change_id bigint primary key default nextval('sync_change_seq'),
+    change_xid xid8 not null default pg_current_xact_id(),
+    table_name text not null,
+    row_id text not null,
+    farmer_id text,
+    worker_id text,
+    deleted_at timestamptz not null default now()
+);
+
+create index if not exists sync_tombstones_farmer_idx on sync_tombstones (farmer_id, change_id);
+create index if not exists sync_tombstones_worker_idx on sync_tombstones (worker_id, change_id);
+create index if not exists sync_tombstones_table_idx on sync_tombstones (table_name, change_id);
+create index if not exists sync_tombstones_change_xid_idx on sync_tombstones (change_xid);
+
+-- trigger arguments: key column, farmer column, worker column ('' if none)
+create or replace function record_sync_tombstone()
+returns trigger
+language plpgsql
+as $$
+declare
+    deleted jsonb := to_jsonb(old);
+begin
+    insert into sync_tombstones (table_name, row_id, farmer_id, worker_id)
+    values (
+        tg_table_name,
+        deleted ->> tg_argv[0],
+        deleted ->> nullif(tg_argv[1], ''),
+        deleted ->> nullif(tg_argv[2], '')
+    );
+    return old;
+end;
+$$;
+
+drop trigger if exists record_sync_tombstone on job_listings;
+create trigger record_sync_tombstone
+    after delete on job_listings
+    for each row execute function record_sync_tombstone('job_id', 'farmer_id', '');
+
+drop trigger if exists record_sync_tombstone on collaborations;
+create trigger record_sync_tombstone
+    after delete on collaborations
+    for each row execute function record_sync_tombstone('collaboration_id', 'farmer_id', 'worker_id');
+
+drop trigger if exists record_sync_tombstone on farmer_registration;
+create trigger record_sync_tombstone
+    after delete on farmer_registration
+    for each row execute function record_sync_tombstone('id', 'id', '');
+
+drop trigger if exists record_sync_tombstone on worker_registration;
+create trigger record_sync_tombstone
+    after delete on worker_registration
+    for each row execute function record_sync_tombstone('id', '', 'id');
+
+
+-- Tombstones are kept for a retention window. Cursors older than the
+-- newest purged tombstone can't be served as a delta; the API tells
+-- those clients to reload from scratch.
+create table if not exists sync_state (
+    id boolean primary key default true check (id),
+    purged_up_to bigint not null default 0
+);
+
+insert into sync_state (id) values (true) on conflict (id) do nothing;
+
+create or replace function purge_sync_tombstones(p_keep interval default interval '30 days')
+returns bigint
+language plpgsql
+as $$
+declare
+    purged bigint;
+begin
+    with removed as (
+        delete from sync_tombstones
+        where deleted_at < now() - p_keep
+        returning change_id
+    )
+    select max(change_id) into purged from removed;
+
+    if purged is not null then
+        update sync_state set purged_up_to = greatest(purged_up_to, purged);
+    end if;
+    return coalesce(purged, 0);
+end;
+$$;
+
+
+-- ==========================================================
+-- One read, one snapshot
+-- ==========================================================
+-- STABLE, so every statement below sees the snapshot of the call and
+-- the returned horizon (that snapshot's xmin) matches the rows read.
+-- Each section returns up to p_limit + 1 rows after p_since (the API
+-- cuts the page) plus the late rows: at or before p_since but written
+-- by a transaction at or after p_since_xmin. Without p_since it is a
+-- first load: the side's rows, or the open job feed for workers.
+create or replace function sync_changes(p_side text, p_user_id text, p_since bigint default null,
+                                        p_since_xmin xid8 default null, p_limit integer default 200)
+returns jsonb
+language plpgsql
+stable
+as $$
+declare
+    first_load boolean := p_since is null;
+    since bigint := coalesce(p_since, 0);
+    since_xmin xid8 := coalesce(p_since_xmin, '0'::xid8);
+    jobs jsonb;
+    collabs jsonb;
+    profile jsonb;
+    deleted jsonb := '[]'::jsonb;
+begin
+    if p_side not in ('farmer', 'worker') then
+        raise exception 'Invalid sync side.' using errcode = '22023';
+    end if;
+
+    select coalesce(jsonb_agg(
+               job_card(j) || jsonb_build_object('change_id', j.change_id, 'updated_at', j.updated_at)
+               order by j.change_id
+           ), '[]'::jsonb)
+    into jobs
+    from (
+        (select * from job_listings
+         where p_side = 'farmer' and farmer_id = p_user_id and change_id > since
+         order by change_id limit p_limit + 1)
+        union all
+        (select * from job_listings
+         where p_side = 'worker' and change_id > since and (not first_load or job_status = 'open')
+         order by change_id limit p_limit + 1)
+        union all
+        (select * from job_listings
+         where not first_load and change_id <= since and change_xid >= since_xmin
+           and (p_side = 'worker' or farmer_id = p_user_id))
+    ) j;
+
+    select coalesce(jsonb_agg(jsonb_build_object(
+               'collaboration_id', c.collaboration_id, 'farmer_id', c.farmer_id, 'worker_id', c.worker_id,
+               'job_id', c.job_id, 'status', c.status, 'accepted_by_farmer', c.accepted_by_farmer,
+               'accepted_by_worker', c.accepted_by_worker, 'requested_at', c.requested_at,
+               'version', c.version, 'change_id', c.change_id, 'updated_at', c.updated_at
+           ) order by c.change_id), '[]'::jsonb)
+    into collabs
+    from (
+        (select * from collaborations
+         where p_side = 'farmer' and farmer_id = p_user_id and change_id > since
+         order by change_id limit p_limit + 1)
+        union all
+        (select * from collaborations
+         where p_side = 'worker' and worker_id = p_user_id and change_id > since
+         order by change_id limit p_limit + 1)
+        union all
+        (select * from collaborations
+         where not first_load and change_id <= since and change_xid >= since_xmin
+           and p_user_id = case when p_side = 'farmer' then farmer_id else worker_id end)
+    ) c;
+
+    if p_side = 'farmer' then
+        select jsonb_build_object(
+                   'id', f.id, 'name', f.name, 'contact_number', f.contact_number, 'city', f.city,
+                   'state', f.state, 'full_address', f.full_address, 'created_at', f.created_at,
+                   'profile_picture', f.profile_picture, 'profile_thumbnail', f.profile_thumbnail,
+                   'rating_avg', f.rating_avg, 'rating_count', f.rating_count,
+                   'rating_histogram', f.rating_histogram,
+                   'change_id', f.change_id, 'updated_at', f.updated_at
+               )
+        into profile
+        from farmer_registration f
+        where f.id = p_user_id
+          and (f.change_id > since or (not first_load and f.change_xid >= since_xmin));
+    else
+        select jsonb_build_object(
+                   'id', w.id, 'name', w.name, 'contact_number', w.contact_number, 'city', w.city,
+                   'state', w.state, 'email', w.email, 'full_address', w.full_address,
+                   'job_expertise', w.job_expertise, 'skill_level', w.skill_level,
+                   'work_capacity', w.work_capacity, 'need_accommodation', w.need_accommodation,
+                   'expected_salary', w.expected_salary, 'salary_type', w.salary_type,
+                   'additional_benefits', w.additional_benefits,
+                   'availability_duration', w.availability_duration, 'created_at', w.created_at,
+                   'profile_picture', w.profile_picture, 'profile_thumbnail', w.profile_thumbnail,
+                   'latitude', w.latitude, 'longitude', w.longitude,
+                   'rating_avg', w.rating_avg, 'rating_count', w.rating_count,
+                   'rating_histogram', w.rating_histogram,
+                   'change_id', w.change_id, 'updated_at', w.updated_at
+               )
+        into profile
+        from worker_registration w
+        where w.id = p_user_id
+          and (w.change_id > since or (not first_load and w.change_xid >= since_xmin));
+    end if;
+
+    if not first_load then
+        select coalesce(jsonb_agg(jsonb_build_object(
+                   'change_id', t.change_id, 'table_name', t.table_name, 'row_id', t.row_id
+               ) order by t.change_id), '[]'::jsonb)
+        into deleted
+        from (
+            (select * from sync_tombstones
+             where p_side = 'farmer' and farmer_id = p_user_id and change_id > since
+             order by change_id limit p_limit + 1)
+            union
+            (select * from sync_tombstones
+             where p_side = 'worker' and worker_id = p_user_id and change_id > since
+             order by change_id limit p_limit + 1)
+            union
+            (select * from sync_tombstones
+             where p_side = 'worker' and table_name = 'job_listings' and change_id > since
+             order by change_id limit p_limit + 1)
+            union
+            (select * from sync_tombstones
+             where change_id <= since and change_xid >= since_xmin
+               and ((p_side = 'farmer' and farmer_id = p_user_id)
+                    or (p_side = 'worker' and (worker_id = p_user_id or table_name = 'job_listings'))))
+        ) t;
+    end if;
+
+    return jsonb_build_object(
+        'horizon', pg_snapshot_xmin(pg_current_snapshot())::text,
+        'purged_up_to', (select purged_up_to from sync_state),
+        'job_listings', jobs,
+        'collaborations', collabs,
+        'profile', profile,
+        'deleted', deleted
+    );
+end;
+$$;
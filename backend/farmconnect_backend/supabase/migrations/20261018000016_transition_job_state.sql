@@ -0,0 +1,116 @@
+-- ==========================================================
+-- Transitions return the job they changed
+-- ==========================================================
+-- accept/reject/complete move the job's accepted_workers and
+-- job_status (apply_collaboration_to_job trigger). The API keeps an
+-- in-process recommendation index of open jobs, so each changed
+-- collaboration now comes back with its job's card under "job" and
+-- the index is updated without a second read of job_listings.
+--
+-- The job is read in a second statement: a statement does not see
+-- what the AFTER triggers of its own UPDATE wrote.
+
+drop function if exists transition_collaboration(bigint, text, text, text, integer);
+drop function if exists transition_collaborations(bigint[], text, text, text, integer);
+
+create function transition_collaborations(
+    p_collaboration_ids bigint[],
+    p_actor text,                          -- 'farmer' | 'worker'
+    p_action text,                         -- 'accept' | 'reject' | 'complete'
+    p_actor_id text default null,          -- when set, must own the collaboration
+    p_expected_version integer default null
+)
+returns setof jsonb
+language plpgsql
+as $$
+declare
+    changed_ids bigint[];
+begin
+    if p_actor not in ('farmer', 'worker') or p_action not in ('accept', 'reject', 'complete') then
+        raise exception 'Invalid transition.' using errcode = '22023';
+    end if;
+
+    with changed as (
+        update collaborations c
+        set accepted_by_farmer = c.accepted_by_farmer or (p_action = 'accept' and p_actor = 'farmer'),
+            accepted_by_worker = c.accepted_by_worker or (p_action = 'accept' and p_actor = 'worker'),
+            status = case p_action
+                when 'accept' then
+                    case when (p_actor = 'farmer' and c.accepted_by_worker)
+                           or (p_actor = 'worker' and c.accepted_by_farmer)
+                         then 'Active' else 'Accepted' end
+                when 'reject' then 'Rejected'
+                else 'Completed'
+            end,
+            started_at = case
+                when p_action = 'accept'
+                 and ((p_actor = 'farmer' and c.accepted_by_worker) or (p_actor = 'worker' and c.accepted_by_farmer))
+                then now() else c.started_at end,
+            ended_at = case when p_action in ('reject', 'complete') then now() else c.ended_at end
+        where c.collaboration_id = any(p_collaboration_ids)
+          and (p_expected_version is null or c.version = p_expected_version)
+          and (p_actor_id is null or p_actor_id = case p_actor when 'farmer' then c.farmer_id else c.worker_id end)
+          and case p_action
+                when 'accept' then c.status in ('Pending', 'Accepted')
+                               and not (case p_actor when 'farmer' then c.accepted_by_farmer else c.accepted_by_worker end)
+                when 'reject' then c.status in ('Pending', 'Accepted')
+                else c.status in ('Accepted', 'Active')
+              end
+        returning c.collaboration_id
+    )
+    select array_agg(collaboration_id) into changed_ids from changed;
+
+    return query
+    select to_jsonb(c) || jsonb_build_object('job', job_card(j))
+    from collaborations c
+    left join job_listings j on j.job_id = c.job_id
+    where c.collaboration_id = any(changed_ids)
+    order by c.collaboration_id;
+end;
+$$;
+
+
+-- Single transition; when nothing matched, says why.
+-- Errors: P0002 not found (404), 42501 not the caller's collaboration (403),
+-- 40001 version mismatch (409), 55000 transition not allowed (400).
+create function transition_collaboration(
+    p_collaboration_id bigint,
+    p_actor text,
+    p_action text,
+    p_actor_id text default null,
+    p_expected_version integer default null
+)
+returns jsonb
+language plpgsql
+as $$
+declare
+    updated jsonb;
+    current collaborations;
+begin
+    select t.collaboration into updated
+    from transition_collaborations(array[p_collaboration_id], p_actor, p_action, p_actor_id, p_expected_version)
+        as t(collaboration);
+
+    if updated is not null then
+        return updated;
+    end if;
+
+    select * into current from collaborations where collaboration_id = p_collaboration_id;
+    if not found then
+        raise exception 'Collaboration not found.' using errcode = 'P0002';
+    end if;
+    if p_actor_id is not null
+       and p_actor_id <> case p_actor when 'farmer' then current.farmer_id else current.worker_id end then
+        raise exception 'This collaboration belongs to another %.', p_actor using errcode = '42501';
+    end if;
+    if p_expected_version is not null and current.version <> p_expected_version then
+        raise exception 'Collaboration was changed (now % at version %). Reload and try again.',
+            current.status, current.version using errcode = '40001';
+    end if;
+    if p_action = 'accept' and current.status in ('Pending', 'Accepted')
+       and case p_actor when 'farmer' then current.accepted_by_farmer else current.accepted_by_worker end then
+        raise exception 'Already accepted; waiting for the other side.' using errcode = '55000';
+    end if;
+    raise exception 'Cannot % a collaboration that is %.', p_action, current.status using errcode = '55000';
+end;
+$$;
@@ -0,0 +1,102 @@
+import os
+from typing import Optional
+
+import httpx
+from dotenv import load_dotenv
+from postgrest import AsyncPostgrestClient
+
+from instrumentation import EVENT_HOOKS
+
+# ==========================================================
+# 🔌 Shared async Supabase (PostgREST) client
+# ==========================================================
+# One client per process, opened/closed by the app lifespan and
+# shared by the farmer and worker routers. All requests go through
+# a single pooled httpx.AsyncClient (keep-alive + HTTP/2).
+
+load_dotenv()
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_KEY = os.getenv("SUPABASE_ANON_KEY")
+
+SUPABASE_MAX_CONNECTIONS = int(os.getenv("SUPABASE_MAX_CONNECTIONS", "100"))
+SUPABASE_MAX_KEEPALIVE = int(os.getenv("SUPABASE_MAX_KEEPALIVE", "20"))
+SUPABASE_KEEPALIVE_EXPIRY = float(os.getenv("SUPABASE_KEEPALIVE_EXPIRY", "30"))
+SUPABASE_TIMEOUT = float(os.getenv("SUPABASE_TIMEOUT", "10"))
+SUPABASE_CONNECT_TIMEOUT = float(os.getenv("SUPABASE_CONNECT_TIMEOUT", "5"))
+SUPABASE_HTTP2 = os.getenv("SUPABASE_HTTP2", "true").lower() == "true"
+
+# "postgrest" (default) or "memory" for the in-process stand-in (see memory_client.py)
+SUPABASE_BACKEND = os.getenv("SUPABASE_BACKEND", "postgrest")
+MEMORY_LATENCY_MS = float(os.getenv("MEMORY_LATENCY_MS", "0"))
+
+
+def _auth_headers() -> dict:
+    return {"apikey": SUPABASE_KEY, "Authorization": f"Bearer {SUPABASE_KEY}"}
+
+
+class PooledPostgrestClient(AsyncPostgrestClient):
+    """AsyncPostgrestClient whose session uses our pool limits and HTTP/2."""
+
+    def create_session(self, base_url, headers, timeout, *args, **kwargs) -> httpx.AsyncClient:
+        # Supabase is a single host, so the pool limits are per-host limits.
+        return httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            http2=SUPABASE_HTTP2,
+            limits=httpx.Limits(
+                max_connections=SUPABASE_MAX_CONNECTIONS,
+                max_keepalive_connections=SUPABASE_MAX_KEEPALIVE,
+                keepalive_expiry=SUPABASE_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(SUPABASE_TIMEOUT, connect=SUPABASE_CONNECT_TIMEOUT),
+            event_hooks=EVENT_HOOKS,  # round-trip counts/latency/bytes, see instrumentation.py
+        )
+
+
+_client: Optional[AsyncPostgrestClient] = None
+
+
+async def start_client():
+    """Open the shared client (called from the app lifespan)."""
+    global _client
+    if _client is None and SUPABASE_BACKEND == "memory":
+        from memory_client import MemoryPostgrestClient
+
+        _client = MemoryPostgrestClient(latency=MEMORY_LATENCY_MS / 1000)
+    elif _client is None:
+        _client = PooledPostgrestClient(
+            f"{SUPABASE_URL}/rest/v1",
+            headers=_auth_headers(),
+            schema="public",
+        )
+    return _client
+
+
+async def close_client():
+    """Close the shared client and its connection pool."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def set_client(client) -> None:
+    """Install a client (e.g. a MemoryPostgrestClient with seeded tables) before the app starts."""
+    global _client
+    _client = client
+
+
+def get_client() -> AsyncPostgrestClient:
+    if _client is None:
+        raise RuntimeError("Supabase client is not started. Run the app with its lifespan.")
+    return _client
+
+
+def get_http() -> httpx.AsyncClient:
+    """The pooled httpx session, for non-PostgREST Supabase APIs (e.g. Storage)."""
+    return get_client().session
+
+
+async def get_supabase() -> AsyncPostgrestClient:
+    """FastAPI dependency that hands the shared client to a handler."""
+    return get_client()
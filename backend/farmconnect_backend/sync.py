@@ -0,0 +1,90 @@
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from queries import call_rpc
+
+# ==========================================================
+# 🔄 Delta sync for the mobile apps
+# ==========================================================
+# Rows are stamped with a change_id from one shared sequence and the
+# id of the transaction that wrote them; deletes leave tombstones
+# (see delta_sync migration). A client keeps the last cursor it got
+# and asks only for what changed after it. With no cursor it gets a
+# full snapshot plus the cursor to continue from. A cursor older than
+# the tombstone retention gets reset=True, meaning "drop local data
+# and sync again without a cursor".
+#
+# The cursor is "<change_id>:<xmin>". change_id alone is not enough:
+# a transaction still running at read time may hold a lower change_id
+# than rows that were already returned. xmin (the oldest transaction
+# running at the last read) lets sync_changes send those rows again
+# once they commit, so a row can be sent twice but is never skipped.
+
+DEFAULT_SYNC_LIMIT = 200
+MAX_SYNC_LIMIT = 1000
+
+SECTIONS = ("job_listings", "collaborations", "profile", "deleted")
+
+
+def parse_cursor(cursor: Optional[str]) -> Tuple[Optional[int], Optional[str]]:
+    if not cursor:
+        return None, None
+    try:
+        change_id, xmin = cursor.split(":")
+        return int(change_id), str(int(xmin))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+
+def _trim(sections: Dict[str, List[dict]], since: int, limit: int) -> Tuple[Dict[str, List[dict]], Optional[int]]:
+    """
+    Cut every section at a common change_id so the cursor never skips rows:
+    any section with more than `limit` new rows bounds how far this page goes.
+    Late rows (at or before `since`) are always kept.
+    """
+    full = []
+    for rows in sections.values():
+        new = [r for r in rows if r["change_id"] > since]
+        if len(new) > limit:
+            full.append(new[limit - 1]["change_id"])
+    if not full:
+        return sections, None
+    bound = min(full)
+    return {name: [r for r in rows if r["change_id"] <= bound] for name, rows in sections.items()}, bound
+
+
+async def changes(client, side: str, user_id: str, cursor: Optional[str], limit: int) -> dict:
+    """
+    Rows of `side`'s jobs/collaborations/profile changed after `cursor`, plus
+    the ids deleted since then, read in one call (one snapshot). Returns the
+    `cursor` for the next call and `has_more` when the page was cut at `limit`.
+    """
+    since, since_xmin = parse_cursor(cursor)
+    data = await call_rpc(client, "sync_changes", {
+        "p_side": side,
+        "p_user_id": user_id,
+        "p_since": since,
+        "p_since_xmin": since_xmin,
+        "p_limit": limit,
+    })
+    if since is not None and since < data["purged_up_to"]:
+        return {"reset": True}
+
+    profile = data["profile"]
+    sections = {name: data[name] or [] for name in SECTIONS if name != "profile"}
+    sections["profile"] = [profile] if profile else []
+    sections, bound = _trim(sections, since or 0, limit)
+
+    newest = max((r["change_id"] for rows in sections.values() for r in rows), default=0)
+    next_change_id = bound if bound is not None else max(newest, since or 0)
+
+    return {
+        "reset": False,
+        "cursor": f"{next_change_id}:{data['horizon']}",
+        "has_more": bound is not None,
+        "job_listings": sections["job_listings"],
+        "collaborations": sections["collaborations"],
+        "profile": sections["profile"][0] if sections["profile"] else None,
+        "deleted": sections["deleted"],
+    }
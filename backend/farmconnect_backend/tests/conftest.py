@@ -0,0 +1,67 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# the backend modules are imported flat (e.g. `import storage`), as uvicorn runs them
+sys.path.insert(0, HERE)
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import supabase_client  # noqa: E402
+from memory_client import MemoryPostgrestClient  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def app():
+    # load app.py by path: `import app` would pick up the legacy app/ package
+    spec = importlib.util.spec_from_file_location("farmconnect_app", os.path.join(HERE, "app.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.app
+
+
+def seed_tables(n: int) -> dict:
+    """One farmer with `n` jobs and, per job, a sent request, an application and an active collaboration."""
+    workers = [{"id": f"w{i}", "name": f"Worker {i}", "city": "Pune", "state": "MH"} for i in range(3 * n)]
+    jobs = [
+        {"job_id": j + 1, "farmer_id": "f1", "job_title": f"Job {j}", "job_type": "harvesting",
+         "workers_needed": 5, "job_status": "open"}
+        for j in range(n)
+    ]
+    collaborations = []
+    for j in range(n):
+        for k, (status, by_farmer, by_worker) in enumerate(
+            [("Pending", True, False), ("Pending", False, True), ("Active", True, True)]
+        ):
+            collaborations.append({
+                "collaboration_id": len(collaborations) + 1, "farmer_id": "f1", "worker_id": f"w{3 * j + k}",
+                "job_id": j + 1, "status": status, "accepted_by_farmer": by_farmer, "accepted_by_worker": by_worker,
+                "requested_at": "2026-10-18T00:00:00", "started_at": "2026-10-18T00:00:00", "version": 0,
+            })
+    return {
+        "farmer_registration": [{"id": "f1", "name": "Farmer", "city": "Pune", "state": "MH"}],
+        "worker_registration": workers,
+        "job_listings": jobs,
+        "collaborations": collaborations,
+    }
+
+
+@pytest.fixture
+def make_api(app):
+    """make_api(client) -> TestClient running the app against that in-memory client."""
+    opened = []
+
+    def make(client: MemoryPostgrestClient) -> TestClient:
+        supabase_client.set_client(client)
+        api = TestClient(app)
+        api.__enter__()
+        opened.append(api)
+        return api
+
+    yield make
+    for api in opened:
+        api.__exit__(None, None, None)
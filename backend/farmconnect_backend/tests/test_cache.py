@@ -0,0 +1,31 @@
+import asyncio
+
+import cache
+from cache import ProfileCache, TTLCache
+from conftest import seed_tables
+from memory_client import MemoryPostgrestClient
+
+
+def test_invalidate_during_a_miss_is_not_undone(monkeypatch):
+    client = MemoryPostgrestClient(seed_tables(1))
+    profiles = ProfileCache(TTLCache())
+
+    async def slow_fetch_one(client, table, columns, filters):
+        row = dict(client.rows(table, **filters)[0])
+        await asyncio.sleep(0.05)  # the row is read, the response still on its way
+        return row
+
+    async def update_during_read():
+        await asyncio.sleep(0.01)
+        client.rows("worker_registration", id="w0")[0]["city"] = "Nashik"
+        await profiles.invalidate("worker", "w0")
+
+    async def scenario():
+        read, _ = await asyncio.gather(profiles.get_profile(client, "worker", "w0"), update_during_read())
+        return read, await profiles.get_profile(client, "worker", "w0")
+
+    monkeypatch.setattr(cache, "fetch_one", slow_fetch_one)
+    stale, fresh = asyncio.run(scenario())
+    assert stale["city"] == "Pune"  # read before the update: returned, but not stored
+    assert fresh["city"] == "Nashik"
+    assert profiles.misses == 2 and not profiles._reads
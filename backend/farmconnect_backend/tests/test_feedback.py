@@ -0,0 +1,25 @@
+from conftest import seed_tables
+from memory_client import MemoryPostgrestClient
+
+
+def completed_client() -> MemoryPostgrestClient:
+    tables = seed_tables(1)
+    tables["collaborations"][2]["status"] = "Completed"  # collaboration 3: f1 with w2
+    return MemoryPostgrestClient(tables)
+
+
+def test_worker_can_rate_farmer(make_api):
+    client = completed_client()
+    api = make_api(client)
+    body = {"collaboration_id": 3, "given_by": "Worker", "farmer_id": "f1", "worker_id": "w2", "rating": 4}
+
+    assert api.post("/worker/add_feedback", json=body).status_code == 200
+    assert [f["rating"] for f in client.rows("feedback", given_by="Worker")] == [4]
+
+
+def test_given_by_must_match_the_router(make_api):
+    api = make_api(completed_client())
+    body = {"collaboration_id": 3, "farmer_id": "f1", "worker_id": "w2", "rating": 4}
+
+    assert api.post("/farmer/add_feedback", json={**body, "given_by": "Worker"}).status_code == 400
+    assert api.post("/worker/add_feedback", json={**body, "given_by": "Farmer"}).status_code == 400
@@ -0,0 +1,56 @@
+import asyncio
+import time
+
+import geo
+from conftest import seed_tables
+from memory_client import MemoryPostgrestClient
+
+
+class FakeGeocoder:
+    def __init__(self):
+        self.queries = []
+
+    async def get(self, url, params):
+        self.queries.append(params["q"])
+        return self
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return [{"lat": "18.52", "lon": "73.85"}]
+
+
+def test_burst_skips_lookups_instead_of_queueing(monkeypatch):
+    fake = FakeGeocoder()
+    monkeypatch.setattr(geo, "_http", fake)
+    monkeypatch.setattr(geo, "_next_call_at", 0.0)
+    monkeypatch.setattr(geo, "GEOCODER_MIN_INTERVAL", 0.2)
+    monkeypatch.setattr(geo, "GEOCODER_MAX_WAIT", 0.3)
+
+    async def burst():
+        return await asyncio.gather(*(geo.geocode_address(f"Village {i}", "Pune") for i in range(6)))
+
+    started = time.monotonic()
+    points = asyncio.run(burst())
+
+    assert time.monotonic() - started < 1.0
+    # lookups one GEOCODER_MIN_INTERVAL apart until the wait passes GEOCODER_MAX_WAIT, the rest skipped
+    assert 2 <= len(fake.queries) < 6
+    assert points.count(None) == 6 - len(fake.queries)
+
+
+def test_unresolved_address_change_clears_the_old_location(make_api, monkeypatch):
+    tables = seed_tables(1)
+    tables["worker_registration"][0].update(latitude=18.52, longitude=73.85, geohash="tek1w2x")
+    client = MemoryPostgrestClient(tables)
+    api = make_api(client)
+
+    async def not_found(*address):
+        return None
+
+    monkeypatch.setattr(geo, "geocode_address", not_found)
+    assert api.put("/worker/update_profile/w0", json={"city": "Nowhere"}).status_code == 200
+
+    worker = client.rows("worker_registration", id="w0")[0]
+    assert (worker["latitude"], worker["longitude"], worker["geohash"]) == (None, None, None)
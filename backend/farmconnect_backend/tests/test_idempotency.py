@@ -0,0 +1,54 @@
+import pytest
+
+from conftest import seed_tables
+from instrumentation import round_trips
+from memory_client import MemoryPostgrestClient
+
+REQUEST = {"farmer_id": "f1", "worker_id": "w29", "job_id": 1}
+
+
+@pytest.fixture
+def client():
+    return MemoryPostgrestClient(seed_tables(10))
+
+
+def test_retry_replays_without_database_work(make_api, client):
+    api = make_api(client)
+    before = len(client.rows("collaborations", worker_id="w29"))
+    headers = {"Idempotency-Key": "retry-1"}
+    first = api.post("/farmer/send_request", json=REQUEST, headers=headers)
+    again = api.post("/farmer/send_request", json=REQUEST, headers=headers)
+
+    assert first.status_code == again.status_code == 200
+    assert again.json() == first.json()
+    assert again.headers["idempotent-replayed"] == "true"
+    assert round_trips(again) == 0
+    assert len(client.rows("collaborations", worker_id="w29")) == before + 1
+
+
+def test_key_is_scoped_to_the_caller_and_body(make_api, client):
+    api = make_api(client)
+    headers = {"Idempotency-Key": "shared"}
+    first = api.post("/worker/apply_for_job", json={"worker_id": "w28", "job_id": 1}, headers=headers)
+    assert first.status_code == 200
+
+    # same path and key from another caller runs normally and never sees the first response
+    other = api.post("/worker/apply_for_job", json={"worker_id": "w27", "job_id": 1}, headers=headers)
+    assert other.status_code == 200 and "idempotent-replayed" not in other.headers
+    assert len(client.rows("collaborations", job_id=1, worker_id="w27")) == 1
+
+    # same caller and key, different body
+    changed = api.post("/worker/apply_for_job", json={"worker_id": "w28", "job_id": 2}, headers=headers)
+    assert changed.status_code == 422
+
+
+def test_replay_keeps_cors_headers(make_api, client):
+    api = make_api(client)
+    headers = {"Idempotency-Key": "cors-1", "Origin": "https://app.example"}
+    first = api.post("/farmer/send_request", json=REQUEST, headers=headers)
+    again = api.post("/farmer/send_request", json=REQUEST, headers=headers)
+    conflict = api.post("/farmer/send_request", json={**REQUEST, "job_id": 2}, headers=headers)
+
+    assert again.headers["idempotent-replayed"] == "true"
+    for response in (first, again, conflict):
+        assert response.headers["access-control-allow-origin"] == "*"
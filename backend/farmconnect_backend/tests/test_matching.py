@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from conftest import seed_tables
+from matching import JobIndex, WorkerIndex, WEIGHTS
+from memory_client import MemoryPostgrestClient
+
+EXPERTISE = {
+    "w0": "harvesting, sowing",
+    "w1": "harvesting",
+    "w2": "irrigation",
+    "w3": "harvesting",
+    "w4": None,
+}
+JOB = {"job_type": "harvesting, sowing", "city": "Pune", "state": "MH"}
+
+
+def loaded(index, tables: dict):
+    asyncio.run(index.refresh_if_stale(MemoryPostgrestClient(tables)))
+    return index
+
+
+@pytest.fixture
+def workers() -> WorkerIndex:
+    tables = seed_tables(2)  # workers w0..w5, all in Pune
+    tables["worker_registration"] = [
+        {**w, "job_expertise": EXPERTISE.get(w["id"])} for w in tables["worker_registration"] if w["id"] in EXPERTISE
+    ]
+    return loaded(WorkerIndex(), tables)
+
+
+@pytest.fixture
+def jobs() -> JobIndex:
+    tables = seed_tables(3)
+    for job, job_type in zip(tables["job_listings"], ["harvesting", "harvesting, sowing", "irrigation"]):
+        job.update(job_type=job_type, city="Pune", state="MH")
+    return loaded(JobIndex(), tables)
+
+
+def ranked_ids(matches):
+    return [m["worker"]["id"] for m in matches]
+
+
+def test_expertise_is_the_share_of_job_terms_covered(workers):
+    matches = {m["worker"]["id"]: m for m in workers.rank(JOB)}
+
+    assert set(matches) == {"w0", "w1", "w3"}  # w2 and w4 share no term with the job
+    assert matches["w0"]["breakdown"]["expertise"] == 1.0
+    assert matches["w1"]["breakdown"]["expertise"] == 0.5
+    assert matches["w0"]["score"] - matches["w1"]["score"] == pytest.approx(0.5 * WEIGHTS["expertise"], abs=1e-4)
+
+
+def test_ties_keep_load_order(workers):
+    # w1 and w3 score the same; they come back in slot (load) order
+    assert ranked_ids(workers.rank(JOB)) == ["w0", "w1", "w3"]
+    assert ranked_ids(workers.rank(JOB, limit=2)) == ["w0", "w1"]
+
+
+def test_job_without_terms_matches_nobody(workers):
+    assert workers.rank({**JOB, "job_type": None}) == []
+    assert workers.rank({**JOB, "job_type": "pruning"}) == []
+
+
+def test_upsert_replaces_the_slot(workers):
+    slot = workers.slot_of["w2"]
+    workers.upsert({"id": "w2", "job_expertise": "sowing", "city": "Nashik"})
+
+    assert workers.slot_of["w2"] == slot and len(workers.cards) == len(EXPERTISE)
+    assert workers.cards[slot]["name"] == "Worker 2"  # columns not in the update are kept
+    assert ranked_ids(workers.rank({"job_type": "irrigation"})) == []
+    match = workers.rank({"job_type": "sowing", "city": "Pune", "state": "MH"})
+    assert ranked_ids(match) == ["w0", "w2"]
+    assert match[1]["breakdown"]["location"] == 0.5  # same state, other city now
+
+
+def test_recommend_ranks_jobs_by_covered_terms(jobs):
+    recommended = jobs.recommend({"job_expertise": "harvesting", "city": "Pune", "state": "MH"})
+
+    assert [j["job_id"] for j in recommended] == [1, 2]
+    assert [j["breakdown"]["expertise"] for j in recommended] == [1.0, 0.5]
+
+
+def test_recommend_without_expertise_ranks_every_open_job(jobs):
+    recommended = jobs.recommend({"job_expertise": "", "city": "Pune", "state": "MH"})
+
+    assert [j["job_id"] for j in recommended] == [1, 2, 3]  # equal scores, slot order
+    assert {j["breakdown"]["expertise"] for j in recommended} == {0.0}
+
+
+def test_remove_and_add_jobs(jobs):
+    worker = {"job_expertise": "harvesting"}
+    jobs.remove(1)
+    assert [j["job_id"] for j in jobs.recommend(worker)] == [2]
+
+    jobs.add({"job_id": 4, "job_type": "harvesting", "job_status": "open"})
+    jobs.add({"job_id": 2, "job_type": "harvesting", "job_status": "filled"})  # no longer open: dropped
+    assert [j["job_id"] for j in jobs.recommend(worker)] == [4]
+    assert 2 not in jobs.slot_of
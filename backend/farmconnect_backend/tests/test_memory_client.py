@@ -0,0 +1,109 @@
+import pytest
+
+from conftest import seed_tables
+from memory_client import MemoryPostgrestClient
+
+COLLABORATION_LISTS = [
+    "/farmer/sent_requests/f1",
+    "/farmer/received_requests/f1",
+    "/farmer/active_collaborations/f1",
+]
+
+
+class CountingLatency:
+    """Latency hook that records every round trip the fake sees."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, operation: str, name: str) -> float:
+        self.calls.append((operation, name))
+        return 0.0
+
+
+def round_trips_for(make_api, path: str, n: int) -> list:
+    latency = CountingLatency()
+    api = make_api(MemoryPostgrestClient(seed_tables(n), latency=latency))
+    latency.calls.clear()  # ignore anything done at startup
+    response = api.get(path)
+    assert response.status_code == 200
+    assert len(next(iter(response.json().values()))) == n
+    return latency.calls
+
+
+@pytest.mark.parametrize("path", COLLABORATION_LISTS)
+def test_collaboration_lists_do_not_scale_round_trips_with_rows(make_api, path):
+    # one collaborations query + one batched profile lookup + one batched job lookup
+    calls = round_trips_for(make_api, path, 25)
+    assert len(calls) == 3
+    assert calls == round_trips_for(make_api, path, 1)
+
+
+def test_bulk_send_request_runs_on_the_fake(make_api):
+    api = make_api(MemoryPostgrestClient(seed_tables(2)))
+    response = api.post(
+        "/farmer/bulk_send_request",
+        json={"farmer_id": "f1", "job_id": 1, "worker_ids": ["w0", "w3", "w3", "nobody"]},
+    )
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [(r["worker_id"], r["success"], r.get("status_code")) for r in results] == [
+        ("w0", False, 400), ("w3", True, None), ("nobody", False, 404),
+    ]
+
+
+def test_unknown_function_is_501(make_api):
+    client = MemoryPostgrestClient(seed_tables(1))
+    del client.rpc_handlers["available_workers"]
+    api = make_api(client)
+    response = api.get("/farmer/jobs/1/available_workers", params={"start_date": "2026-11-01", "end_date": "2026-11-05"})
+    assert response.status_code == 501
+
+
+def test_duplicate_feedback_is_rejected(make_api):
+    tables = seed_tables(1)
+    tables["collaborations"][2]["status"] = "Completed"
+    api = make_api(MemoryPostgrestClient(tables))
+    body = {"collaboration_id": 3, "given_by": "Farmer", "farmer_id": "f1", "worker_id": "w2", "rating": 5}
+    assert api.post("/farmer/add_feedback", json=body).status_code == 200
+    assert api.post("/farmer/add_feedback", json=body).status_code == 400
+
+
+def test_transitions_update_job_fill_state(make_api):
+    tables = seed_tables(1)
+    tables["job_listings"][0].update(workers_needed=3, accepted_workers=1)  # the seeded Active collaboration
+    client = MemoryPostgrestClient(tables)
+    api = make_api(client)
+
+    # the worker accepts the farmer's request, then the farmer accepts the application
+    api.put("/worker/update_request_status", json={"collaboration_id": 1, "status": "Accepted", "version": 0})
+    job = client.rows("job_listings", job_id=1)[0]
+    assert (job["accepted_workers"], job["job_status"]) == (2, "open")
+
+    api.put("/farmer/update_request_status", json={"collaboration_id": 2, "status": "Accepted", "version": 0})
+    job = client.rows("job_listings", job_id=1)[0]
+    assert (job["accepted_workers"], job["job_status"]) == (3, "filled")
+
+
+def test_availability_runs_on_the_fake(make_api):
+    tables = seed_tables(1)
+    tables["job_listings"][0].update(work_start_date="2026-11-02", work_end_date="2026-11-04")
+    api = make_api(MemoryPostgrestClient(tables))
+    ranges = {"ranges": [{"start_date": "2026-11-01", "end_date": "2026-11-03"},
+                         {"start_date": "2026-11-04", "end_date": "2026-11-10"}]}
+    for worker in ("w0", "w1"):
+        saved = api.put(f"/worker/availability/{worker}", json=ranges).json()["availability"]
+        assert [r["period"] for r in saved] == ["[2026-11-01,2026-11-11)"]  # adjacent ranges merged
+
+    # accepting w0's request books it on the job's dates
+    api.put("/worker/update_request_status", json={"collaboration_id": 1, "status": "Accepted", "version": 0})
+    free = api.get("/farmer/jobs/1/available_workers").json()["workers"]
+    assert [w["id"] for w in free] == ["w1"]
+
+
+def test_search_jobs_runs_on_the_fake(make_api):
+    api = make_api(MemoryPostgrestClient(seed_tables(3)))
+    first = api.get("/worker/search_jobs", params={"q": "job", "limit": 2}).json()
+    assert len(first["jobs"]) == 2 and first["next_cursor"]
+    rest = api.get("/worker/search_jobs", params={"q": "job", "limit": 2, "cursor": first["next_cursor"]}).json()
+    assert {j["job_id"] for j in first["jobs"] + rest["jobs"]} == {1, 2, 3}
@@ -0,0 +1,33 @@
+import asyncio
+
+from conftest import seed_tables
+from memory_client import MemoryPostgrestClient
+from notifications import notification_queue
+
+
+def test_unread_count_follows_inserts_and_mark_read(make_api):
+    client = MemoryPostgrestClient(seed_tables(1))
+    api = make_api(client)
+    for _ in range(3):
+        notification_queue.push("worker", "w0", "test", "hello")
+    asyncio.run(notification_queue.flush())
+
+    inbox = api.get("/worker/notifications/w0").json()
+    assert inbox["unread_count"] == 3
+    first = min(n["notification_id"] for n in inbox["notifications"])
+
+    assert api.put(f"/worker/notifications/w0/read?up_to={first}").json() == {"unread_count": 2}
+    assert api.get("/worker/dashboard/w0").json()["unread_notifications"] == 2
+    assert api.put("/worker/notifications/w0/read").json() == {"unread_count": 0}
+
+
+def test_dashboards_return_the_same_notification_fields(make_api):
+    api = make_api(MemoryPostgrestClient(seed_tables(1)))
+    notification_queue.push("farmer", "f1", "collaboration.accepted", "accepted", collaboration_id=1)
+    notification_queue.push("worker", "w0", "collaboration.accepted", "accepted", collaboration_id=1)
+    asyncio.run(notification_queue.flush())
+
+    farmer = api.get("/farmer/dashboard/f1").json()["notifications"]
+    worker = api.get("/worker/dashboard/w0").json()["notifications"]
+    assert farmer[0]["kind"] == "collaboration.accepted" and farmer[0]["collaboration_id"] == 1
+    assert set(farmer[0]) == set(worker[0])
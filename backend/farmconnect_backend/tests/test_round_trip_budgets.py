@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from conftest import seed_tables
+from instrumentation import round_trips
+from matching import job_index
+from memory_client import MemoryPostgrestClient
+
+# Maximum Supabase round trips per endpoint, read back from its Server-Timing header
+BUDGETS = [
+    ("get", "/farmer/sent_requests/f1", 3),
+    ("get", "/farmer/received_requests/f1", 3),
+    ("get", "/farmer/active_collaborations/f1", 3),
+    ("get", "/worker/sent_requests/w1", 3),
+    ("get", "/worker/active_collaborations/w2", 3),
+    ("get", "/farmer/dashboard/f1", 4),
+    ("get", "/worker/dashboard/w0", 4),
+    ("get", "/farmer/jobs/f1", 1),
+]
+
+
+@pytest.fixture
+def client():
+    return MemoryPostgrestClient(seed_tables(10))
+
+
+@pytest.fixture
+def api(make_api, client):
+    return make_api(client)
+
+
+@pytest.fixture
+def loaded_job_index(client):
+    """The recommendation index loaded from `client`, as after the first /find_work."""
+    asyncio.run(job_index.refresh_if_stale(client))
+    yield job_index
+    job_index._reset()
+    job_index.loaded_at = 0.0
+
+
+@pytest.mark.parametrize("method, path, budget", BUDGETS)
+def test_round_trip_budget(api, method, path, budget):
+    response = getattr(api, method)(path)
+    assert response.status_code == 200
+    assert 0 < round_trips(response) <= budget
+
+
+def test_send_request_is_one_round_trip(api):
+    response = api.post("/farmer/send_request", json={"farmer_id": "f1", "worker_id": "w29", "job_id": 1})
+    assert response.status_code == 200
+    assert round_trips(response) == 1
+
+
+def test_apply_for_job_is_one_round_trip(api):
+    response = api.post("/worker/apply_for_job", json={"farmer_id": "f1", "worker_id": "w29", "job_id": 2})
+    assert response.status_code == 200
+    assert round_trips(response) == 1
+
+
+def test_transition_is_one_round_trip(api):
+    # collaboration 1 is a request the farmer sent to w0
+    response = api.put("/worker/update_request_status", json={"collaboration_id": 1, "status": "Accepted", "version": 0})
+    assert response.status_code == 200
+    assert round_trips(response) == 1
+
+
+def test_transition_with_loaded_index_is_one_round_trip(api, client, loaded_job_index):
+    client.rows("job_listings", job_id=1)[0].update(workers_needed=2, accepted_workers=1)  # one more hire fills it
+    assert 1 in loaded_job_index.slot_of
+
+    response = api.put("/worker/update_request_status", json={"collaboration_id": 1, "status": "Accepted", "version": 0})
+    assert response.status_code == 200
+    assert round_trips(response) == 1
+    assert 1 not in loaded_job_index.slot_of  # filled: dropped from the index without reading job_listings
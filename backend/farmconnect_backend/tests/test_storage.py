@@ -0,0 +1,26 @@
+import base64
+from io import BytesIO
+
+from PIL import Image
+
+from storage import is_stored_url, decode_image
+
+
+def _jpeg_base64() -> str:
+    out = BytesIO()
+    Image.new("RGB", (4, 4), "green").save(out, format="JPEG")
+    return base64.b64encode(out.getvalue()).decode()
+
+
+def test_raw_base64_jpeg_is_not_a_stored_url():
+    raw = _jpeg_base64()
+    assert raw.startswith("/9j/")
+    assert not is_stored_url(raw)
+    assert decode_image(raw)[1] == "image/jpeg"
+
+
+def test_stored_urls():
+    assert is_stored_url("https://x.supabase.co/storage/v1/object/public/images/a.jpg")
+    assert is_stored_url("http://localhost/a.jpg")
+    assert is_stored_url("/media/farmers/1/a.jpg")
+    assert not is_stored_url("data:image/png;base64,iVBORw0KGgo=")
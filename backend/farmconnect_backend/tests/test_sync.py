@@ -0,0 +1,42 @@
+from conftest import seed_tables
+from memory_client import MemoryPostgrestClient
+
+
+def sync_all(api, path, cursor=None, limit=200):
+    """Follow has_more pages; returns (rows by section, final cursor)."""
+    seen = {"job_listings": {}, "collaborations": {}, "deleted": []}
+    while True:
+        params = {"limit": limit, **({"since": cursor} if cursor else {})}
+        page = api.get(path, params=params).json()
+        assert page["reset"] is False
+        seen["job_listings"].update({j["job_id"]: j for j in page["job_listings"]})
+        seen["collaborations"].update({c["collaboration_id"]: c for c in page["collaborations"]})
+        seen["deleted"] += page["deleted"]
+        cursor = page["cursor"]
+        if not page["has_more"]:
+            return seen, cursor
+
+
+def test_farmer_delta_has_only_changed_and_deleted_rows(make_api):
+    api = make_api(MemoryPostgrestClient(seed_tables(5)))
+    full, cursor = sync_all(api, "/farmer/sync/f1", limit=4)
+    assert sorted(full["job_listings"]) == [1, 2, 3, 4, 5]
+    assert len(full["collaborations"]) == 15
+
+    nothing, same = sync_all(api, "/farmer/sync/f1", cursor)
+    assert nothing == {"job_listings": {}, "collaborations": {}, "deleted": []}
+    assert same == cursor
+
+    assert api.put("/farmer/close_job/2").status_code == 200
+    assert api.delete("/farmer/delete_job/3").status_code == 200
+    delta, _ = sync_all(api, "/farmer/sync/f1", cursor)
+    assert list(delta["job_listings"]) == [2]
+    assert delta["job_listings"][2]["job_status"] == "closed"
+    assert [(d["table_name"], d["row_id"]) for d in delta["deleted"]] == [("job_listings", "3")]
+
+
+def test_stale_cursor_is_reset(make_api):
+    client = MemoryPostgrestClient({**seed_tables(1), "sync_state": [{"id": True, "purged_up_to": 100}]})
+    api = make_api(client)
+    assert api.get("/worker/sync/w0", params={"since": "5:0"}).json() == {"reset": True}
+    assert api.get("/worker/sync/w0", params={"since": "nope"}).status_code == 400
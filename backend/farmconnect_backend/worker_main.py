@@ -1,25 +1,34 @@
-from fastapi import APIRouter, HTTPException
+import asyncio
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
+from typing import Optional
 from models import WorkerRegistration, Collaboration, FeedbackModel
-from supabase import create_client, Client
-from dotenv import load_dotenv
 from datetime import datetime
-import os
-from schema import WorkerUpdate, UpdateRequestStatus
-
+from schema import WorkerUpdate, UpdateRequestStatus, JobFilter, WorkerAvailability
+from enrichment import fetch_collaboration_details
+from pagination import apply_eq_filters, paginate, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from queries import (
+    exists, fetch_one, call_rpc, execute_unique, JOB_LIST_COLUMNS,
+    SENT_REQUEST_COLUMNS, RECEIVED_REQUEST_COLUMNS, ACTIVE_COLLABORATION_COLUMNS
+)
+from storage import store_profile_picture
+from geo import locate, ADDRESS_FIELDS, NEARBY_DEFAULT_RADIUS_KM, NEARBY_MAX_RADIUS_KM
+from supabase_client import get_supabase
+from cache import profile_cache
+from matching import worker_index, job_index
+from realtime import collaboration_changed, event_stream
+from notifications import notify_collaboration, notify_feedback, inbox, mark_read, DASHBOARD_NOTIFICATIONS
+from sync import changes, DEFAULT_SYNC_LIMIT, MAX_SYNC_LIMIT
+from repository import update_profile, transition_collaboration, complete_collaboration, STATUS_ACTIONS
+
+# the shared async Supabase client is injected per request, see supabase_client.py
 router = APIRouter()
 
-# Load environment variables
-load_dotenv()
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_ANON_KEY")
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-
 
 # -------------------- WORKER REGISTRATION --------------------
 @router.post("/register")
-def register_worker(data: WorkerRegistration):
-    existing = supabase.table("worker_registration").select("*").eq("email", data.email).execute()
-    if existing.data:
+async def register_worker(data: WorkerRegistration, supabase=Depends(get_supabase)):
+    if await exists(supabase, "worker_registration", {"email": data.email}):
         raise HTTPException(status_code=400, detail="Email already registered. Please go to login instead.")
 
     
@@ -28,74 +37,200 @@ def register_worker(data: WorkerRegistration):
     if data_dict.get("created_at"):
         data_dict["created_at"] = data_dict["created_at"].isoformat()
 
-    result = supabase.table("worker_registration").insert(data_dict).execute()
+    try:
+        # picture upload and geocoding touch different keys, so run them together
+        await asyncio.gather(
+            store_profile_picture(data_dict, f"workers/{data.id}"),
+            locate(data_dict),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    result = await supabase.table("worker_registration").insert(data_dict).execute()
+    await profile_cache.invalidate("worker", data.id)
+    worker_index.upsert(result.data[0] if result.data else None)
     return {"message": "Worker registered successfully", "data": result.data}
 
 
 # -------------------- SAVE (UPDATE) PROFILE --------------------
 @router.put("/update_profile/{id}")
-def save_worker_profile(id: str, updates: WorkerUpdate):
-    existing = supabase.table("worker_registration").select("*").eq("id", id).execute()
-    if not existing.data:
-        raise HTTPException(status_code=404, detail="Worker not found. Please register first.")
-
+async def save_worker_profile(id: str, updates: WorkerUpdate, supabase=Depends(get_supabase)):
     update_data = updates.dict(exclude_unset=True)
-    supabase.table("worker_registration").update(update_data).eq("id", id).execute()
 
-    updated = supabase.table("worker_registration").select("*").eq("id", id).execute()
+    try:
+        update_data = await store_profile_picture(update_data, f"workers/{id}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # re-geocode only when the address changes
+    if any(field in update_data for field in ADDRESS_FIELDS):
+        current = await profile_cache.get_profile(supabase, "worker", id)
+        await locate(update_data, current)
 
-    return {"message": "Worker profile updated successfully.", "updated_profile": updated.data[0]}
+    # single UPDATE ... RETURNING; None means there is no such worker
+    updated = await update_profile(supabase, "worker_registration", id, update_data)
+    if not updated:
+        raise HTTPException(status_code=404, detail="Worker not found. Please register first.")
+
+    await profile_cache.invalidate("worker", id)
+    worker_index.upsert(updated)
+    return {"message": "Worker profile updated successfully.", "updated_profile": updated}
  
 @router.get("/profile/{id}")
-def get_worker_profile(id: str):    
-    worker = supabase.table("worker_registration").select("*").eq("id", id).execute()
-    if not worker.data:
+async def get_worker_profile(id: str, supabase=Depends(get_supabase)):
+    # Served from the profile cache; Supabase is only hit on a miss
+    worker = await profile_cache.get_profile(supabase, "worker", id)
+    if not worker:
         raise HTTPException(status_code=404, detail="Worker not found.")
-    return worker.data[0]
+    return worker
 
 
 # -------------------- FIND AVAILABLE JOBS --------------------
 @router.get("/find_work")
-def find_work():
-    """Show all jobs posted by farmers."""
-    jobs = supabase.table("job_listings").select("*").execute()
-    if not jobs.data:
-        return {"jobs": []}
-    return {"jobs": jobs.data} 
+async def find_work(
+    filters: JobFilter = Depends(),
+    cursor: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    recommended: bool = False,
+    worker_id: Optional[str] = None,
+    supabase=Depends(get_supabase),
+):
+    """
+    Show jobs posted by farmers, newest first, one page at a time.
+    Pass the returned `next_cursor` as `cursor` to get the next page.
+
+    With `recommended=true&worker_id=...` returns a single page of the
+    jobs that best fit the worker's profile instead (see matching.JobIndex).
+    """
+    if recommended:
+        if not worker_id:
+            raise HTTPException(status_code=400, detail="worker_id is required for recommendations.")
+
+        worker, _ = await asyncio.gather(
+            profile_cache.get_profile(supabase, "worker", worker_id),
+            job_index.refresh_if_stale(supabase),
+        )
+        if not worker:
+            raise HTTPException(status_code=404, detail="Worker not found.")
+
+        return {"jobs": job_index.recommend(worker, limit), "next_cursor": None}
+
+    # only open jobs (partial indexes, see job_fill_state migration)
+    query = supabase.table("job_listings").select(JOB_LIST_COLUMNS).eq("job_status", "open")
+    query = apply_eq_filters(query, {
+        "city": filters.city,
+        "state": filters.state,
+        "job_type": filters.job_type,
+        "required_skill_level": filters.skill_required,
+        "urgency_level": filters.urgency_level,
+    })
+
+    jobs, next_cursor = await paginate(query, "job_id", cursor, limit)
+    return {"jobs": jobs, "next_cursor": next_cursor}
 
 
 # ==========================================================
-# 1️⃣ APPLY FOR JOB (Worker → Farmer)
+# 📅 AVAILABILITY CALENDAR
 # ==========================================================
-@router.post("/apply_for_job")
-def apply_for_job(data: Collaboration):
-    """Worker applies for a specific job."""
-    worker = supabase.table("worker_registration").select("*").eq("id", data.worker_id).execute()
-    if not worker.data:
-        raise HTTPException(status_code=404, detail="Worker not found.")
+@router.put("/availability/{worker_id}")
+async def set_availability(worker_id: str, data: WorkerAvailability, supabase=Depends(get_supabase)):
+    """Replace the worker's available date ranges (inclusive; overlapping ranges are merged)."""
+    for r in data.ranges:
+        if r.end_date < r.start_date:
+            raise HTTPException(status_code=400, detail="end_date must be on or after start_date.")
+
+    ranges = await call_rpc(supabase, "set_worker_availability", {
+        "p_worker_id": worker_id,
+        "p_start_dates": [r.start_date.isoformat() for r in data.ranges],
+        "p_end_dates": [r.end_date.isoformat() for r in data.ranges],
+    })
+    return {"message": "Availability updated.", "availability": ranges}
+
+
+@router.get("/availability/{worker_id}")
+async def get_availability(worker_id: str, supabase=Depends(get_supabase)):
+    """Available ranges plus the periods already booked by accepted/active collaborations."""
+    available, booked = await asyncio.gather(
+        supabase.table("worker_availability").select("period").eq("worker_id", worker_id).order("period").execute(),
+        supabase.table("worker_bookings").select("collaboration_id, job_id, period").eq("worker_id", worker_id).execute(),
+    )
+    return {"worker_id": worker_id, "availability": available.data, "booked": booked.data}
 
-    job = supabase.table("job_listings").select("*").eq("job_id", data.job_id).execute()
-    if not job.data:
-        raise HTTPException(status_code=404, detail="Job not found.")
 
-    farmer_id = job.data[0]["farmer_id"]
+# ==========================================================
+# 🔎 KEYWORD SEARCH OVER JOBS
+# ==========================================================
+@router.get("/search_jobs")
+async def search_jobs(
+    q: str = Query(..., min_length=1, max_length=200),
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    supabase=Depends(get_supabase),
+):
+    """
+    Open jobs matching the keywords in `q` (title, type, description,
+    benefits), most relevant first. Supports "quoted phrases", OR and -word.
+    Pass the returned `next_cursor` as `cursor` to get the next page.
+    """
+    params = {"p_query": q, "p_limit": limit + 1}
+    if cursor:
+        try:
+            rank, job_id = cursor.split(":")
+            params["p_after_rank"], params["p_after_job_id"] = float(rank), int(job_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+    # one GIN-indexed query (see search_jobs in supabase/migrations)
+    jobs = await call_rpc(supabase, "search_jobs", params)
+    next_cursor = None
+    if len(jobs) > limit:
+        jobs = jobs[:limit]
+        next_cursor = f"{jobs[-1]['rank']}:{jobs[-1]['job_id']}"
+    return {"jobs": jobs, "next_cursor": next_cursor}
 
-    # Prevent duplicate application
-    existing = supabase.table("collaborations").select("*") \
-        .eq("worker_id", data.worker_id).eq("job_id", data.job_id).execute()
 
-    if existing.data:
-        raise HTTPException(status_code=400, detail="Already applied for this job.")
+# ==========================================================
+# 📍 JOBS NEAR A WORKER
+# ==========================================================
+@router.get("/jobs_nearby/{worker_id}")
+async def jobs_nearby(
+    worker_id: str,
+    radius_km: float = Query(NEARBY_DEFAULT_RADIUS_KM, gt=0, le=NEARBY_MAX_RADIUS_KM),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    supabase=Depends(get_supabase),
+):
+    """Open jobs within `radius_km` of the worker's geocoded address, nearest first."""
+    worker = await profile_cache.get_profile(supabase, "worker", worker_id)
+    if not worker:
+        raise HTTPException(status_code=404, detail="Worker not found.")
+    if worker.get("latitude") is None:
+        raise HTTPException(status_code=400, detail="Worker address could not be located. Please update your address.")
+
+    # bounding-box index scan + haversine in one query (see nearby_jobs)
+    jobs = await call_rpc(supabase, "nearby_jobs", {
+        "p_latitude": worker["latitude"],
+        "p_longitude": worker["longitude"],
+        "p_radius_km": radius_km,
+        "p_limit": limit,
+    })
+    return {"jobs": jobs, "radius_km": radius_km}
 
-    data_dict = data.dict()
-    data_dict.pop("collaboration_id", None)
-    data_dict["farmer_id"] = farmer_id
-    data_dict["status"] = "Pending"
-    data_dict["accepted_by_worker"] = True
-    data_dict["requested_at"] = datetime.now().isoformat()
 
-    result = supabase.table("collaborations").insert(data_dict).execute()
-    return {"message": "Job application sent to farmer.", "data": result.data}
+# ==========================================================
+# 1️⃣ APPLY FOR JOB (Worker → Farmer)
+# ==========================================================
+@router.post("/apply_for_job")
+async def apply_for_job(data: Collaboration, supabase=Depends(get_supabase)):
+    """Worker applies for a specific job."""
+    # Validation, duplicate check and insert happen in one database call
+    # (see apply_for_job in supabase/migrations)
+    collaboration = await call_rpc(supabase, "apply_for_job", {
+        "p_worker_id": data.worker_id,
+        "p_job_id": data.job_id,
+    })
+    collaboration_changed("collaboration.insert", collaboration)
+    notify_collaboration(collaboration, "worker")
+    return {"message": "Job application sent to farmer.", "data": [collaboration]}
 
 
 # ==========================================================
@@ -105,13 +240,13 @@ def apply_for_job(data: Collaboration):
 # 2️⃣ VIEW SENT APPLICATIONS (Worker)
 # ==========================================================
 @router.get("/sent_requests/{worker_id}")
-def view_sent_applications(worker_id: str):
+async def view_sent_applications(worker_id: str, supabase=Depends(get_supabase)):
     """View all job applications sent by this worker."""
 
     # Fetch only rows where worker has accepted
-    requests = (
+    requests = await (
         supabase.table("collaborations")
-        .select("*")
+        .select(SENT_REQUEST_COLUMNS)
         .eq("worker_id", worker_id)
         .eq("accepted_by_worker", True)
         .eq("accepted_by_farmer", False)
@@ -122,28 +257,18 @@ def view_sent_applications(worker_id: str):
     if not requests.data:
         return {"sent_requests": []}
 
+    farmers, jobs = await fetch_collaboration_details(
+        supabase, requests.data, "farmer", "name, city, state"
+    )
+
     enriched = []
     for req in requests.data:
-
-        farmer = (
-            supabase.table("farmer_registration")
-            .select("name, city, state")
-            .eq("id", req["farmer_id"])
-            .execute()
-        )
-
-        job = (
-            supabase.table("job_listings")
-            .select("job_title, job_description")
-            .eq("job_id", req["job_id"])
-            .execute()
-        )
-
         enriched.append({
             "collaboration_id": req["collaboration_id"],
-            "farmer_details": farmer.data[0] if farmer.data else {},
-            "job_details": job.data[0] if job.data else {},
+            "farmer_details": farmers.get(req["farmer_id"], {}),
+            "job_details": jobs.get(req["job_id"], {}),
             "status": req["status"],
+            "version": req.get("version"),
             "accepted_by_worker": req.get("accepted_by_worker", False),
             "accepted_by_farmer": req.get("accepted_by_farmer", False),
             "created_at": req["requested_at"],
@@ -153,13 +278,13 @@ def view_sent_applications(worker_id: str):
                
 
 @router.get("/received_requests/{worker_id}")
-def view_received_requests(worker_id: str):
+async def view_received_requests(worker_id: str, supabase=Depends(get_supabase)):
     """View all job requests received by this worker."""
 
     # Fetch only requests sent by farmers & not yet accepted by worker
-    requests = (
+    requests = await (
         supabase.table("collaborations")
-        .select("*")
+        .select(RECEIVED_REQUEST_COLUMNS)
         .eq("worker_id", worker_id)
         .eq("accepted_by_farmer", True)
         .eq("accepted_by_worker", False)
@@ -169,28 +294,18 @@ def view_received_requests(worker_id: str):
     if not requests.data:
         return {"received_requests": []}
 
+    farmers, jobs = await fetch_collaboration_details(
+        supabase, requests.data, "farmer", "name, city, state"
+    )
+
     enriched = []
     for req in requests.data:
-
-        farmer = (
-            supabase.table("farmer_registration")
-            .select("name, city, state")
-            .eq("id", req["farmer_id"])
-            .execute()
-        )
-
-        job = (
-            supabase.table("job_listings")
-            .select("job_title, job_description")
-            .eq("job_id", req["job_id"])
-            .execute()
-        )
-
         enriched.append({
             "collaboration_id": req["collaboration_id"],
-            "farmer_details": farmer.data[0] if farmer.data else {},
-            "job_details": job.data[0] if job.data else {},
+            "farmer_details": farmers.get(req["farmer_id"], {}),
+            "job_details": jobs.get(req["job_id"], {}),
             "status": req["status"],
+            "version": req.get("version"),
             "accepted_by_farmer": req.get("accepted_by_farmer", False),
             "accepted_by_worker": req.get("accepted_by_worker", False),
             "created_at": req["requested_at"],
@@ -200,35 +315,39 @@ def view_received_requests(worker_id: str):
 
 # -------------------- ACCEPT / REJECT REQUEST --------------------
 @router.put("/update_request_status")
-def update_request_status(data: UpdateRequestStatus):
+async def update_request_status(data: UpdateRequestStatus, supabase=Depends(get_supabase)):
     if data.status not in ["Accepted", "Rejected"]:
         raise HTTPException(status_code=400, detail="Invalid status.")
 
-    req = supabase.table("collaborations").select("*").eq("collaboration_id", data.collaboration_id).execute()
-    if not req.data:
-        raise HTTPException(status_code=404, detail="Collaboration not found.")
-
-    collaboration = req.data[0]
-    update_data = {"status": data.status}
-    if data.status == "Accepted":
-        update_data["accepted_by_worker"] = True
-        if collaboration["accepted_by_farmer"]:
-            update_data["status"] = "Active"
-            update_data["started_at"] = datetime.now().isoformat()
+    # One compare-and-set UPDATE; 404/400/409 come back from Postgres (see repository.py)
+    collaboration = await transition_collaboration(
+        supabase, data.collaboration_id, "worker", STATUS_ACTIONS[data.status], expected_version=data.version
+    )
 
-    elif data.status == "Rejected":
-        update_data["ended_at"] = datetime.now().isoformat()
+    collaboration_changed("collaboration.update", collaboration)
 
-    supabase.table("collaborations").update(update_data).eq("collaboration_id", data.collaboration_id).execute()
+    notify_collaboration(collaboration, "worker")
+    # the job's accepted-worker counter/state moved with this transition
+    job_index.apply([collaboration.pop("job", None)])
     return {"message": f"Request {data.status.lower()} successfully."}
 
+# -------------------- LIVE COLLABORATION EVENTS (Server-Sent Events) --------------------
+@router.get("/events/{worker_id}")
+async def worker_events(worker_id: str):
+    """Push new requests/applications and status changes for this worker (see realtime.py)."""
+    return StreamingResponse(
+        event_stream(f"worker:{worker_id}"),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 #---------------------GET ACTIVE COLLABORATIONS (Worker)--------------------
 @router.get("/active_collaborations/{worker_id}")
-def get_active_collaborations(worker_id: str):
+async def get_active_collaborations(worker_id: str, supabase=Depends(get_supabase)):
     """Get all active collaborations for a worker."""
-    collaborations = (
+    collaborations = await (
         supabase.table("collaborations")
-        .select("*")
+        .select(ACTIVE_COLLABORATION_COLUMNS)
         .eq("worker_id", worker_id)
         .in_("status", ["Accepted", "Active"])
         .execute()
@@ -237,68 +356,56 @@ def get_active_collaborations(worker_id: str):
     if not collaborations.data:
         return {"active_collaborations": []}
 
+    farmers, jobs = await fetch_collaboration_details(
+        supabase, collaborations.data, "farmer", "name, city, state"
+    )
+
     enriched = []
     for collab in collaborations.data:
-        farmer = (
-            supabase.table("farmer_registration")
-            .select("name, city, state")
-            .eq("id", collab["farmer_id"])
-            .execute()
-        )
-
-        job = (
-            supabase.table("job_listings")
-            .select("job_title, job_description")
-            .eq("job_id", collab["job_id"])
-            .execute()
-        )
-
         enriched.append({
             "collaboration_id": collab["collaboration_id"],
-            "farmer_details": farmer.data[0] if farmer.data else {},
-            "job_details": job.data[0] if job.data else {},
+            "farmer_details": farmers.get(collab["farmer_id"], {}),
+            "job_details": jobs.get(collab["job_id"], {}),
             "status": collab["status"],
+            "version": collab.get("version"),
             "started_at": collab.get("started_at"),
         })
 
     return {"active_collaborations": enriched}
 # -------------------- END COLLABORATION (Worker) --------------------
 @router.put("/end_collaboration/{collaboration_id}")
-def end_collaboration(collaboration_id: int, worker_id: str):
-    req = supabase.table("collaborations").select("*").eq("collaboration_id", collaboration_id).execute()
-    if not req.data:
-        raise HTTPException(status_code=404, detail="Request not found.")
+async def end_collaboration(collaboration_id: int, worker_id: str, supabase=Depends(get_supabase)):
+    # Ownership and status checks are part of the UPDATE (404/403/400 from Postgres)
+    collaboration = await complete_collaboration(supabase, collaboration_id, "worker", actor_id=worker_id)
 
-    record = req.data[0]
-    if record["worker_id"] != worker_id:
-        raise HTTPException(status_code=403, detail="Only the assigned worker can end this collaboration.")
-
-    if record["status"] not in ["Active", "Accepted"]:
-        raise HTTPException(status_code=400, detail="Cannot end collaboration unless it's active or accepted.")
-
-    supabase.table("collaborations").update({
-        "status": "Completed",
-        "ended_at": datetime.now().isoformat()
-    }).eq("collaboration_id", collaboration_id).execute()
+    collaboration_changed("collaboration.update", collaboration)
 
+    notify_collaboration(collaboration, "worker")
+    job_index.apply([collaboration.pop("job", None)])
     return {"message": "Collaboration ended successfully. Worker can now give feedback."}
 
 
 # -------------------- ADD FEEDBACK (Worker to Farmer) --------------------
 @router.post("/add_feedback")
-def add_feedback(data: FeedbackModel):
-    req = supabase.table("collaborations").select("*").eq("collaboration_id", data.collaboration_id).execute()
-    if not req.data:
+async def add_feedback(data: FeedbackModel, supabase=Depends(get_supabase)):
+    if data.given_by != "Worker":
+        raise HTTPException(status_code=400, detail="Workers can only give feedback as Worker.")
+
+    record = await fetch_one(supabase, "collaborations", "farmer_id, worker_id, status", {"collaboration_id": data.collaboration_id})
+    if not record:
         raise HTTPException(status_code=404, detail="Request not found.")
 
-    record = req.data[0]
     if data.worker_id != record["worker_id"]:
         raise HTTPException(status_code=403, detail="Only the worker can give feedback for the farmer.")
 
     if record["status"] != "Completed":
         raise HTTPException(status_code=400, detail="Feedback can only be given after collaboration is completed.")
 
-    supabase.table("feedback").insert({
+    if not (1 <= data.rating <= 5):
+        raise HTTPException(status_code=400, detail="Rating must be an integer between 1 and 5.")
+
+    # the insert trigger updates the farmer's rating aggregates
+    await execute_unique(supabase.table("feedback").insert({
         "collaboration_id": data.collaboration_id,
         "given_by": data.given_by,
         "farmer_id": data.farmer_id,
@@ -306,39 +413,72 @@ def add_feedback(data: FeedbackModel):
         "rating": data.rating, 
         "review": data.review,
         "created_at": datetime.now().isoformat()
-    }).execute()
+    }, returning="minimal"), "Feedback already given for this collaboration.")
+    await profile_cache.invalidate("farmer", record["farmer_id"])
+    notify_feedback("farmer", record["farmer_id"], data.rating, data.collaboration_id)
 
     return {"message": "Feedback saved successfully for farmer by worker."}
 
 
+# -------------------- NOTIFICATIONS --------------------
+@router.get("/notifications/{worker_id}")
+async def worker_notifications(
+    worker_id: str,
+    cursor: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    supabase=Depends(get_supabase),
+):
+    """Newest-first inbox page plus the unread badge count (see notifications.py)."""
+    return await inbox(supabase, "worker", worker_id, cursor, limit)
+
+
+@router.put("/notifications/{worker_id}/read")
+async def worker_notifications_read(worker_id: str, up_to: Optional[int] = None, supabase=Depends(get_supabase)):
+    """Mark all notifications (or those up to `up_to`) as read."""
+    return {"unread_count": await mark_read(supabase, "worker", worker_id, up_to)}
+
+
+# -------------------- DELTA SYNC --------------------
+@router.get("/sync/{worker_id}")
+async def worker_sync(
+    worker_id: str,
+    since: Optional[str] = None,
+    limit: int = Query(DEFAULT_SYNC_LIMIT, ge=1, le=MAX_SYNC_LIMIT),
+    supabase=Depends(get_supabase),
+):
+    """Jobs, collaborations and profile changed (or deleted) after the `since` cursor from the last call (see sync.py)."""
+    return await changes(supabase, "worker", worker_id, since, limit)
+
+
 # -------------------- WORKER DASHBOARD --------------------
 @router.get("/dashboard/{worker_id}")
-def worker_dashboard(worker_id: str):
+async def worker_dashboard(worker_id: str, supabase=Depends(get_supabase)):
     """
     Returns worker dashboard summary:
     - Profile info (name + profile picture)
     - Total applications
     - Active collaborations
+    - Pending requests
     """
 
     # Profile info
-    worker_data = supabase.table("worker_registration").select("name, profile_picture").eq("id", worker_id).execute()
-    if not worker_data.data:
+    # Counts are computed in Postgres (see worker_dashboard_counts)
+    worker_info, counts, latest = await asyncio.gather(
+        profile_cache.get_profile(supabase, "worker", worker_id),
+        supabase.rpc("worker_dashboard_counts", {"p_worker_id": worker_id}).execute(),
+        inbox(supabase, "worker", worker_id, None, DASHBOARD_NOTIFICATIONS),
+    )
+    if not worker_info:
         raise HTTPException(status_code=404, detail="Worker not found.")
 
-    worker_info = worker_data.data[0]
-
-    # Total applications
-    applications = supabase.table("collaborations").select("*").eq("worker_id", worker_id).execute()
-    total_applications = len(applications.data) if applications.data else 0
-
-    # Active collaborations
-    active = [req for req in applications.data if req["status"] in ["Accepted", "Active"]]
-    total_active = len(active)
+    counts = counts.data or {}
 
     return {
         "worker_name": worker_info.get("name"),
         "profile_picture": worker_info.get("profile_picture"),
-        "total_applications": total_applications,
-        "active_collaborations": total_active
+        "total_applications": counts.get("total_applications", 0),
+        "active_collaborations": counts.get("active_collaborations", 0),
+        "pending_requests": counts.get("pending_requests", 0),
+        "unread_notifications": latest["unread_count"],
+        "notifications": latest["notifications"],
     }